@@ -0,0 +1,210 @@
+"""
+PDF 백엔드 비교 (출력 동등성 확인 + 속도)
+- 동등성: 모든 프로필 × 원본 1/2페이지 × 출력 모드(merge/xobject) × 경로
+  (copy_pages + process_pdf, build_shipment 2배치, build_reprint 범위)와 상속 속성/회전 원본에서
+  기준 백엔드(pypdf4)와 다른 백엔드 출력의 페이지 수, 페이지 크기·회전, 페이지별 단어 목록,
+  래스터화 결과(PyMuPDF, 72 dpi)가 같은지 확인. 다르면 종료 코드 1
+- 속도: 박스 수별 copy_pages / process_pdf / build_shipment(+쓰기)의 pages/s 와 출력 크기
+
+사용법:
+  python benchmarks/bench_backends.py                        # 동등성 확인 + 속도 (설치된 백엔드 모두)
+  python benchmarks/bench_backends.py --check-only
+  python benchmarks/bench_backends.py --boxes 1000 10000 --profile brazil
+(pikepdf: uv sync --extra pikepdf, 래스터화: uv sync --extra preview)
+같은 동등성 확인은 tests/test_backends.py 가 자동으로 실행한다 (uv run pytest, 두 패키지가 없으면 건너뜀)
+"""
+
+import argparse
+import importlib.util
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+from source_cache import ParsedSource  # noqa: E402
+from fixtures import make_wms_pdf  # noqa: E402
+
+REFERENCE = "pypdf4"
+PIXEL_TOLERANCE = 40  # 채널 값 차이가 이보다 큰 픽셀만 다른 것으로 셈 (안티앨리어싱 오차 무시)
+PARAMS = {"address": "SOME ADDR (x)", "batch_number": "007/25"}
+OUTPUT_PATHS = ("process_pdf", "build_shipment", "build_reprint")  # render_outputs 의 경로 이름
+
+
+def available_backends():
+    return [name for name in engine.PDF_BACKENDS
+            if name == REFERENCE or importlib.util.find_spec(name) is not None]
+
+
+def make_inherited_pdf(pagesize, rotate):
+    """MediaBox/Resources/Rotate 가 페이지가 아니라 페이지 트리(/Pages)에 있는 2페이지 원본"""
+    import pikepdf
+
+    pdf = pikepdf.open(io.BytesIO(make_wms_pdf(2, pagesize)))
+    first = pdf.pages[0].obj
+    pdf.Root.Pages.MediaBox = first.MediaBox
+    pdf.Root.Pages.Resources = first.Resources
+    pdf.Root.Pages.Rotate = rotate
+    for page in pdf.pages:
+        for key in ("/MediaBox", "/Resources", "/Rotate"):
+            if key in page.obj:
+                del page.obj[key]
+    buf = io.BytesIO()
+    pdf.save(buf)
+    return buf.getvalue()
+
+
+# ─── 동등성 ──────────────────────────────────────────────────────────
+
+def render_outputs(backend, profile_key, sources, output_mode):
+    """경로별 출력 PDF 바이트 {경로 이름: bytes}"""
+    copied = engine.copy_pages(sources[0], 3, pdf_backend=backend)
+    outputs = {"process_pdf": engine.process_pdf(copied, profile_key, dict(PARAMS), 5, 224, output_mode,
+                                                 pdf_backend=backend)[0]}
+
+    def spec():
+        # 명세마다 새 reader (PyPDF4 writer 는 write() 중에 reader 객체를 바꾸므로 명세를 두 번 쓰지 않는다)
+        batches = [{"source": ParsedSource(data), "copies": copies, "batch_number": f"{b + 7:03d}/25",
+                    "address": PARAMS["address"]} for b, (data, copies) in enumerate(zip(sources, (3, 2)))]
+        return engine.build_shipment_spec(profile_key, 10, batches, dict(PARAMS), output_mode, pdf_backend=backend)
+
+    for name, build in (("build_shipment", lambda: engine.build_shipment(spec())),
+                        ("build_reprint", lambda: engine.build_reprint(spec(), 2, 4))):
+        buf = io.BytesIO()
+        build().write(buf)
+        outputs[name] = buf.getvalue()
+    return outputs
+
+
+def page_signatures(pymupdf, pdf_bytes):
+    """페이지별 (크기, 회전, 단어 목록, 72 dpi 래스터 바이트)"""
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [(tuple(page.rect), page.rotation, sorted(page.get_text().split()), page.get_pixmap(dpi=72).samples)
+                for page in doc]
+
+
+def compare_pages(expected, actual):
+    """다른 점 설명 목록 (같으면 빈 목록)"""
+    if len(expected) != len(actual):
+        return [f"페이지 수 {len(expected)} != {len(actual)}"]
+    problems = []
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a[:2] != b[:2]:
+            problems.append(f"{i + 1}페이지 크기/회전 {a[:2]} != {b[:2]}")
+        if a[2] != b[2]:
+            problems.append(f"{i + 1}페이지 글자 {len(a[2])}단어 != {len(b[2])}단어")
+        if a[3] != b[3]:
+            differing = sum(1 for x, y in zip(a[3], b[3]) if abs(x - y) > PIXEL_TOLERANCE)
+            if differing or len(a[3]) != len(b[3]):
+                problems.append(f"{i + 1}페이지 래스터 {differing}개 값 다름")
+    return problems
+
+
+def equivalence_cases(inherited=True):
+    """동등성 확인 원본 [(이름, 프로필, [원본 PDF 바이트, ...])]. inherited: 상속 속성 원본 포함 (pikepdf 필요)"""
+    cases = []
+    for profile_key, profile in engine.COUNTRY_PROFILES.items():
+        for num_pages in (1, 2):
+            sources = [make_wms_pdf(num_pages, profile["pagesize"]), make_wms_pdf(3 - num_pages, profile["pagesize"])]
+            cases.append((f"{profile_key}/{num_pages}p", profile_key, sources))
+    if inherited:
+        for rotate in (0, 90):
+            sources = [make_inherited_pdf("letter", rotate), make_wms_pdf(1, "letter")]
+            cases.append((f"brazil/상속속성/rotate{rotate}", "brazil", sources))
+    return cases
+
+
+def output_differences(pymupdf, backend, profile_key, sources, output_mode):
+    """기준 백엔드와 backend 출력의 경로별 다른 점 {경로: [설명, ...]} (모두 같으면 빈 dict)"""
+    reference = render_outputs(REFERENCE, profile_key, sources, output_mode)
+    outputs = render_outputs(backend, profile_key, sources, output_mode)
+    differences = {}
+    for path, data in outputs.items():
+        problems = compare_pages(page_signatures(pymupdf, reference[path]), page_signatures(pymupdf, data))
+        if problems:
+            differences[path] = problems
+    return differences
+
+
+def check_equivalence(backends):
+    """기준 백엔드와 나머지 백엔드의 출력 비교. 반환값: 다른 항목 수"""
+    pymupdf = engine._import_pymupdf()
+    if pymupdf is None:
+        print("PyMuPDF 가 없어 동등성을 확인할 수 없습니다 (uv sync --extra preview)")
+        return 1
+
+    failures = 0
+    checked = 0
+    for name, profile_key, sources in equivalence_cases("pikepdf" in backends):
+        for output_mode in engine.OUTPUT_MODES:
+            for backend in backends:
+                if backend == REFERENCE:
+                    continue
+                differences = output_differences(pymupdf, backend, profile_key, sources, output_mode)
+                checked += len(OUTPUT_PATHS)
+                failures += len(differences)
+                for path, problems in differences.items():
+                    print(f"다름: {name} {output_mode} {path} ({REFERENCE} vs {backend}): {'; '.join(problems[:3])}")
+    print(f"동등성: {checked}개 출력 비교, 다름 {failures}개")
+    return failures
+
+
+# ─── 속도 ────────────────────────────────────────────────────────────
+
+def timed(fn, min_seconds=0.5):
+    """min_seconds 가 찰 때까지 반복해 가장 빠른 시간과 마지막 결과"""
+    best, total, result = None, 0.0, None
+    while best is None or total < min_seconds:
+        t0 = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - t0
+        best = seconds if best is None else min(best, seconds)
+        total += seconds
+    return best, result
+
+
+def bench(backends, profile_key, box_counts):
+    profile = engine.COUNTRY_PROFILES[profile_key]
+    data = make_wms_pdf(1, profile["pagesize"])
+    params = {"address": profile.get("fixed_address", "TEST ADDRESS"), "batch_number": "007/25"}
+    source = ParsedSource(data)
+
+    def shipment(backend, boxes):
+        batches = [{"source": source, "copies": boxes, "batch_number": "007/25", "address": params["address"]}]
+        spec = engine.build_shipment_spec(profile_key, boxes, batches, dict(params), pdf_backend=backend)
+        buf = io.BytesIO()
+        engine.build_shipment(spec).write(buf)
+        return buf.getvalue()
+
+    print(f"\n{profile_key} 1페이지 원본")
+    print(f"{'백엔드':<8} | {'박스':>6} | {'copy_pages':>12} | {'process_pdf':>12} | {'build_shipment':>14} | {'출력 bytes':>11}")
+    for boxes in box_counts:
+        for backend in backends:
+            shipment(backend, 1)  # 글꼴/코드 경로 준비
+            copy_sec, copied = timed(lambda: engine.copy_pages(data, boxes, pdf_backend=backend))
+            process_sec, _ = timed(lambda: engine.process_pdf(copied, profile_key, params, 1, boxes,
+                                                               pdf_backend=backend))
+            ship_sec, output = timed(lambda: shipment(backend, boxes))
+            print(f"{backend:<8} | {boxes:>6,} | {boxes / copy_sec:>8,.0f} p/s | {boxes / process_sec:>8,.0f} p/s "
+                  f"| {boxes / ship_sec:>10,.0f} p/s | {len(output):>11,}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 백엔드 비교")
+    parser.add_argument("--boxes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--profile", default="brazil", choices=sorted(engine.COUNTRY_PROFILES))
+    parser.add_argument("--check-only", action="store_true", help="동등성 확인만")
+    args = parser.parse_args()
+
+    backends = available_backends()
+    print(f"백엔드: {', '.join(backends)}")
+    failures = check_equivalence(backends) if len(backends) > 1 else 0
+    if not args.check_only:
+        bench(backends, args.profile, args.boxes)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
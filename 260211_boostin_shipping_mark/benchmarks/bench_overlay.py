@@ -0,0 +1,51 @@
+"""
+process_pdf 오버레이 벤치마크
+- 합성 원본을 N 박스만큼 복사한 뒤 오버레이 적용 시간을 측정
+- 페이지당 비용이 박스 수와 무관하게 일정한지 확인하는 용도
+
+사용법: python benchmarks/bench_overlay.py [박스 수 ...] [--profile brazil] [--mode merge|xobject]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+from fixtures import make_wms_pdf  # noqa: E402
+
+
+def run(profile_key, boxes, output_mode="merge"):
+    profile = engine.COUNTRY_PROFILES[profile_key]
+    source = make_wms_pdf(1, profile["pagesize"])
+    params = {"address": profile.get("fixed_address", "TEST ADDRESS"), "batch_number": "007/25"}
+
+    t0 = time.perf_counter()
+    copied = engine.copy_pages(source, boxes)
+    t1 = time.perf_counter()
+    processed, pages = engine.process_pdf(copied, profile_key, params, 1, boxes, output_mode=output_mode)
+    t2 = time.perf_counter()
+
+    overlay_sec = t2 - t1
+    print(f"{profile_key:<12} {output_mode:<7} {boxes:>6} boxes | copy {t1 - t0:7.3f}s | overlay {overlay_sec:7.3f}s "
+          f"| {overlay_sec / pages * 1000:6.2f} ms/page | {pages / overlay_sec:7.1f} pages/s "
+          f"| {len(processed) / 1024:9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="process_pdf 오버레이 벤치마크")
+    parser.add_argument("boxes", nargs="*", type=int, default=[10, 100, 1000])
+    parser.add_argument("--profile", default="brazil", choices=sorted(engine.COUNTRY_PROFILES))
+    parser.add_argument("--mode", default=None, choices=engine.OUTPUT_MODES,
+                        help="출력 모드 (생략 시 모든 모드 비교)")
+    args = parser.parse_args()
+    modes = [args.mode] if args.mode else engine.OUTPUT_MODES
+    for boxes in args.boxes:
+        for mode in modes:
+            run(args.profile, boxes, mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+배치 병렬 렌더링 벤치마크 + 결정성 확인
+- build_shipment(workers=1/2/4/8) 실행 시간 비교
+- 각 워커 수의 결과가 순차 처리(workers=1)와 페이지별로 같은지 확인
+  (페이지 content stream을 풀어서 비교하므로 페이지 번호/순서가 하나라도 다르면 실패,
+   mergePage가 충돌 리소스 이름에 붙이는 임의 uuid는 비교 전에 지운다)
+  같은 확인은 tests/test_parallel.py 가 자동으로 실행한다 (uv run pytest)
+
+사용법: python benchmarks/bench_parallel.py [--batches 8] [--copies 500] [--workers 1 2 4 8]
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+from PyPDF4 import PdfFileReader  # noqa: E402
+from source_cache import ParsedSource  # noqa: E402
+from fixtures import make_wms_pdf  # noqa: E402
+
+
+def make_spec(profile_key, batches, copies, output_mode):
+    """parse_generate_request 와 같은 형태의 출고 명세를 직접 구성"""
+    profile = engine.COUNTRY_PROFILES[profile_key]
+    spec_batches = []
+    for b in range(batches):
+        pdf_bytes = make_wms_pdf(1 + b % 2, profile["pagesize"])
+        source = ParsedSource(pdf_bytes)
+        reader = source.open()
+        spec_batches.append({
+            "reader": reader,
+            "source": source,
+            "copies": copies,
+            "params": {"address": profile.get("fixed_address", "TEST ADDRESS"),
+                       "batch_number": f"{b + 7:03d}/25"},
+            "pages": len(engine.copy_page_indices(reader.getNumPages(), copies)),
+        })
+    return {
+        "profile_key": profile_key,
+        "total_boxes": batches * copies,
+        "output_mode": output_mode,
+        "batches": spec_batches,
+    }
+
+
+# PyPDF4 mergePage의 리소스 이름 변경 규칙: 원래 이름 + uuid4
+MERGE_RENAME = re.compile(rb"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def page_contents(pdf_bytes):
+    """페이지별 content stream(풀어낸 바이트) 목록"""
+    reader = PdfFileReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for i in range(reader.getNumPages()):
+        contents = reader.getPage(i).getContents()
+        parts = contents if isinstance(contents, list) else [contents]
+        data = b"".join(c.getObject().getData() for c in parts)
+        pages.append(MERGE_RENAME.sub(b"", data))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 병렬 렌더링 벤치마크")
+    parser.add_argument("--batches", type=int, default=8)
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--profile", default="brazil", choices=sorted(engine.COUNTRY_PROFILES))
+    parser.add_argument("--mode", default="merge", choices=engine.OUTPUT_MODES)
+    args = parser.parse_args()
+
+    spec = make_spec(args.profile, args.batches, args.copies, args.mode)
+    print(f"{args.profile} ({args.mode}): {args.batches} batches x {args.copies} copies, cpu={os.cpu_count()}")
+
+    reference = None
+    for workers in args.workers:
+        engine.build_shipment(spec, workers=workers)  # 프로세스 풀 기동 비용 제외 (워밍업)
+        t0 = time.perf_counter()
+        writer = engine.build_shipment(spec, workers=workers)
+        out = io.BytesIO()
+        writer.write(out)
+        elapsed = time.perf_counter() - t0
+
+        pages = page_contents(out.getvalue())
+        if reference is None:
+            reference, base = pages, elapsed
+        same = pages == reference
+        print(f"  workers={workers:<2} | {elapsed:7.3f}s | x{base / elapsed:4.2f} "
+              f"| {len(pages)} pages | {'same as serial' if same else 'MISMATCH'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+배치 파이프라인 메모리/시간 벤치마크
+- legacy : copy_pages -> process_pdf -> PdfFileReader 재파싱 -> 합본 writer (기존 api_generate 방식)
+- single : render_batch 로 원본 reader에서 합본 writer까지 한 번에 (중간 직렬화 없음)
+시간은 tracemalloc 없이, 최대 메모리는 tracemalloc 켠 상태에서 따로 측정한다.
+
+사용법: python benchmarks/bench_pipeline.py [--batches 10] [--copies 500] [--profile brazil]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+from PyPDF4 import PdfFileReader, PdfFileWriter  # noqa: E402
+from fixtures import make_wms_pdf  # noqa: E402
+
+
+def legacy(sources, copies, profile_key, params, total, output_mode):
+    combined_writer = PdfFileWriter()
+    current_doc_num = 1
+    for pdf_bytes in sources:
+        copied_bytes = engine.copy_pages(pdf_bytes, copies)
+        processed_bytes, pages_added = engine.process_pdf(
+            copied_bytes, profile_key, params, current_doc_num, total, output_mode=output_mode
+        )
+        processed_reader = PdfFileReader(io.BytesIO(processed_bytes))
+        for p in range(processed_reader.getNumPages()):
+            combined_writer.addPage(processed_reader.getPage(p))
+        current_doc_num += pages_added
+    out = io.BytesIO()
+    combined_writer.write(out)
+    return out.getvalue()
+
+
+def single(sources, copies, profile_key, params, total, output_mode):
+    combined_writer = PdfFileWriter()
+    current_doc_num = 1
+    for pdf_bytes in sources:
+        current_doc_num += engine.render_batch(
+            combined_writer, PdfFileReader(io.BytesIO(pdf_bytes)), copies,
+            profile_key, params, current_doc_num, total, output_mode=output_mode
+        )
+    out = io.BytesIO()
+    combined_writer.write(out)
+    return out.getvalue()
+
+
+def measure(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 파이프라인 메모리/시간 벤치마크")
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--profile", default="brazil", choices=sorted(engine.COUNTRY_PROFILES))
+    args = parser.parse_args()
+
+    profile = engine.COUNTRY_PROFILES[args.profile]
+    # 배치마다 별도 업로드 파일이라고 가정 (1페이지/2페이지 원본 교대로)
+    sources = [make_wms_pdf(1 + b % 2, profile["pagesize"]) for b in range(args.batches)]
+    params = {"address": profile.get("fixed_address", "TEST ADDRESS"), "batch_number": "007/25"}
+    total = args.batches * args.copies
+
+    print(f"{args.profile}: {args.batches} batches x {args.copies} copies = {total} pages")
+    for mode in engine.OUTPUT_MODES:
+        for name, fn in (("legacy", legacy), ("single", single)):
+            elapsed, peak, size = measure(fn, sources, args.copies, args.profile, params, total, mode)
+            print(f"  {mode:<7} {name:<6} | {elapsed:7.3f}s | peak {peak / 2**20:8.1f} MiB "
+                  f"| output {size / 2**20:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+프로필 저장소 벤치마크 (profiles.py)
+- /api/profiles, /api/addresses, /api/presets: 매번 jsonify (이전) vs 미리 만든 JSON bytes vs ETag 일치(304)
+- 렌더링 경로의 프로필 조회: 일반 dict (이전) vs 저장소 현재 스냅샷 (compile_layout 1회)
+- profiles.json + 현장 설정 다시 읽기(검증·직렬화 포함) 시간
+라우트 함수를 test_request_context 안에서 직접 불러 서버 처리 시간만 잰다
+(빈 요청 컨텍스트를 만드는 시간은 뺀 값, WSGI/네트워크 제외).
+
+사용법: python benchmarks/bench_profiles.py [--repeat 5000] [--profile brazil]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import app  # noqa: E402
+import engine  # noqa: E402
+import profiles  # noqa: E402
+import webapp  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+
+def per_call(fn, repeat):
+    """fn 을 repeat 회 호출한 1회 평균 (µs, 5번 중 최솟값)"""
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / repeat * 1e6
+
+
+def thaw(value):
+    """스냅샷(MappingProxyType/tuple) -> 이전과 같은 일반 dict/list"""
+    return json.loads(json.dumps(value, default=dict))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프로필 저장소 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5000)
+    parser.add_argument("--profile", default="brazil", choices=sorted(profiles.COUNTRY_PROFILES))
+    args = parser.parse_args()
+    flask_app = app.app
+    snapshot = profiles.store.current()
+
+    def empty():
+        with flask_app.test_request_context("/api/profiles"):
+            pass
+
+    base = per_call(empty, args.repeat)
+    print(f"{'응답':<14} | {'jsonify (이전)':>14} | {'미리 만든 bytes':>15} | {'304 (ETag 일치)':>15} | {'본문':>8}")
+    routes = {"profiles": webapp.api_profiles, "addresses": webapp.api_addresses, "presets": webapp.api_presets}
+    for name, route in routes.items():
+        plain = thaw(getattr(snapshot, name))
+        etag, body = snapshot.documents[name]
+        url = f"/api/{name}"
+
+        def old():
+            with flask_app.test_request_context(url):
+                return jsonify(plain).get_data()
+
+        def new():
+            with flask_app.test_request_context(url):
+                return route().get_data()
+
+        def not_modified():
+            with flask_app.test_request_context(url, headers={"If-None-Match": f'"{etag}"'}):
+                response = route()
+                assert response.status_code == 304
+                return response.get_data()
+
+        old_us, new_us, cached_us = (per_call(fn, args.repeat) - base for fn in (old, new, not_modified))
+        print(f"{url:<14} | {old_us:>11.1f} µs | {new_us:>12.1f} µs | {cached_us:>12.1f} µs | {len(body):>6,} B",
+              flush=True)
+
+    # 렌더링 경로: compile_layout 은 요청마다 프로필을 조회한다
+    params = {"address": "TEST", "batch_number": "007/25"}
+    live = engine.COUNTRY_PROFILES
+    live_us = per_call(lambda: engine.compile_layout(args.profile, params), args.repeat)
+    engine.COUNTRY_PROFILES = thaw(dict(snapshot.profiles))
+    try:
+        plain_us = per_call(lambda: engine.compile_layout(args.profile, params), args.repeat)
+    finally:
+        engine.COUNTRY_PROFILES = live
+    print(f"\ncompile_layout({args.profile}): 일반 dict {plain_us:.1f} µs, 저장소 {live_us:.1f} µs")
+
+    reload_ms = per_call(lambda: profiles.load_snapshot(), 20) / 1000
+    print(f"다시 읽기 (profiles.json + 현장 설정 {len(snapshot.presets)}개, 검증·직렬화 포함): {reload_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+운영 모드 서버 부하 테스트
+- `python app.py --server ... --threads ...` 를 띄우고 /api/preview 를 동시에 호출해 초당 처리 요청 수(req/s)와 지연 측정
+- 끝나면 큰 /api/generate 를 보내는 도중 SIGTERM 을 보내 응답이 끝까지 전달되는지(정상 종료) 확인
+실패한 요청이 있거나 종료 중 응답이 끊기면 종료 코드 1.
+
+사용법: python benchmarks/bench_serve.py [--server waitress werkzeug] [--threads 4] [--concurrency 1 4 8] [--requests 200]
+"""
+
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_startup import APP_DIR, free_port, get_json, multipart
+from fixtures import make_wms_pdf
+
+
+def start_server(backend, threads):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    # 서버는 요청마다 표준 오류에 로그를 쓰므로 파이프(읽지 않으면 가득 차서 서버가 멈춤) 대신 임시 파일로 받는다
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen([sys.executable, "app.py", "--port", str(port), "--server", backend,
+                             "--threads", str(threads)], cwd=APP_DIR,
+                            stdout=subprocess.DEVNULL, stderr=log, start_new_session=True)
+    while True:
+        try:
+            if get_json(f"{base}/api/health")["warm"]:
+                return proc, base
+        except (urllib.error.URLError, ConnectionError):
+            if proc.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f"{backend}: 서버가 종료되었습니다\n{log.read().decode()}")
+        time.sleep(0.02)
+
+
+def post(url, body, content_type):
+    """(상태 코드, 응답 바이트 수, 걸린 시간). 연결 실패는 상태 0"""
+    t0 = time.perf_counter()
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            return resp.status, len(resp.read()), time.perf_counter() - t0
+    except urllib.error.HTTPError as e:
+        return e.code, 0, time.perf_counter() - t0
+    except (urllib.error.URLError, ConnectionError):
+        return 0, 0, time.perf_counter() - t0
+
+
+def load_test(base, body, content_type, concurrency, total):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: post(f"{base}/api/preview", body, content_type), range(total)))
+    elapsed = time.perf_counter() - t0
+    latencies = sorted(r[2] for r in results)
+    failed = sum(1 for r in results if r[0] != 200)
+    return total / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], failed
+
+
+def check_shutdown(proc, base, body, content_type):
+    """생성 요청 처리 중 SIGTERM -> 응답이 온전히 오고 프로세스가 스스로 종료되는지"""
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(r=post(f"{base}/api/generate", body, content_type)))
+    worker.start()
+    time.sleep(0.3)
+    t0 = time.perf_counter()
+    os.kill(proc.pid, signal.SIGTERM)
+    worker.join()
+    code = proc.wait(timeout=60)
+    status, size, _ = result["r"]
+    return status == 200 and size > 0 and code == 0, status, size, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="운영 모드 서버 부하 테스트")
+    parser.add_argument("--server", nargs="+", default=["waitress", "werkzeug"])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=200, help="동시성 단계별 요청 수")
+    parser.add_argument("--profile", default="brazil")
+    args = parser.parse_args()
+
+    source = make_wms_pdf(1)
+    fields = {"profile": args.profile, "total_boxes": "10", "batch_count": "1", "copies_0": "10",
+              "batch_number_0": "007/25", "address_0": "TEST ADDRESS"}
+    preview = multipart(fields, {"pdf_0": ("batch_0.pdf", source)})
+    fields.update(total_boxes="3000", copies_0="3000")
+    generate = multipart(fields, {"pdf_0": ("batch_0.pdf", source)})
+
+    ok = True
+    for backend in args.server:
+        proc, base = start_server(backend, args.threads)
+        try:
+            for concurrency in args.concurrency:
+                rps, p50, p95, failed = load_test(base, *preview, concurrency, args.requests)
+                ok = ok and not failed
+                print(f"{backend:<9} 동시 {concurrency:>3} | {rps:7.1f} req/s | p50 {p50 * 1000:7.1f} ms "
+                      f"| p95 {p95 * 1000:7.1f} ms | 실패 {failed}")
+            passed, status, size, seconds = check_shutdown(proc, base, *generate)
+            ok = ok and passed
+            print(f"{backend:<9} 종료 중 생성 요청: 상태 {status}, {size:,} bytes, 종료까지 {seconds:.2f}s "
+                  f"{'OK' if passed else '실패'}")
+        finally:
+            if proc.poll() is None:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
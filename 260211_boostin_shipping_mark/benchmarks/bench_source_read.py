@@ -0,0 +1,85 @@
+"""
+원본 PDF 읽기 벤치마크 (pdf/ 폴더 캐시 실패 시 비용)
+- bytes: 파일 전체를 f.read() 로 읽어 ParsedSource 에 넘김 (이전 방식, 원본 바이트를 캐시에 보관)
+- mmap:  source_cache.load_source() (mmap 을 파서에 바로 넘기고 원본 바이트는 보관하지 않음)
+스캔 이미지가 들어간 큰 WMS 출력물을 흉내 낸 PDF로, 방식별로 새 프로세스에서
+파싱 시간, Python 힙 최대 사용량(tracemalloc), RSS 최대/파싱 후 증가량, 캐시가 잡는 크기를 잰다.
+(mmap 방식의 RSS 최대치에는 OS가 언제든 회수할 수 있는 파일 페이지가 포함된다)
+
+사용법: python benchmarks/bench_source_read.py [--mb 50]   (Linux 전용: /proc 사용)
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 최대 RSS: /proc 의 VmHWM (ru_maxrss 는 exec 전 부모 프로세스의 최댓값을 물려받아 쓰지 않음)
+MEASURE = r"""
+import sys, time, tracemalloc
+sys.path.insert(0, sys.argv[1])
+from source_cache import ParsedSource, load_source
+path, method = sys.argv[2], sys.argv[3]
+
+def status_kb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+base_peak, base_rss = status_kb("VmHWM"), status_kb("VmRSS")
+tracemalloc.start()
+t0 = time.perf_counter()
+if method == "bytes":
+    with open(path, "rb") as f:
+        source = ParsedSource(f.read())
+else:
+    source = load_source(path)
+seconds = time.perf_counter() - t0
+peak = tracemalloc.get_traced_memory()[1]
+peak_rss, rss = status_kb("VmHWM") - base_peak, status_kb("VmRSS") - base_rss
+print(seconds, peak, peak_rss * 1024, rss * 1024, source.size)
+"""
+
+
+def make_scanned_pdf(path, megabytes):
+    """페이지마다 압축하지 않은 스캔 이미지(약 8 MB)가 들어간 PDF 파일 생성"""
+    from PIL import Image
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    side = 1632  # 1632 x 1632 RGB ~ 8 MB
+    pages = max(1, round(megabytes / (side * side * 3 / 1024 / 1024)))
+    can = canvas.Canvas(path, pagesize=letter, pageCompression=0)
+    for p in range(pages):
+        image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+        buf = io.BytesIO()
+        image.save(buf, "PNG", compress_level=0)
+        can.drawImage(ImageReader(buf), 36, 36, 540, 540)
+        can.showPage()
+    can.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="원본 PDF 읽기 벤치마크")
+    parser.add_argument("--mb", type=float, default=50, help="테스트 PDF 크기(대략)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.pdf")
+        make_scanned_pdf(path, args.mb)
+        print(f"원본 {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+        for method in ("bytes", "mmap"):
+            out = subprocess.run([sys.executable, "-c", MEASURE, APP_DIR, path, method],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            seconds = float(out[0])
+            peak, peak_rss, rss, size = (int(v) / 2**20 for v in out[1:])
+            print(f"{method:<6} | 파싱 {seconds * 1000:7.1f} ms | 힙 최대 {peak:6.1f} MiB "
+                  f"| RSS 최대 {peak_rss:6.1f} MiB | 파싱 후 RSS {rss:6.1f} MiB | 캐시 크기 {size:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+웹앱 시작 시간 / 첫 요청 지연 벤치마크
+- import 시간: 새 프로세스에서 `import app` / `import engine` (중앙값)
+- 서버 준비 시간: `python app.py` 실행부터 /api/health 응답까지
+- 첫 요청 지연: 준비 직후 첫 /api/generate 와 두 번째 요청 시간
+시작 방식 debug(리로더), production(사전 준비 없음), production+warm(사전 준비 완료 후 요청)을 비교한다.
+--max-* 기준을 넘으면 종료 코드 1 (회귀 감지용).
+
+사용법: python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 400] [--max-ready-ms 800] [--max-first-ms 300]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from fixtures import make_wms_pdf
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "debug": ["--debug"],
+    "production": ["--no-warmup"],
+    "production+warm": [],
+}
+
+
+def import_seconds(module, runs):
+    """새 프로세스에서 module import 에 걸린 시간 (인터프리터 시작 포함, 중앙값)"""
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=APP_DIR, check=True)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def multipart(fields, files):
+    """urllib 용 multipart/form-data 본문"""
+    boundary = uuid.uuid4().hex
+    body = b""
+    for name, value in fields.items():
+        body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n").encode()
+    for name, (filename, data) in files.items():
+        body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: application/pdf\r\n\r\n").encode() + data + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def post_generate(base, body, content_type):
+    t0 = time.perf_counter()
+    req = urllib.request.Request(f"{base}/api/generate", data=body, headers={"Content-Type": content_type})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        resp.read()
+    return time.perf_counter() - t0
+
+
+def run_mode(mode, body, content_type):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "app.py", "--port", str(port)] + MODES[mode], cwd=APP_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        while True:
+            try:
+                health = get_json(f"{base}/api/health")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if proc.poll() is not None:
+                    raise RuntimeError(f"{mode}: 서버가 종료되었습니다 (코드 {proc.returncode})")
+                time.sleep(0.01)
+        ready = time.perf_counter() - t0
+
+        warm = None
+        if mode == "production+warm":
+            while not health["warm"]:
+                time.sleep(0.01)
+                health = get_json(f"{base}/api/health")
+            warm = time.perf_counter() - t0
+
+        first = post_generate(base, body, content_type)
+        second = post_generate(base, body, content_type)
+        return ready, warm, first, second
+    finally:
+        # debug 모드는 리로더가 자식 프로세스를 띄우므로 프로세스 그룹 전체를 종료
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웹앱 시작 시간 / 첫 요청 지연 벤치마크")
+    parser.add_argument("--runs", type=int, default=5, help="import 시간 측정 반복 횟수")
+    parser.add_argument("--profile", default="brazil")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="import app 허용 최대 시간")
+    parser.add_argument("--max-ready-ms", type=float, default=None, help="production 서버 준비 허용 최대 시간")
+    parser.add_argument("--max-first-ms", type=float, default=None, help="사전 준비 후 첫 요청 허용 최대 시간")
+    args = parser.parse_args()
+
+    source = make_wms_pdf(1)
+    body, content_type = multipart(
+        {"profile": args.profile, "total_boxes": "10", "batch_count": "1", "copies_0": "10",
+         "batch_number_0": "007/25", "address_0": "TEST ADDRESS"},
+        {"pdf_0": ("batch_0.pdf", source)},
+    )
+
+    import_app = import_seconds("app", args.runs)
+    print(f"import app    {import_app * 1000:7.1f} ms")
+    print(f"import engine {import_seconds('engine', args.runs) * 1000:7.1f} ms")
+
+    results = {}
+    for mode in MODES:
+        ready, warm, first, second = run_mode(mode, body, content_type)
+        results[mode] = (ready, first)
+        warm_text = f"{warm * 1000:7.1f} ms" if warm is not None else "      -   "
+        print(f"{mode:<16} | 준비 {ready * 1000:7.1f} ms | 사전 준비 완료 {warm_text} "
+              f"| 첫 요청 {first * 1000:7.1f} ms | 두 번째 {second * 1000:7.1f} ms")
+
+    failures = []
+    if args.max_import_ms is not None and import_app * 1000 > args.max_import_ms:
+        failures.append(f"import app {import_app * 1000:.1f} ms > {args.max_import_ms} ms")
+    if args.max_ready_ms is not None and results["production"][0] * 1000 > args.max_ready_ms:
+        failures.append(f"서버 준비 {results['production'][0] * 1000:.1f} ms > {args.max_ready_ms} ms")
+    if args.max_first_ms is not None and results["production+warm"][1] * 1000 > args.max_first_ms:
+        failures.append(f"첫 요청 {results['production+warm'][1] * 1000:.1f} ms > {args.max_first_ms} ms")
+    for failure in failures:
+        print(f"기준 초과: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+/api/generate 응답 방식 벤치마크 (Flask test client)
+- buffered : 합본 PDF 전체를 BytesIO에 쓴 뒤 send_file
+- stream   : iter_pdf_chunks 로 쓰는 즉시 청크 전송
+첫 바이트까지 시간(TTFB), 전체 시간, tracemalloc 최대 메모리를 비교한다.
+
+사용법: python benchmarks/bench_stream.py [--batches 4] [--copies 1000] [--profile brazil]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import webapp  # noqa: E402
+from profiles import COUNTRY_PROFILES  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from upload_store import UploadStore  # noqa: E402
+from fixtures import make_wms_pdf  # noqa: E402
+
+
+def build_form(profile_key, batches, copies, source):
+    form = {
+        "profile": profile_key,
+        "total_boxes": str(batches * copies),
+        "batch_count": str(batches),
+        "output_mode": "xobject",
+    }
+    for b in range(batches):
+        form[f"pdf_{b}"] = (io.BytesIO(source), f"batch_{b}.pdf")
+        form[f"copies_{b}"] = str(copies)
+        form[f"batch_number_{b}"] = f"{b + 7:03d}/25"
+        form[f"address_{b}"] = "TEST ADDRESS"
+    return form
+
+
+def run(stream, profile_key, batches, copies, source):
+    app.app.config["STREAM_RESPONSE"] = stream
+    # 결과 캐시를 끄고 업로드 저장소도 새로 (두 번째 방식이 첫 번째 결과나 파싱 결과를 그대로 쓰지 않도록)
+    webapp.result_cache = ResultCache(tempfile.mkdtemp(prefix="bench_stream_"), max_bytes=0)
+    webapp.source_provider.store = UploadStore(tempfile.mkdtemp(prefix="bench_stream_uploads_"))
+    client = app.app.test_client()
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    resp = client.post("/api/generate", data=build_form(profile_key, batches, copies, source),
+                       content_type="multipart/form-data", buffered=False)
+    chunks = iter(resp.response)
+    first = next(chunks)
+    ttfb = time.perf_counter() - t0
+    size = len(first) + sum(len(c) for c in chunks)
+    total = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    resp.close()
+    return ttfb, total, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/api/generate 스트리밍 벤치마크")
+    parser.add_argument("--batches", type=int, default=4)
+    parser.add_argument("--copies", type=int, default=1000)
+    parser.add_argument("--profile", default="brazil", choices=sorted(COUNTRY_PROFILES))
+    args = parser.parse_args()
+
+    source = make_wms_pdf(1, COUNTRY_PROFILES[args.profile]["pagesize"])
+    print(f"{args.profile}: {args.batches} batches x {args.copies} copies")
+    for stream in (False, True):
+        ttfb, total, peak, size = run(stream, args.profile, args.batches, args.copies, source)
+        name = "stream" if stream else "buffered"
+        print(f"  {name:<8} | TTFB {ttfb:6.3f}s | total {total:6.3f}s "
+              f"| peak {peak / 2**20:7.1f} MiB | output {size / 2**20:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
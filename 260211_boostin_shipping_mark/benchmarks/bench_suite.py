@@ -0,0 +1,322 @@
+"""
+PDF 생성 엔진 종합 벤치마크 (기준값 비교)
+- 모든 국가 프로필 × 원본 1페이지/2페이지(프로필 방향: letter / landscape_letter) × 박스 수(10/100/1,000/10,000)
+- 단계: copy_pages (복사본 PDF 생성), process_pdf (복사본에 오버레이), api_generate (Flask test client, 결과 캐시 끔)
+- 항목: 초당 페이지 수(pages/s), 최대 RSS 증가량(MiB, Linux 전용), 출력 크기(bytes)
+- 항목마다 새 프로세스에서 측정 (앞 항목이 남긴 메모리/캐시가 RSS·시간에 섞이지 않도록)
+- 저장된 기준값(baseline.json)과 비교해 느려지거나 커진 항목이 있으면 표시하고 종료 코드 1
+
+속도는 측정 직전·직후에 돌린 고정 기준 작업(순수 Python, 엔진 코드와 무관) 시간으로 보정해 비교한다
+("기준 작업 1회 동안 만드는 페이지 수"). PC 속도 차이와 측정 중 CPU 경합이 양쪽에 함께 반영되어 상쇄된다.
+항목별로는 보정 속도와 실제 속도가 모두 크게(SPEED_TOLERANCE) 느려진 것만, 전체로는 기하평균이 조금(SUITE_TOLERANCE)만 느려져도 회귀로 본다.
+
+사용법:
+  python benchmarks/bench_suite.py                       # 기준값과 비교
+  python benchmarks/bench_suite.py --boxes 10 100        # 일부만 (기준값에 있는 항목만 비교)
+  python benchmarks/bench_suite.py --update-baseline     # 현재 결과를 기준값으로 저장
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import engine  # noqa: E402
+from profiles import COUNTRY_PROFILES  # noqa: E402
+from fixtures import make_wms_pdf  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BOX_COUNTS = (10, 100, 1000, 10000)
+STAGES = ("copy_pages", "process_pdf", "api_generate")
+
+# 기준값 대비 허용 범위 (측정 잡음 고려)
+SPEED_TOLERANCE = 0.35    # 항목별: 보정한 속도가 35% 넘게 떨어지면 회귀
+SUITE_TOLERANCE = 0.10    # 전체: 보정한 속도 비율의 기하평균이 10% 넘게 떨어지면 회귀
+SIZE_TOLERANCE = 0.02     # 출력 크기가 2% 넘게 커지면 회귀
+RSS_TOLERANCE = 0.25      # 최대 RSS 증가량이 25% + RSS_SLACK_MB 넘게 커지면 회귀
+RSS_SLACK_MB = 8
+
+# 작은 항목은 이 시간(초)이 찰 때까지(최대 MAX_REPEAT 회) 반복해 가장 빠른 값 사용
+MIN_SECONDS = 0.5
+MAX_REPEAT = 200
+
+# 기준값은 항목마다 새 프로세스에서 이 횟수만큼 재서 중앙값으로 저장 (운 좋게 빨랐던 값이 기준이 되지 않도록)
+BASELINE_RUNS = 3
+
+# 회귀로 보이는 항목은 새 프로세스에서 이 횟수만큼 다시 재서 가장 좋은 값으로 판정 (일시적인 CPU 경합 걸러냄)
+CONFIRM_RUNS = 2
+
+
+# ─── 측정 ────────────────────────────────────────────────────────────
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+
+def reset_peak_rss():
+    """최대 RSS(VmHWM)를 현재 값으로 되돌림. 지원하지 않으면 None"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _status_kb("VmRSS")
+    except OSError:
+        return None
+
+
+def peak_rss_mb(start_kb):
+    if start_kb is None:
+        return None
+    return round((_status_kb("VmHWM") - start_kb) / 1024, 1)
+
+
+def reference_work():
+    """고정 기준 작업 (약 30 ms): dict/문자열/바이트 연산. 반환: 걸린 시간(초)"""
+    started = time.perf_counter()
+    counts = {}
+    for i in range(60000):
+        key = "k%d" % (i % 5000)
+        counts[key] = counts.get(key, 0) + len(key) * 3
+    sorted(counts.items())
+    buf = bytearray()
+    for i in range(20000):
+        buf += str(i).encode()
+    return time.perf_counter() - started
+
+
+def reference_seconds():
+    return min(reference_work() for _ in range(3))
+
+
+def measure(fn):
+    """fn() -> 출력 바이트 수. (가장 빠른 시간, 기준 작업 시간, 최대 RSS 증가량 MiB, 출력 바이트 수)"""
+    before = reference_seconds()
+    best, peak, size, total, runs = None, None, 0, 0.0, 0
+    while runs < MAX_REPEAT and (runs == 0 or total < MIN_SECONDS):
+        start_kb = reset_peak_rss()
+        t0 = time.perf_counter()
+        size = fn()
+        seconds = time.perf_counter() - t0
+        rss = peak_rss_mb(start_kb)
+        best = seconds if best is None else min(best, seconds)
+        peak = rss if peak is None or rss is None else max(peak, rss)
+        total += seconds
+        runs += 1
+    return best, min(before, reference_seconds()), peak, size  # CPU 경합은 느리게만 하므로 빠른 쪽
+
+
+def form_fields(profile_key, boxes):
+    return {
+        "profile": profile_key, "total_boxes": str(boxes), "batch_count": "1", "copies_0": str(boxes),
+        "batch_number_0": "007/25", "address_0": "TEST ADDRESS",
+    }
+
+
+def stage_runner(stage, profile_key, source, boxes):
+    """boxes 장을 만드는 stage 실행 함수 (반환: 출력 바이트 수)"""
+    if stage == "copy_pages":
+        return lambda: len(engine.copy_pages(source, boxes))
+
+    if stage == "process_pdf":
+        profile = COUNTRY_PROFILES[profile_key]
+        params = {"address": profile.get("fixed_address", "TEST ADDRESS"), "batch_number": "007/25"}
+        copied = engine.copy_pages(source, boxes)
+        return lambda: len(engine.process_pdf(copied, profile_key, params, 1, boxes)[0])
+
+    client = make_client()
+
+    def generate():
+        data = dict(form_fields(profile_key, boxes), pdf_0=(io.BytesIO(source), "batch_0.pdf"))
+        resp = client.post("/api/generate", data=data, content_type="multipart/form-data")
+        body = resp.get_data()
+        resp.close()
+        if resp.status_code != 200:
+            raise RuntimeError(f"{profile_key} {boxes}: /api/generate {resp.status_code} {body[:200]!r}")
+        return len(body)
+    return generate
+
+
+def run_worker(profile_key, num_pages, boxes, stage):
+    """항목 1개 측정 (새 프로세스에서 실행). 1장짜리로 한 번 돌려 글꼴/코드 경로를 준비한 뒤 잰다"""
+    source = make_wms_pdf(num_pages, COUNTRY_PROFILES[profile_key]["pagesize"])
+    stage_runner(stage, profile_key, source, 1)()
+    seconds, reference, rss, size = measure(stage_runner(stage, profile_key, source, boxes))
+    return {
+        "pages_per_sec": round(boxes / seconds, 1),
+        "pages_per_ref": round(boxes * reference / seconds, 3),  # 기준 작업 1회 동안 만드는 페이지 수
+        "peak_rss_mb": rss,
+        "bytes": size,
+    }
+
+
+def run_case(profile_key, num_pages, boxes, stage):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", profile_key, str(num_pages), str(boxes), stage],
+        capture_output=True, text=True, cwd=APP_DIR,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"{profile_key}/{num_pages}p/{boxes}/{stage} 측정 실패\n{out.stderr}")
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def make_client():
+    """결과 캐시를 끈 Flask test client (같은 요청을 반복해도 매번 실제로 생성, 업로드 저장소는 임시 폴더)"""
+    import app  # 업로드 앱 (webapp.configure)
+    import webapp
+    from result_cache import ResultCache
+    from upload_store import UploadStore
+
+    webapp.result_cache = ResultCache(tempfile.mkdtemp(prefix="bench_suite_"), max_bytes=0)
+    app.store = webapp.source_provider.store = UploadStore(tempfile.mkdtemp(prefix="bench_suite_uploads_"))
+    return app.app.test_client()
+
+
+# ─── 기준값 비교 ─────────────────────────────────────────────────────
+
+def median_of(results):
+    """여러 번 잰 결과의 항목별 중앙값"""
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+    rss = [r["peak_rss_mb"] for r in results if r["peak_rss_mb"] is not None]
+    return {
+        "pages_per_sec": median(r["pages_per_sec"] for r in results),
+        "pages_per_ref": median(r["pages_per_ref"] for r in results),
+        "peak_rss_mb": median(rss) if rss else None,
+        "bytes": median(r["bytes"] for r in results),
+    }
+
+
+def best_of(a, b):
+    """두 측정 결과 중 항목별로 좋은 값 (속도는 큰 쪽, RSS/크기는 작은 쪽)"""
+    rss = [r for r in (a["peak_rss_mb"], b["peak_rss_mb"]) if r is not None]
+    return {
+        "pages_per_sec": max(a["pages_per_sec"], b["pages_per_sec"]),
+        "pages_per_ref": max(a["pages_per_ref"], b["pages_per_ref"]),
+        "peak_rss_mb": min(rss) if rss else None,
+        "bytes": min(a["bytes"], b["bytes"]),
+    }
+
+
+def speed_ratio(current, baseline):
+    """기준값 대비 보정 속도 비율"""
+    return current["pages_per_ref"] / baseline["pages_per_ref"]
+
+
+def compare(key, current, baseline):
+    """회귀 설명 목록 (없으면 빈 목록)"""
+    problems = []
+    # 보정값만 떨어진 경우는 기준 작업 쪽이 경합에 걸린 것이므로 실제 속도도 떨어졌을 때만 회귀
+    raw_ratio = current["pages_per_sec"] / baseline["pages_per_sec"]
+    if speed_ratio(current, baseline) < 1 - SPEED_TOLERANCE and raw_ratio < 1 - SPEED_TOLERANCE:
+        problems.append(f"{key}: 보정 속도 {speed_ratio(current, baseline):.2f}배 "
+                        f"({baseline['pages_per_sec']:,.0f} -> {current['pages_per_sec']:,.0f} pages/s)")
+    if current["bytes"] > baseline["bytes"] * (1 + SIZE_TOLERANCE):
+        problems.append(f"{key}: 출력 크기 {baseline['bytes']:,} -> {current['bytes']:,} bytes")
+    if current["peak_rss_mb"] is not None and baseline.get("peak_rss_mb") is not None:
+        if current["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + RSS_TOLERANCE) + RSS_SLACK_MB:
+            problems.append(f"{key}: 최대 RSS {baseline['peak_rss_mb']} -> {current['peak_rss_mb']} MiB")
+    return problems
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(cases):
+    data = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 생성 엔진 종합 벤치마크")
+    parser.add_argument("--profiles", nargs="+", default=list(COUNTRY_PROFILES), choices=list(COUNTRY_PROFILES))
+    parser.add_argument("--boxes", nargs="+", type=int, default=list(BOX_COUNTS))
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 2], choices=[1, 2], help="원본 페이지 수")
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과를 기준값으로 저장")
+    parser.add_argument("--worker", nargs=4, metavar=("PROFILE", "PAGES", "BOXES", "STAGE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        profile_key, num_pages, boxes, stage = args.worker
+        print(json.dumps(run_worker(profile_key, int(num_pages), int(boxes), stage)))
+        return 0
+
+    baseline = None if args.update_baseline else load_baseline()
+    if baseline is None and not args.update_baseline:
+        print(f"기준값 파일이 없습니다 ({BASELINE_PATH}). --update-baseline 으로 먼저 만드세요.")
+    if baseline is not None:
+        print(f"기준값: {baseline['created']} (Python {baseline['python']}, {baseline['platform']})")
+
+    cases, problems, ratios = {}, [], []
+    print(f"{'항목':<38} | {'pages/s':>10} | {'RSS MiB':>8} | {'출력 bytes':>12} | 기준 대비(보정)")
+    for profile_key in args.profiles:
+        for num_pages in args.pages:
+            for boxes in args.boxes:
+                for stage in STAGES:
+                    if args.update_baseline:
+                        result = median_of([run_case(profile_key, num_pages, boxes, stage)
+                                            for _ in range(BASELINE_RUNS)])
+                    else:
+                        result = run_case(profile_key, num_pages, boxes, stage)
+                    key = f"{profile_key}/{num_pages}p/{boxes}/{stage}"
+                    base = (baseline or {}).get("cases", {}).get(key)
+                    found = compare(key, result, base) if base else []
+                    for _ in range(CONFIRM_RUNS if found else 0):
+                        result = best_of(result, run_case(profile_key, num_pages, boxes, stage))
+                        found = compare(key, result, base)
+                        if not found:
+                            break
+                    cases[key] = result
+                    problems += found
+                    if base:
+                        ratios.append(speed_ratio(result, base))
+                    ratio = f"{speed_ratio(result, base):.2f}x" if base else "-"
+                    rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f}"
+                    print(f"{key:<38} | {result['pages_per_sec']:>10,.0f} | {rss:>8} | {result['bytes']:>12,} "
+                          f"| {ratio}{'  << 회귀' if found else ''}", flush=True)
+
+    if args.update_baseline:
+        old = load_baseline()
+        merged = dict(old["cases"]) if old else {}
+        merged.update(cases)
+        save_baseline(merged)
+        print(f"기준값 저장: {BASELINE_PATH} ({len(cases)}개 항목 갱신)")
+        return 0
+
+    if ratios:
+        suite = math.exp(sum(math.log(r) for r in ratios) / len(ratios))
+        print(f"\n전체 보정 속도 (기하평균, {len(ratios)}개 항목): 기준 대비 {suite:.2f}배")
+        if suite < 1 - SUITE_TOLERANCE:
+            problems.append(f"전체: 보정 속도 기하평균 {suite:.2f}배 (허용 {1 - SUITE_TOLERANCE:.2f}배)")
+    if problems:
+        print("\n성능 회귀:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+업로드 저장소 벤치마크 (같은 원본으로 미리보기 여러 번 + 생성 1회)
+- 매번 업로드: 요청마다 pdf_0 파일을 함께 보냄 (이전 방식)
+- 저장소 (처음): HEAD 확인(404) → POST /api/uploads 한 번 → 이후 요청은 pdf_sha256_0 만 보냄
+- 저장소 (재방문): HEAD 확인(200) → 파일은 보내지 않음 (서버 재시작 후에도 uploads/ 에 남아 있음)
+Flask test client 로 요청 본문 크기와 서버 처리 시간(multipart 수신 + 원본 읽기/해시/파싱 + 렌더링)을 잰다.
+실제 네트워크 전송 시간은 포함하지 않는다 (사내망 100 Mbps 기준 50 MB 는 한 번에 약 4초)
+
+사용법: python benchmarks/bench_upload.py [--mb 40] [--previews 5] [--profile chile]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import app  # noqa: E402
+import webapp  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from upload_store import UploadStore  # noqa: E402
+
+
+def make_scanned_pdf(path, megabytes):
+    """압축하지 않은 스캔 이미지 1장이 들어간 1페이지 PDF (WMS 출력물 스캔본 흉내)"""
+    from PIL import Image
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    side = int((megabytes * 2**20 / 3 / 1.25) ** 0.5)  # reportlab 은 이미지를 ASCII85 로 넣는다 (1.25배)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buf = io.BytesIO()
+    image.save(buf, "PNG", compress_level=0)
+    can = canvas.Canvas(path, pagesize=letter, pageCompression=0)
+    can.drawImage(ImageReader(buf), 36, 36, 540, 540)
+    can.showPage()
+    can.save()
+
+
+def post(client, url, form, files=None):
+    """요청 1건 -> (본문 bytes, 초). 파일 필드는 (bytes, 이름)"""
+    data = dict(form)
+    sent = sum(len(v) for v in form.values())
+    for key, (blob, name) in (files or {}).items():
+        data[key] = (io.BytesIO(blob), name)
+        sent += len(blob)
+    t0 = time.perf_counter()
+    response = client.post(url, data=data)
+    seconds = time.perf_counter() - t0
+    if response.status_code >= 400:
+        raise RuntimeError(f"{url}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+    return sent, seconds
+
+
+def workflow(client, form, previews, pdf_bytes, mode):
+    """미리보기 previews 회 + 생성 1회 -> (보낸 bytes, 총 초, 요청 수)"""
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    sent, seconds, requests = 0, 0.0, 0
+    files = {}
+    if mode == "inline":
+        files = {"pdf_0": (pdf_bytes, "scan.pdf")}
+    else:
+        t0 = time.perf_counter()
+        known = client.head(f"/api/uploads/{digest}").status_code == 200
+        seconds += time.perf_counter() - t0
+        requests += 1
+        if not known:
+            s, t = post(client, "/api/uploads", {"sha256": digest}, {"file": (pdf_bytes, "scan.pdf")})
+            sent, seconds, requests = sent + s, seconds + t, requests + 1
+        form = {**form, "pdf_sha256_0": digest}
+
+    for url in ["/api/preview"] * previews + ["/api/generate"]:
+        s, t = post(client, url, form, files)
+        sent, seconds, requests = sent + s, seconds + t, requests + 1
+    return sent, seconds, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업로드 저장소 벤치마크")
+    parser.add_argument("--mb", type=float, default=40, help="원본 PDF 크기(대략, MAX_CONTENT_LENGTH 50 MB 이하)")
+    parser.add_argument("--previews", type=int, default=5, help="생성 전 미리보기 횟수")
+    parser.add_argument("--profile", default="chile")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.pdf")
+        make_scanned_pdf(path, args.mb)
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+
+        # 결과 캐시는 끄고(매번 생성), 저장소는 임시 폴더에 만든다
+        webapp.result_cache = ResultCache(os.path.join(tmp, "result_cache"), max_bytes=0)
+        form = {"profile": args.profile, "total_boxes": "10", "batch_count": "1", "copies_0": "10"}
+        client = app.app.test_client()
+
+        print(f"원본 {len(pdf_bytes) / 2**20:.1f} MiB, 미리보기 {args.previews}회 + 생성 1회")
+        print(f"{'방식':<16} | {'요청':>4} | {'보낸 본문':>10} | {'서버 처리':>10}")
+        for label, mode in (("매번 업로드", "inline"), ("저장소 (처음)", "store"), ("저장소 (재방문)", "store")):
+            # 매번 업로드는 저장소 없이(이전 방식), 재방문은 같은 폴더를 새로 열어 서버 재시작을 흉내 낸다
+            store = UploadStore(os.path.join(tmp, "uploads"), 2**31, 256 * 2**20) if mode == "store" else None
+            app.store = webapp.source_provider.store = store
+            sent, seconds, requests = workflow(client, form, args.previews, pdf_bytes, mode)
+            print(f"{label:<16} | {requests:>4} | {sent / 2**20:>6.1f} MiB | {seconds * 1000:>7.0f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    main()
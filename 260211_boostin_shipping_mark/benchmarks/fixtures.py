@@ -0,0 +1,28 @@
+"""
+벤치마크용 합성 WMS 유사 PDF 생성
+- 실제 WMS 출력물처럼 표/텍스트가 채워진 1페이지, 2페이지 원본을 만든다
+- letter / landscape_letter 두 방향 지원
+"""
+
+import io
+
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfgen import canvas
+
+
+def make_wms_pdf(num_pages=1, pagesize="letter", rows=40):
+    """WMS 출력물과 비슷한 밀도의 합성 PDF 바이트 생성"""
+    size = landscape(letter) if pagesize == "landscape_letter" else letter
+    buf = io.BytesIO()
+    can = canvas.Canvas(buf, pagesize=size)
+    for p in range(num_pages):
+        can.setFont("Helvetica-Bold", 14)
+        can.drawString(40, size[1] - 40, f"SHIPPING MARK - WMS EXPORT (page {p + 1})")
+        can.setFont("Helvetica", 9)
+        for i in range(rows):
+            y = 60 + i * ((size[1] - 120) / rows)
+            can.rect(36, y - 3, size[0] - 72, 13)
+            can.drawString(40, y, f"{i:03d}  LOT-2025-{i:04d}  CONSIGNEE / PRODUCT / BOX QTY {i * 7 % 900:>4}")
+        can.showPage()
+    can.save()
+    return buf.getvalue()
@@ -0,0 +1,55 @@
+"""
+manifest 일괄 생성 CLI
+- 브라우저 없이 manifest(JSON/CSV)의 여러 출고를 한 번에 생성
+- 출력 폴더에 출고별 PDF와 summary.json 저장 (형식은 engine.py의 "일괄 생성" 참고)
+- 원본 PDF 경로는 --source-dir 기준 (기본: manifest 파일이 있는 폴더)
+
+사용법: python bulk.py manifest.json [-o 출력폴더] [--source-dir 폴더] [--workers 2] [--pic-dir 폴더]
+"""
+
+import argparse
+import os
+import sys
+
+import engine
+from source_cache import SourceCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="manifest 일괄 생성")
+    parser.add_argument("manifest", help="manifest 파일 (.json / .csv)")
+    parser.add_argument("-o", "--output", default="bulk_output", help="출력 폴더")
+    parser.add_argument("--source-dir", default=None, help="원본 PDF 폴더 (기본: manifest 파일 위치)")
+    parser.add_argument("--workers", type=int, default=2, help="동시에 렌더링할 출고 수")
+    parser.add_argument("--pdf-backend", default=engine.DEFAULT_PDF_BACKEND, choices=engine.PDF_BACKENDS,
+                        help="PDF 라이브러리 (pikepdf: uv sync --extra pikepdf)")
+    parser.add_argument("--pic-dir", default=None, help="이미지 폴더 (기본: 엔진 폴더의 pic/)")
+    args = parser.parse_args()
+    if args.pic_dir:
+        engine.set_pic_dir(args.pic_dir)
+
+    with open(args.manifest, encoding="utf-8-sig") as f:
+        text = f.read()
+    fmt = {".csv": "csv", ".json": "json"}.get(os.path.splitext(args.manifest)[1].lower())
+    source_dir = args.source_dir or os.path.dirname(os.path.abspath(args.manifest))
+    sources = SourceCache()
+
+    try:
+        shipments = engine.parse_manifest(text, fmt)
+        summary = engine.run_bulk(shipments, lambda name: sources.get(os.path.join(source_dir, name)),
+                                  args.output, workers=args.workers, pdf_backend=args.pdf_backend)
+    except (ValueError, RuntimeError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+
+    for entry in summary:
+        if entry["status"] == "done":
+            print(f"{entry['name']:<24} {entry['pages']:>6} 페이지 {entry['seconds']:7.2f}s  {entry['file']}")
+        else:
+            print(f"{entry['name']:<24} 실패: {entry['error']}")
+    print(f"저장 위치: {os.path.abspath(args.output)}")
+    return 1 if any(entry["status"] != "done" for entry in summary) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Shipping Mark 명령줄 생성기
+- 웹앱(Flask) 없이 엔진을 직접 호출해 출고 1건의 합본 PDF 생성
+- WMS 내보내기 스크립트 등에서 반복 호출하는 용도 (HTTP 업로드/인코딩 없음)
+
+사용법:
+  python -m cli brazil a.pdf b.pdf -c 100 50 --batch-number 007/25 008/25 -o out.pdf
+  python -m cli oman a.pdf -c 120 --set consignee_name="SMARK FZE" --set address_text_x=20 -o - > out.pdf
+  python -m cli brazil a.pdf -c 224 --preset brazil_260211_batch --batch-number 007/25
+
+  -c/--copies, --batch-number, --address 는 원본 PDF 순서대로 배치별 값 (값이 1개면 모든 배치에 적용)
+  --set 이름=값 은 웹 화면의 좌표/텍스트 입력값과 같은 이름 (여러 번 사용 가능)
+  --preset 은 현장 설정/ 폴더의 설정 이름 (.json 파일 이름) - 지정하지 않은 좌표를 현장 설정 값으로 채운다
+  -o - 이면 PDF를 표준 출력으로 보낸다
+  --reprint 5-9 이면 박스 5~9 페이지만 같은 번호로 다시 만든다 (파손 라벨 재출력)
+  --pic-dir 은 이미지(QR 등) 폴더 - 드롭다운 폴더에서 실행할 때는 --pic-dir pic
+"""
+
+import argparse
+import os
+import sys
+
+import engine
+from source_cache import load_source
+
+
+def per_batch(values, count, name):
+    """배치별 값 목록 (1개면 모든 배치에 같은 값)"""
+    if not values:
+        return [None] * count
+    if len(values) == 1:
+        return values * count
+    if len(values) != count:
+        raise ValueError(f"{name} 값은 1개 또는 원본 PDF 수({count})만큼 지정하세요.")
+    return values
+
+
+def parse_overrides(items):
+    """--set 이름=값 목록 -> dict"""
+    options = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            raise ValueError(f"--set 형식은 이름=값 입니다: {item}")
+        options[key.strip()] = value
+    return options
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Shipping Mark PDF 생성 (웹앱 없이)")
+    parser.add_argument("profile", choices=sorted(engine.COUNTRY_PROFILES), help="국가 프로필")
+    parser.add_argument("pdfs", nargs="+", help="배치별 원본 PDF (1페이지 또는 2페이지)")
+    parser.add_argument("-c", "--copies", nargs="+", type=int, default=[1], help="배치별 부수")
+    parser.add_argument("--batch-number", nargs="+", default=[], help="배치별 배치 번호 (브라질)")
+    parser.add_argument("--address", nargs="+", default=[], help="배치별 주소 (__SKIP__: 주소 수정 안 함)")
+    parser.add_argument("--total-boxes", type=int, default=None, help="전체 박스 수 (기본: 부수 합계)")
+    parser.add_argument("--mode", default="merge", choices=engine.OUTPUT_MODES, help="출력 모드")
+    parser.add_argument("--pdf-backend", default=engine.DEFAULT_PDF_BACKEND, choices=engine.PDF_BACKENDS,
+                        help="PDF 라이브러리 (pikepdf: uv sync --extra pikepdf)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="이름=값",
+                        help="좌표/텍스트 입력값")
+    parser.add_argument("--preset", default=None, help="현장 설정 이름 (현장 설정/**/이름.json)")
+    parser.add_argument("--reprint", default=None, metavar="시작-끝", help="이 박스 번호 범위만 재출력 (예: 5-9)")
+    parser.add_argument("-o", "--output", default=None, help="출력 PDF 경로 (기본: 프로필 이름_시각.pdf, -: 표준 출력)")
+    parser.add_argument("--pic-dir", default=None, help="이미지 폴더 (기본: 엔진 폴더의 pic/)")
+    args = parser.parse_args(argv)
+    if args.pic_dir:
+        engine.set_pic_dir(args.pic_dir)
+
+    try:
+        count = len(args.pdfs)
+        copies = per_batch(args.copies, count, "--copies")
+        batch_numbers = per_batch(args.batch_number, count, "--batch-number")
+        addresses = per_batch(args.address, count, "--address")
+        options = parse_overrides(args.overrides)
+        if args.preset:
+            options["preset"] = args.preset
+        if addresses[0] is not None and engine.COUNTRY_PROFILES[args.profile]["address_type"] == "fixed":
+            options.setdefault("address", addresses[0])
+
+        batches = []
+        for path, num_copies, batch_number, address in zip(args.pdfs, copies, batch_numbers, addresses):
+            try:
+                source = load_source(path)
+            except OSError:
+                raise ValueError(f"파일을 찾을 수 없습니다 - {path}")
+            batches.append({
+                "source": source,
+                "copies": num_copies,
+                "batch_number": batch_number or "",
+                "address": address or "",
+            })
+
+        total_boxes = args.total_boxes or sum(copies)
+        spec = engine.build_shipment_spec(args.profile, total_boxes, batches, options, args.mode, args.pdf_backend)
+        if args.reprint:
+            first_box, last_box = engine.parse_box_range(args.reprint, spec["total_pages"])
+    except (ValueError, RuntimeError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+
+    if args.reprint:
+        writer = engine.build_reprint(spec, first_box, last_box)
+        pages = last_box - first_box + 1
+        default_path = engine.reprint_filename(spec, first_box, last_box)
+    else:
+        writer = engine.build_shipment(spec)
+        pages = spec["total_pages"]
+        default_path = spec["filename"]
+    if args.output == "-":
+        writer.write(sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    else:
+        path = args.output or default_path
+        with open(path + ".part", "wb") as f:
+            writer.write(f)
+        os.replace(path + ".part", path)
+        print(f"{pages} 페이지 -> {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1448 @@
+"""
+Shipping Mark PDF 생성 엔진
+- 국가별 프로필, 페이지 복사 규칙, 오버레이 레이아웃 렌더링, 출고 합본
+- 미리보기 세션/이미지, 출력 스트리밍, manifest 일괄 생성
+- Flask 없이 동작 (웹앱 app.py, 명령줄 cli.py / bulk.py 가 함께 사용)
+"""
+
+from PyPDF4 import PdfFileReader, PdfFileWriter
+from PyPDF4.pdf import PageObject
+from PyPDF4.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject, NameObject
+)
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.colors import black, white
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.boxstuff import aspectRatioFix
+import csv
+import hashlib
+import importlib.util
+import io
+import os
+import json
+import math
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import metrics
+from pdf_backend import (
+    OVERLAY_XOBJECT as _OVERLAY_XOBJECT, PAGE_BODY_XOBJECT as _PAGE_BODY_XOBJECT,
+    PAGE_NUM_FONT as _PAGE_NUM_FONT, PAGE_NUM_FONT_DICT, PdfBackend, PikepdfBackend,
+)
+from profiles import COUNTRY_PROFILES, apply_preset, profile_digest
+from source_cache import ParsedSource, load_unchanged
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PIC_DIR = os.path.join(BASE_DIR, "pic")
+
+
+# ─── 페이지 복사 ─────────────────────────────────────────────────────
+
+def get_pagesize(profile_key):
+    """프로필에 맞는 페이지 사이즈 반환"""
+    ps = COUNTRY_PROFILES[profile_key]["pagesize"]
+    if ps == "landscape_letter":
+        return landscape(letter)
+    return letter
+
+
+def copy_page_indices(total_pages, num_copies):
+    """
+    복사 규칙에 따른 원본 페이지 인덱스 목록.
+    - 1페이지 PDF: num_copies 만큼 첫 페이지 복사
+    - 2페이지 PDF: (num_copies - 1)만큼 첫 페이지 복사 + 마지막에 2페이지 추가
+    """
+    if total_pages not in [1, 2]:
+        raise ValueError(f"지원하지 않는 페이지 수: {total_pages}. 1페이지 또는 2페이지 PDF만 지원됩니다.")
+
+    actual_copies = num_copies
+    if total_pages == 2:
+        actual_copies -= 1
+
+    indices = [0] * actual_copies
+    if total_pages == 2:
+        indices.append(1)
+    return indices
+
+
+def copy_pages(input_pdf_bytes, num_copies, pdf_backend=None):
+    """
+    PDF 바이트에서 페이지를 복사 (규칙은 copy_page_indices 참고).
+    pdf_backend: PDF_BACKENDS 중 하나 (생략 시 DEFAULT_PDF_BACKEND)
+    """
+    return get_pdf_backend(pdf_backend).copy_pages(
+        input_pdf_bytes, lambda total_pages: copy_page_indices(total_pages, num_copies))
+
+
+def build_page_number_text(box_num, total, gap):
+    """페이지 번호 텍스트 생성 (간격 조절 가능)"""
+    spaces = " " * gap
+    return f"{box_num}{spaces}{total}"
+
+
+# ─── 오버레이 레이아웃 컴파일 ─────────────────────────────────────────
+# 프로필 layout을 요청마다 한 번 해석해 좌표가 숫자로 확정된 그리기 명령 목록으로 만든다.
+# 페이지 반복 구간에서는 dict 조회나 float 변환 없이 이 명령만 실행한다.
+
+HideRect = namedtuple("HideRect", "layer x y w h")
+DrawText = namedtuple("DrawText", "layer x y text")
+PlaceImage = namedtuple("PlaceImage", "layer name image x y w h")
+PageCounter = namedtuple("PageCounter", "layer x y gap")
+
+
+def _image_resource_name(filename):
+    """pic/ 이미지 파일 이름 -> 출력 PDF의 XObject 리소스 이름"""
+    stem = re.sub(r"[^A-Za-z0-9]", "_", os.path.splitext(filename)[0])
+    return NameObject(f"/SMkImg_{stem}")
+
+
+def compile_layout(profile_key, params):
+    """
+    프로필 layout + 요청 파라미터 -> 그리기 명령 목록 (HideRect / DrawText / PlaceImage / PageCounter).
+    그리지 않을 요소(값이 비었거나 이미지 파일이 없음)는 여기서 빠진다.
+    """
+    profile = COUNTRY_PROFILES[profile_key]
+    defaults = profile["defaults"]
+
+    def number(name):
+        return float(params.get(name, defaults[name]))
+
+    ops = []
+    for element in profile["layout"]:
+        kind = element["type"]
+        layer = element["layer"]
+        if "field" in element:
+            value = params.get(element["field"], defaults.get(element["field"], ""))
+            if not value or value == "__SKIP__" or params.get(element.get("skip"), False):
+                continue
+
+        if kind == "hide_rect":
+            rect = element["rect"]
+            ops.append(HideRect(layer, number(f"{rect}_x"), number(f"{rect}_y"),
+                                number(f"{rect}_w"), number(f"{rect}_h")))
+        elif kind == "text":
+            pos = element["pos"]
+            ops.append(DrawText(layer, number(f"{pos}_x"), number(f"{pos}_y"),
+                                element.get("format", "{}").format(value)))
+        elif kind == "image":
+            image = image_registry.get(element["file"])
+            if image is None:
+                continue
+            box = element["box"]
+            try:
+                bx, by, bw, bh = (number(f"{box}_{k}") for k in "xywh")
+            except Exception as e:
+                metrics.warn("render_warnings", f"이미지 추가 실패 ({element['file']}): {e}")
+                continue
+            # drawImage(preserveAspectRatio=True) 와 같은 규칙으로 위치/크기 확정
+            x, y, w, h, _ = aspectRatioFix(True, "c", bx, by, bw, bh, image.width, image.height)
+            ops.append(PlaceImage(layer, _image_resource_name(element["file"]), image, x, y, w, h))
+        elif kind == "counter":
+            pos = element["pos"]
+            ops.append(PageCounter(layer, number(f"{pos}_x"), number(f"{pos}_y"),
+                                   int(number(element["gap"]))))
+        else:
+            raise ValueError(f"알 수 없는 레이아웃 요소: {kind}")
+    return ops
+
+
+def profile_layers(profile_key):
+    """프로필이 사용하는 오버레이 레이어 이름 목록 (그리는 순서, 페이지 번호 제외)"""
+    layers = []
+    for element in COUNTRY_PROFILES[profile_key]["layout"]:
+        if element["type"] != "counter" and element["layer"] not in layers:
+            layers.append(element["layer"])
+    return layers
+
+
+def _element_param_names(element):
+    """레이아웃 요소가 읽는 요청 파라미터 이름 목록"""
+    names = [element[k] for k in ("field", "skip", "gap") if k in element]
+    for k, suffixes in (("rect", "xywh"), ("box", "xywh"), ("pos", "xy")):
+        if k in element:
+            names += [f"{element[k]}_{suffix}" for suffix in suffixes]
+    return names
+
+
+def draw_layout(can, ops, images=False):
+    """
+    그리기 명령 중 사각형/텍스트를 canvas에 그린다 (페이지 번호 제외).
+    이미지는 출력 PDF에서 공유 XObject로 따로 그리므로 images=True 일 때만 그린다.
+    """
+    for op in ops:
+        if isinstance(op, HideRect):
+            can.setFillColor(white)
+            can.rect(op.x, op.y, op.w, op.h, fill=True, stroke=False)
+            can.setFillColor(black)
+        elif isinstance(op, DrawText):
+            can.drawString(op.x, op.y, op.text)
+        elif images and isinstance(op, PlaceImage):
+            can.drawImage(op.image.reader, op.x, op.y, width=op.w, height=op.h, mask='auto')
+
+
+STATIC_OVERLAY_CACHE_SIZE = 64  # 렌더링한 배치 공통 오버레이 보관 개수
+
+_static_overlays = OrderedDict()  # (페이지 크기, 그리기 명령) -> ParsedSource
+_static_overlays_lock = threading.Lock()
+
+
+def static_overlay_source(profile_key, layout):
+    """
+    배치 공통 오버레이(사각형/텍스트)를 그린 1페이지 PDF (ParsedSource).
+    그리기 명령이 같으면 (같은 출고의 다른 배치, 일괄 생성의 다른 출고) 이전 렌더링 결과를 재사용한다.
+    """
+    ops = tuple(op for op in layout if isinstance(op, (HideRect, DrawText)))
+    key = (get_pagesize(profile_key), ops)
+    with _static_overlays_lock:
+        source = _static_overlays.get(key)
+        if source is not None:
+            _static_overlays.move_to_end(key)
+
+    if source is None:
+        packet = io.BytesIO()
+        can = canvas.Canvas(packet, pagesize=key[0])
+        draw_layout(can, ops)
+        can.showPage()  # 그릴 내용이 없어도(주소 생략 등) 빈 페이지 1장은 있어야 한다
+        can.save()
+        source = ParsedSource(packet.getvalue())
+        with _static_overlays_lock:
+            _static_overlays[key] = source
+            while len(_static_overlays) > STATIC_OVERLAY_CACHE_SIZE:
+                _static_overlays.popitem(last=False)
+    return source
+
+
+def render_static_overlay(profile_key, layout):
+    """배치 공통 오버레이 페이지 (writer가 객체를 제자리에서 바꾸므로 쓸 때마다 독립된 사본)"""
+    return static_overlay_source(profile_key, layout).open().getPage(0)
+
+
+# ─── 이미지 레지스트리 ───────────────────────────────────────────────
+
+class RegisteredImage:
+    """
+    pic/ 이미지 1개. 디코딩(ImageReader)과 PDF 이미지 XObject 생성을 한 번만 하고,
+    출력 PDF마다 같은 XObject 하나를 참조로 공유한다.
+    """
+
+    def __init__(self, path, stat):
+        self.key = (path, stat.st_mtime_ns, stat.st_size)
+        with open(path, "rb") as f:
+            self.reader = ImageReader(io.BytesIO(f.read()))
+        self.width, self.height = self.reader.getSize()
+
+        # reportlab drawImage가 만드는 것과 같은 이미지 XObject를 1회만 생성해 보관
+        packet = io.BytesIO()
+        can = canvas.Canvas(packet, pagesize=(self.width, self.height))
+        can.drawImage(self.reader, 0, 0, width=self.width, height=self.height, mask='auto')
+        can.save()
+        self._pdf = ParsedSource(packet.getvalue())
+        xobjects = self._pdf.pages[0]["/Resources"].getObject()["/XObject"].getObject()
+        self._ref = next(iter(xobjects.values()))
+
+    def xobject(self):
+        """writer에 추가할 이미지 XObject (호출마다 독립된 사본, 이미지 데이터는 공유)"""
+        return self._pdf.open().getObject(self._ref)
+
+    @property
+    def pdf_data(self):
+        """이미지 XObject 하나만 든 1페이지 PDF 바이트 (pypdf4 이외 백엔드가 출력 문서로 복사)"""
+        return self._pdf.data
+
+
+class ImageRegistry:
+    """pic/ 폴더 이미지 보관소. 처음 쓸 때 읽고, 파일이 바뀌면(수정 시각·크기) 다시 읽는다."""
+
+    def __init__(self, image_dir):
+        self.image_dir = image_dir
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        """RegisteredImage (파일이 없으면 None)"""
+        path = os.path.join(self.image_dir, filename)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._images.pop(filename, None)
+            return None
+
+        with self._lock:
+            image = self._images.get(filename)
+            if image is None or image.key != (path, st.st_mtime_ns, st.st_size):
+                image = RegisteredImage(path, st)
+                self._images[filename] = image
+            return image
+
+
+image_registry = ImageRegistry(PIC_DIR)
+
+
+def set_pic_dir(path):
+    """pic/ 폴더 위치 변경 (엔진 폴더가 아닌 다른 앱 폴더의 이미지를 쓸 때, webapp.configure 참고)"""
+    global PIC_DIR
+    PIC_DIR = path
+    image_registry.image_dir = path
+
+
+# writer별로 이미 추가한 이미지 XObject 참조 {writer: {image.key: 참조}}
+_writer_images = weakref.WeakKeyDictionary()
+_writer_images_lock = threading.Lock()
+
+
+def _shared_image_ref(writer, image):
+    """writer에 이미지 XObject를 한 번만 추가하고, 이후에는 같은 참조를 반환"""
+    with _writer_images_lock:
+        refs = _writer_images.setdefault(writer, {})
+        if image.key not in refs:
+            refs[image.key] = writer._addObject(image.xobject())
+        return refs[image.key]
+
+
+def build_image_ops(images):
+    """이미지 요소를 그리는 content stream 연산 (images: [(리소스 이름, XObject 참조, x, y, w, h)])"""
+    return "".join(
+        f"q {w:g} 0 0 {h:g} {x:g} {y:g} cm {name} Do Q\n" for name, _, x, y, w, h in images
+    ).encode("latin-1")
+
+
+# 페이지 번호 전용 폰트 리소스 이름 (원본/오버레이 리소스 이름과 겹치지 않도록 고유하게)
+PAGE_NUM_FONT = NameObject(_PAGE_NUM_FONT)
+
+
+def _page_number_font():
+    """reportlab 기본 폰트(Helvetica 12)와 동일한 페이지 번호용 Type1 폰트 dict"""
+    font = DictionaryObject()
+    font.update({NameObject(key): NameObject(value) for key, value in PAGE_NUM_FONT_DICT.items()})
+    return font
+
+
+def _page_number_head(x, y):
+    """페이지 번호 content stream 앞부분 (글자 직전까지)"""
+    return f"q 0 g BT {PAGE_NUM_FONT} 12 Tf 1 0 0 1 {x:g} {y:g} Tm (".encode("latin-1")
+
+
+_PAGE_NUM_TAIL = b") Tj ET Q\n"
+
+
+def build_page_number_stream(x, y, page_num_text):
+    """페이지 번호 한 줄만 그리는 content stream (canvas 생성 없이 직접 작성)"""
+    escaped = page_num_text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    stream = DecodedStreamObject()
+    stream.setData(_page_number_head(x, y) + escaped.encode("latin-1") + _PAGE_NUM_TAIL)
+    return stream
+
+
+def _ref_key(obj):
+    """PDF 객체를 dict 키로 쓸 수 있는 값으로 변환 (간접 참조는 번호로 식별)"""
+    if isinstance(obj, IndirectObject):
+        return (obj.idnum, obj.generation)
+    return repr(obj)
+
+
+def _merge_page_template(writer, page, static_overlay, images):
+    """
+    [merge 모드] 원본 페이지에 공통 오버레이를 한 번 병합한 템플릿을 만든다.
+    병합된 content stream과 리소스는 writer에 간접 객체로 등록되어
+    같은 원본 페이지를 쓰는 모든 복사본이 참조로 공유한다.
+    images 는 병합하지 않고 공유 이미지 XObject를 그리는 stream을 뒤에 덧붙인다.
+    """
+    template = PageObject(page.pdf)
+    template.update(page)
+    template.mergePage(static_overlay)
+
+    resources = template["/Resources"]
+    fonts = resources.get("/Font", DictionaryObject()).getObject()
+    fonts[PAGE_NUM_FONT] = _page_number_font()
+    resources[NameObject("/Font")] = fonts
+
+    contents = [writer._addObject(template["/Contents"])]
+    if images:
+        xobjects = DictionaryObject()
+        xobjects.update(resources.get("/XObject", DictionaryObject()).getObject())
+        xobjects.update({name: ref for name, ref, *_ in images})
+        resources[NameObject("/XObject")] = xobjects
+        image_stream = DecodedStreamObject()
+        image_stream.setData(build_image_ops(images))
+        contents.append(writer._addObject(image_stream))
+
+    return contents, writer._addObject(resources)
+
+
+# xobject 모드에서 원본 페이지 본문 / 공통 오버레이 Form XObject 리소스 이름
+PAGE_BODY_XOBJECT = NameObject(_PAGE_BODY_XOBJECT)
+OVERLAY_XOBJECT = NameObject(_OVERLAY_XOBJECT)
+
+
+def page_to_form_xobject(page):
+    """
+    페이지 내용을 Form XObject로 변환. content stream을 파싱하지 않고
+    압축 해제된 바이트를 이어 붙여 다시 압축만 한다.
+    """
+    contents = page.getContents()
+    if contents is None:
+        data = b""
+    elif isinstance(contents, ArrayObject):
+        data = b"\n".join(c.getObject().getData() for c in contents)
+    else:
+        data = contents.getData()
+
+    body = DecodedStreamObject()
+    body.setData(data)
+    form = body.flateEncode()
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): ArrayObject(page.mediaBox),
+        NameObject("/Resources"): page.raw_get("/Resources"),
+    })
+    return form
+
+
+def _xobject_page_template(writer, page, overlay_ref, images):
+    """
+    [xobject 모드] 원본 페이지 본문을 Form XObject로 한 번만 저장하고,
+    본문 -> 공통 오버레이 -> 이미지 순서로 그리는 짧은 content stream을 만든다.
+    """
+    body_ref = writer._addObject(page_to_form_xobject(page))
+
+    draw = DecodedStreamObject()
+    draw.setData(
+        f"q {PAGE_BODY_XOBJECT} Do Q q {OVERLAY_XOBJECT} Do Q\n".encode("latin-1") + build_image_ops(images)
+    )
+
+    xobjects = DictionaryObject()
+    xobjects.update({PAGE_BODY_XOBJECT: body_ref, OVERLAY_XOBJECT: overlay_ref})
+    xobjects.update({name: ref for name, ref, *_ in images})
+    fonts = DictionaryObject()
+    fonts[PAGE_NUM_FONT] = _page_number_font()
+    resources = DictionaryObject()
+    resources.update({
+        NameObject("/XObject"): xobjects,
+        NameObject("/Font"): fonts,
+        NameObject("/ProcSet"): ArrayObject([NameObject("/PDF"), NameObject("/Text")]),
+    })
+
+    return [writer._addObject(draw)], writer._addObject(resources)
+
+
+# 출력 모드
+# - merge   : 오버레이를 원본 페이지 content stream에 병합 (기존 방식)
+# - xobject : 원본 페이지 본문과 공통 오버레이를 Form XObject로 한 번씩만 저장하고
+#             각 페이지는 참조 + 페이지 번호만 보유 (대량 출력 시 파일 크기 최소화)
+OUTPUT_MODES = ("merge", "xobject")
+
+
+def clone_page(page):
+    """원본 페이지 dict의 얕은 복사본 (같은 페이지를 여러 번 writer에 추가할 때 사용)"""
+    clone = PageObject(page.pdf)
+    clone.update(page)
+    return clone
+
+
+def apply_overlay(writer, pages, profile_key, params, current_doc_num, total_docs, output_mode="merge"):
+    """
+    pages의 각 페이지에 오버레이(페이지 번호, 주소, 기타)를 적용해 writer에 추가.
+    params: 사용자가 조정한 좌표 및 설정값 dict
+    output_mode: OUTPUT_MODES 중 하나
+    반환값: 추가한 페이지 수
+
+    배치 공통 오버레이는 1회만 렌더링해서 원본 페이지 종류별로 한 번만 병합하고,
+    페이지마다 새로 만드는 것은 페이지 번호 한 줄짜리 content stream뿐이다.
+    """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"알 수 없는 출력 모드: {output_mode}")
+
+    with metrics.stage("overlay"):
+        layout = compile_layout(profile_key, params)
+        static_overlay = render_static_overlay(profile_key, layout)
+        # pic/ 이미지는 writer 전체에서 XObject 하나를 공유
+        images = [
+            (op.name, _shared_image_ref(writer, op.image), op.x, op.y, op.w, op.h)
+            for op in layout if isinstance(op, PlaceImage)
+        ]
+        if output_mode == "xobject":
+            overlay_ref = writer._addObject(page_to_form_xobject(static_overlay))
+    templates = {}
+
+    # 페이지 번호: 페이지마다 바뀌는 건 번호 숫자뿐이므로 앞뒤 바이트를 미리 만든다 (숫자/공백이라 이스케이프 불필요)
+    counter = next((op for op in layout if isinstance(op, PageCounter)), None)
+    if counter is not None:
+        num_head = _page_number_head(counter.x, counter.y)
+        num_tail = f"{' ' * counter.gap}{total_docs}".encode("latin-1") + _PAGE_NUM_TAIL
+
+    count = 0
+    with metrics.stage("merge"):
+        for page in pages:
+            # 복사된 페이지들은 content/리소스 객체를 공유하므로 템플릿도 재사용
+            key = (_ref_key(page.raw_get("/Contents")), _ref_key(page.raw_get("/Resources")))
+            if key not in templates:
+                if output_mode == "xobject":
+                    templates[key] = _xobject_page_template(writer, page, overlay_ref, images)
+                else:
+                    templates[key] = _merge_page_template(writer, page, static_overlay, images)
+            contents_refs, resources_ref = templates[key]
+
+            contents = ArrayObject(contents_refs)
+            if counter is not None:
+                number = DecodedStreamObject()
+                number.setData(num_head + str(current_doc_num + count).encode("latin-1") + num_tail)
+                contents.append(number)
+            page[NameObject("/Contents")] = contents
+            page[NameObject("/Resources")] = resources_ref
+            writer.addPage(page)
+            count += 1
+    metrics.count("pages", count)
+
+    return count
+
+
+def render_batch(writer, reader, num_copies, profile_key, params, current_doc_num, total_docs, output_mode="merge"):
+    """
+    배치 1개를 원본 reader에서 최종 writer로 바로 렌더링 (복사 + 오버레이).
+    copy_pages / process_pdf 와 결과는 같지만 중간 PDF 직렬화/재파싱이 없다.
+    반환값: 추가한 페이지 수
+    """
+    with metrics.stage("copy_pages"):
+        indices = copy_page_indices(reader.getNumPages(), num_copies)
+        pages = [clone_page(reader.getPage(i)) for i in indices]
+    return apply_overlay(writer, pages, profile_key, params, current_doc_num, total_docs, output_mode)
+
+
+def process_pdf(input_pdf_bytes, profile_key, params, current_doc_num, total_docs, output_mode="merge",
+                pdf_backend=None):
+    """
+    PDF 바이트의 모든 페이지에 오버레이를 적용한 PDF 바이트 반환 (apply_overlay 참고).
+    pdf_backend: PDF_BACKENDS 중 하나 (생략 시 DEFAULT_PDF_BACKEND)
+    반환값: (PDF 바이트, 페이지 수)
+    """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"알 수 없는 출력 모드: {output_mode}")
+    return get_pdf_backend(pdf_backend).overlay_pages(
+        input_pdf_bytes, overlay_plan(profile_key, params, total_docs), current_doc_num, output_mode)
+
+
+# ─── PDF 백엔드 ──────────────────────────────────────────────────────
+# 읽기/복사/병합/쓰기를 맡는 PDF 라이브러리 (pdf_backend.py 참고). 출고 명세의 "pdf_backend" 로 고른다.
+# 미리보기(apply_overlay 직접 호출)와 배치 병렬 렌더링은 pypdf4 로만 동작한다.
+
+DEFAULT_PDF_BACKEND = "pypdf4"
+
+
+def overlay_plan(profile_key, params, total_docs):
+    """
+    배치 1개의 오버레이를 PDF 라이브러리와 무관한 값으로 정리 (PdfBackend 에 넘김).
+    pypdf4 백엔드는 profile_key / params / total_docs 로 apply_overlay 를 그대로 쓴다.
+    """
+    layout = compile_layout(profile_key, params)
+    images = [op for op in layout if isinstance(op, PlaceImage)]
+    counter = next((op for op in layout if isinstance(op, PageCounter)), None)
+    number = None
+    if counter is not None:
+        number = (_page_number_head(counter.x, counter.y),
+                  f"{' ' * counter.gap}{total_docs}".encode("latin-1") + _PAGE_NUM_TAIL)
+    return {
+        "profile_key": profile_key,
+        "params": params,
+        "total_docs": total_docs,
+        "overlay_pdf": static_overlay_source(profile_key, layout).data,
+        "images": [(str(op.name), op.image.key, op.image.pdf_data) for op in images],
+        "image_ops": build_image_ops([(op.name, None, op.x, op.y, op.w, op.h) for op in images]),
+        "number": number,  # (페이지 번호 content stream 의 번호 앞, 번호 뒤 바이트)
+    }
+
+
+class PyPDF4Backend(PdfBackend):
+    """PyPDF4 백엔드 (기본값). 원본 캐시의 파싱된 객체를 그대로 쓰고, 배치 병렬 렌더링을 지원한다"""
+
+    name = "pypdf4"
+    parallel = True
+
+    def copy_pages(self, data, indices_for):
+        reader = PdfFileReader(io.BytesIO(data))
+        writer = PdfFileWriter()
+        for i in indices_for(reader.getNumPages()):
+            writer.addPage(reader.getPage(i))
+
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    def overlay_pages(self, data, plan, first_number, output_mode):
+        reader = PdfFileReader(io.BytesIO(data))
+        writer = PdfFileWriter()
+        pages = (reader.getPage(i) for i in range(reader.getNumPages()))
+        total_pages = apply_overlay(writer, pages, plan["profile_key"], plan["params"],
+                                    first_number, plan["total_docs"], output_mode)
+
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue(), total_pages
+
+    def render(self, batches, output_mode, progress=None):
+        writer = PdfFileWriter()
+        done_pages = 0
+        for b, batch in enumerate(batches):
+            reader = batch["reader"]
+            with metrics.stage("copy_pages"):
+                pages = [clone_page(reader.getPage(i)) for i in batch["indices"]]
+            plan = batch["plan"]
+            done_pages += apply_overlay(writer, pages, plan["profile_key"], plan["params"],
+                                        batch["first_number"], plan["total_docs"], output_mode)
+            if progress is not None:
+                progress(b + 1, done_pages)
+        return writer
+
+
+_pdf_backends = {backend.name: backend for backend in (PyPDF4Backend(), PikepdfBackend())}
+PDF_BACKENDS = tuple(_pdf_backends)
+
+
+def get_pdf_backend(name=None):
+    """이름 -> PdfBackend (생략 시 DEFAULT_PDF_BACKEND). 모르는 이름은 ValueError, 라이브러리가 없으면 RuntimeError"""
+    name = name or DEFAULT_PDF_BACKEND
+    if name not in _pdf_backends:
+        raise ValueError(f"알 수 없는 PDF 백엔드: {name}")
+    if name != "pypdf4" and importlib.util.find_spec(name) is None:
+        raise RuntimeError(f"PDF 백엔드 {name} 이(가) 설치되어 있지 않습니다 (uv sync --extra {name})")
+    return _pdf_backends[name]
+
+
+# 요청/manifest에서 그대로 받는 국가별 추가 텍스트 파라미터
+EXTRA_TEXT_FIELDS = ["consignee_name", "reg_text", "product_name", "box_text"]
+
+
+def collect_layout_params(profile, options, params):
+    """
+    좌표 입력값(폼 필드 이름 그대로) 중 입력된 것을 params 에 넣는다.
+    기본값이 숫자인 항목에 숫자가 아닌 값이 오면 ValueError (메시지는 그대로 사용자에게 표시)
+    """
+    defaults = profile["defaults"]
+    for key in defaults:
+        val = options.get(key)
+        if val is None or val == "":
+            continue
+        if isinstance(defaults[key], (int, float)):
+            try:
+                valid = math.isfinite(float(val))
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                raise ValueError(f"{key} 값은 숫자여야 합니다: {val}")
+        params[key] = val
+    return params
+
+
+def build_shipment_spec(profile_key, total_boxes, batches, options, output_mode="merge", pdf_backend=None):
+    """
+    입력값을 검증해 build_shipment 용 출고 명세(spec)로 변환.
+    batches: [{"source": ParsedSource, "copies", "batch_number", "address"}, ...]
+    options: 좌표/텍스트 입력값 dict (폼 필드 이름 그대로, 없는 값은 현장 설정(options["preset"]) -> 프로필 기본값).
+             현장 설정을 주면 profile_key 는 비워도 된다
+    pdf_backend: PDF_BACKENDS 중 하나 (생략 시 DEFAULT_PDF_BACKEND)
+    입력 오류는 ValueError로 알린다 (메시지는 그대로 사용자에게 표시).
+    """
+    profile_key, options = apply_preset(profile_key, options)
+    if profile_key not in COUNTRY_PROFILES:
+        raise ValueError(f"알 수 없는 프로필: {profile_key}")
+    pdf_backend = get_pdf_backend(pdf_backend).name
+
+    profile = COUNTRY_PROFILES[profile_key]
+    if total_boxes <= 0:
+        raise ValueError("전체 박스 수는 1 이상이어야 합니다.")
+    if not batches:
+        raise ValueError("최소 1개의 배치가 필요합니다.")
+
+    # 좌표 파라미터 수집 (기본값까지 채워 두어 렌더링 중 profiles.json 이 바뀌어도 이 출고의 좌표는 그대로)
+    params = collect_layout_params(profile, options, dict(profile["defaults"]))
+
+    # 고정 주소 처리
+    if profile["address_type"] == "fixed":
+        params["address"] = options.get("address", profile.get("fixed_address", ""))
+    params["skip_address"] = options.get("skip_address") in (True, "true")
+
+    # 국가별 추가 텍스트 파라미터
+    for field in EXTRA_TEXT_FIELDS:
+        val = options.get(field)
+        if val is not None:
+            params[field] = val
+
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"알 수 없는 출력 모드: {output_mode}")
+
+    spec_batches = []
+    current_doc_num = 1
+
+    for b, batch in enumerate(batches):
+        source = batch["source"]
+        copies = int(batch.get("copies", 1))
+        batch_number = batch.get("batch_number", "")
+        batch_address = batch.get("address", "")
+
+        # 배치별 주소 처리
+        batch_params = dict(params)
+        if profile["address_type"] == "selectable":
+            if batch_address == "__SKIP__":
+                batch_params["skip_address"] = True
+                batch_params["address"] = ""
+            else:
+                batch_params["address"] = batch_address
+                batch_params["skip_address"] = False
+
+        if batch_number:
+            batch_params["batch_number"] = batch_number
+
+        # 남은 박스 수 체크
+        remaining = total_boxes - current_doc_num + 1
+        if copies > remaining:
+            raise ValueError(f"배치 {b+1}: 요청 {copies}장이 남은 박스 수 {remaining}보다 많습니다.")
+
+        # 페이지 수 검증 (1, 2페이지만 지원)
+        reader = source.open()
+        pages = len(copy_page_indices(reader.getNumPages(), copies))
+
+        spec_batches.append({
+            "reader": reader,
+            "source": source,
+            "copies": copies,
+            "params": batch_params,
+            "pages": pages,
+        })
+        current_doc_num += pages
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return {
+        "profile_key": profile_key,
+        "total_boxes": total_boxes,
+        "output_mode": output_mode,
+        "pdf_backend": pdf_backend,
+        "batches": spec_batches,
+        "total_pages": current_doc_num - 1,
+        "filename": f"shipping_mark_{profile['name']}_{timestamp}.pdf",
+    }
+
+
+def build_shipment(spec, progress=None, workers=1):
+    """
+    출고 명세(spec)의 모든 배치를 하나의 합본 문서로 렌더링 (반환값은 write(stream) 이 있는 writer).
+    spec: {"profile_key", "total_boxes", "output_mode", "pdf_backend",
+           "batches": [{"reader", "source", "copies", "params", "pages"}, ...]}
+    progress: 배치 하나가 끝날 때마다 progress(완료 배치 수, 완료 페이지 수) 호출
+    workers: 2 이상이면 배치를 프로세스 풀에서 병렬 렌더링 후 배치 순서대로 합친다 (pypdf4 백엔드만)
+    """
+    backend = get_pdf_backend(spec.get("pdf_backend"))
+    if workers > 1 and len(spec["batches"]) > 1 and backend.parallel:
+        return _build_shipment_parallel(spec, progress, workers)
+    return backend.render(_render_batches(spec), spec["output_mode"], progress)
+
+
+def _render_batches(spec, first_box=1, last_box=None):
+    """
+    spec 배치 -> PdfBackend.render 용 배치 목록.
+    last_box 를 주면 박스 번호 first_box..last_box 에 해당하는 배치와 페이지만 남긴다 (재출력).
+    """
+    batches = []
+    current_doc_num = 1
+    for batch in spec["batches"]:
+        batch_first = current_doc_num
+        current_doc_num += batch["pages"]
+        lo = max(first_box, batch_first)
+        hi = current_doc_num - 1 if last_box is None else min(last_box, current_doc_num - 1)
+        if lo > hi and last_box is not None:
+            continue
+        reader = batch["reader"]
+        with metrics.stage("overlay"):
+            plan = overlay_plan(spec["profile_key"], batch["params"], spec["total_boxes"])
+        batches.append({
+            "source": batch.get("source"),
+            "reader": reader,
+            "indices": copy_page_indices(reader.getNumPages(), batch["copies"])[lo - batch_first:hi - batch_first + 1],
+            "plan": plan,
+            "first_number": lo,
+        })
+        if last_box is not None and current_doc_num > last_box:
+            break
+    return batches
+
+
+def parse_box_range(text, total_pages):
+    """재출력 범위 문자열 ("5-9", "12") -> (first_box, last_box). 잘못된 범위는 ValueError"""
+    first, sep, last = str(text).strip().partition("-")
+    try:
+        first_box = int(first)
+        last_box = int(last) if sep else first_box
+    except ValueError:
+        raise ValueError(f"재출력 범위 형식은 시작-끝 입니다 (예: 5-9): {text}")
+    if not 1 <= first_box <= last_box <= total_pages:
+        raise ValueError(f"재출력 범위는 1~{total_pages} 사이여야 합니다: {text}")
+    return first_box, last_box
+
+
+def reprint_filename(spec, first_box, last_box):
+    """재출력 PDF 파일 이름 (예: shipping_mark_브라질_20250101_120000_재출력_5-9.pdf)"""
+    return f"{os.path.splitext(spec['filename'])[0]}_재출력_{first_box}-{last_box}.pdf"
+
+
+def build_reprint(spec, first_box, last_box):
+    """
+    출고 명세 중 박스 번호 first_box..last_box 페이지만 렌더링 (파손 라벨 재출력).
+    build_shipment 와 같은 current_doc_num 계산으로 박스가 속한 배치와 원본 페이지를 찾으므로
+    각 페이지는 전체 출고본의 같은 번호 페이지와 같다. 비용은 재출력 페이지 수에만 비례한다.
+    """
+    return get_pdf_backend(spec.get("pdf_backend")).render(
+        _render_batches(spec, first_box, last_box), spec["output_mode"])
+
+
+# ─── 결과 캐시 키 ───────────────────────────────────────────────────
+
+# 렌더링 결과가 달라지는 엔진 변경이 있으면 올려서 이전 결과 캐시를 무효화
+RESULT_CACHE_VERSION = 1
+
+
+def pic_fingerprint():
+    """pic/ 폴더 이미지의 (이름, 수정 시각, 크기) 목록 (이미지를 바꾸면 결과 캐시 키가 바뀜)"""
+    try:
+        with os.scandir(PIC_DIR) as it:
+            return sorted((e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in it if e.is_file())
+    except FileNotFoundError:
+        return []
+
+
+def shipment_cache_key(spec):
+    """
+    출고 명세의 결과 PDF 식별 키 (sha256).
+    원본 PDF 내용, 프로필 정의(profile_digest), 기본값을 채운 배치별 입력값, 부수, 전체 박스 수, 출력 모드,
+    PDF 백엔드, pic/ 이미지가 같으면 같은 결과 PDF가 나온다.
+    """
+    payload = {
+        "version": RESULT_CACHE_VERSION,
+        "profile": profile_digest(spec["profile_key"]),
+        "total_boxes": spec["total_boxes"],
+        "output_mode": spec["output_mode"],
+        "pdf_backend": spec.get("pdf_backend", DEFAULT_PDF_BACKEND),
+        "batches": [[batch["source"].digest, batch["copies"], batch["params"]]
+                    for batch in spec["batches"]],
+        "pic": pic_fingerprint(),
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+# ─── 배치 병렬 처리 ──────────────────────────────────────────────────
+
+_process_pool = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers):
+    """요청마다 프로세스를 새로 띄우지 않도록 풀을 재사용 (워커 수가 바뀌면 재생성)"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            # spawn 방식(Windows)의 워커는 engine 을 새로 불러오므로 set_pic_dir 로 바꾼 위치를 넘겨준다
+            _process_pool = ProcessPoolExecutor(max_workers=workers, initializer=set_pic_dir, initargs=(PIC_DIR,))
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def render_batch_bytes(source, copies, profile_key, params, current_doc_num, total_docs, output_mode="merge"):
+    """
+    배치 1개를 독립된 PDF 바이트로 렌더링 (프로세스 풀 워커에서 실행).
+    source 는 원본 PDF 바이트, 또는 파일 원본의 (경로, (수정 시각, 크기)) - 워커가 파일을 직접 mmap 으로 읽는다.
+    current_doc_num 은 앞 배치들의 페이지 수로 미리 계산해서 넘긴다.
+    """
+    if isinstance(source, tuple):
+        reader = load_unchanged(*source).open()
+    else:
+        reader = PdfFileReader(io.BytesIO(source))
+    writer = PdfFileWriter()
+    render_batch(writer, reader, copies,
+                 profile_key, params, current_doc_num, total_docs, output_mode)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def _shared_batch_images(writer, profile_key, params):
+    """배치 레이아웃의 이미지 {리소스 이름: writer 공유 XObject 참조}"""
+    return {op.name: _shared_image_ref(writer, op.image)
+            for op in compile_layout(profile_key, params) if isinstance(op, PlaceImage)}
+
+
+def _use_shared_images(page, images):
+    """
+    워커가 배치 PDF마다 따로 넣은 이미지 XObject를 합본 writer의 공유 XObject로 바꾼다.
+    (같은 원본 페이지의 사본은 리소스 객체를 공유하므로 한 번 바꾸면 모두 바뀐다.
+     더 이상 참조되지 않는 배치별 이미지는 write() 때 출력되지 않는다)
+    """
+    xobjects = page["/Resources"].getObject().get("/XObject")
+    if xobjects is None:
+        return
+    xobjects = xobjects.getObject()
+    for name, ref in images.items():
+        if name in xobjects:
+            xobjects[NameObject(name)] = ref
+
+
+def _build_shipment_parallel(spec, progress, workers):
+    """배치별 시작 번호를 미리 계산해 동시에 렌더링하고, 결과는 배치 순서대로 합친다"""
+    pool = _get_process_pool(workers)
+    futures = []
+    current_doc_num = 1
+    for batch in spec["batches"]:
+        futures.append(pool.submit(
+            render_batch_bytes, batch["source"].file_source() or batch["source"].data, batch["copies"],
+            spec["profile_key"], batch["params"], current_doc_num, spec["total_boxes"],
+            spec["output_mode"]
+        ))
+        current_doc_num += batch["pages"]
+
+    combined_writer = PdfFileWriter()
+    done_pages = 0
+    for b, future in enumerate(futures):
+        with metrics.stage("workers"):
+            batch_pdf = future.result()
+        with metrics.stage("merge"):
+            reader = PdfFileReader(io.BytesIO(batch_pdf))
+            images = _shared_batch_images(combined_writer, spec["profile_key"], spec["batches"][b]["params"])
+            for p in range(reader.getNumPages()):
+                page = reader.getPage(p)
+                if images:
+                    _use_shared_images(page, images)
+                combined_writer.addPage(page)
+        done_pages += reader.getNumPages()
+        metrics.count("pages", reader.getNumPages())
+        if progress is not None:
+            progress(b + 1, done_pages)
+
+    return combined_writer
+
+
+# ─── 일괄 생성 (manifest) ────────────────────────────────────────────
+# 월말처럼 여러 출고를 한 번에 만들 때 사용. manifest 한 건 = 출고 여러 건.
+#   JSON: {"shipments": [{"name", "profile", "preset", "total_boxes", "output_mode", "params": {...},
+#                         "batches": [{"file", "copies", "batch_number", "address"}, ...]}, ...]}
+#   CSV : 배치 1개 = 1행. name 이 같은 행은 한 출고로 묶고, 출고 단위 값은 첫 행을 따른다.
+#         MANIFEST_COLUMNS 외의 열은 params (좌표/텍스트 입력값, preset 포함)로 취급한다.
+# preset(현장 설정 이름)을 주면 비어 있는 좌표는 현장 설정 값으로 채우고, profile 은 생략해도 된다.
+# total_boxes 를 생략하면 배치 부수 합계, output_mode 를 생략하면 merge.
+
+MANIFEST_COLUMNS = ("name", "profile", "total_boxes", "output_mode", "file", "copies", "batch_number", "address")
+
+
+def parse_manifest(text, fmt=None):
+    """
+    manifest 텍스트 -> 출고 목록 [{"name", "profile", "total_boxes", "output_mode", "params", "batches"}, ...]
+    fmt: "json" / "csv" (생략 시 내용으로 판단)
+    """
+    text = text.lstrip("\ufeff")
+    if fmt is None:
+        fmt = "json" if text.lstrip()[:1] in ("{", "[") else "csv"
+
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"manifest JSON 형식 오류: {e}")
+        raw = data.get("shipments", []) if isinstance(data, dict) else data
+    elif fmt == "csv":
+        raw = []
+        by_name = {}
+        for row in csv.DictReader(io.StringIO(text)):
+            row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+            name = row.get("name") or f"row_{len(raw) + 1}"
+            shipment = by_name.get(name)
+            if shipment is None:
+                shipment = {k: row[k] for k in ("name", "profile", "total_boxes", "output_mode") if row.get(k)}
+                shipment["name"] = name
+                shipment["params"] = {k: v for k, v in row.items() if k not in MANIFEST_COLUMNS and v != ""}
+                shipment["batches"] = []
+                by_name[name] = shipment
+                raw.append(shipment)
+            shipment["batches"].append({k: row[k] for k in ("file", "copies", "batch_number", "address") if row.get(k)})
+    else:
+        raise ValueError(f"알 수 없는 manifest 형식: {fmt}")
+
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("manifest에 출고가 없습니다.")
+
+    shipments = []
+    names = set()
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict):
+            raise ValueError(f"출고 {i+1}: 항목 형식이 올바르지 않습니다.")
+        name = re.sub(r'[\\/:*?"<>|\s]+', "_", str(item.get("name") or f"{i+1:03d}_{item.get('profile', '')}"))
+        if name in names:
+            raise ValueError(f"출고 이름이 중복됩니다: {name}")
+        names.add(name)
+
+        batches = item.get("batches") or []
+        try:
+            batches = [dict(b, copies=int(b.get("copies", 1))) for b in batches]
+            total_boxes = int(item.get("total_boxes") or sum(b["copies"] for b in batches))
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"{name}: 부수/박스 수는 정수여야 합니다.")
+        for b, batch in enumerate(batches):
+            if not batch.get("file"):
+                raise ValueError(f"{name}: 배치 {b+1}의 PDF 파일이 없습니다.")
+        params = dict(item.get("params") or {})
+        if item.get("preset"):
+            params["preset"] = item["preset"]
+
+        shipments.append({
+            "name": name,
+            "profile": item.get("profile"),
+            "total_boxes": total_boxes,
+            "output_mode": item.get("output_mode") or "merge",
+            "params": params,
+            "batches": batches,
+        })
+    return shipments
+
+
+def run_bulk(shipments, load_source, output_dir, workers=2, pdf_backend=None):
+    """
+    parse_manifest 결과의 출고를 동시에 렌더링해 output_dir 에 출고별 PDF와 summary.json 을 쓴다.
+    load_source(file) -> ParsedSource. 같은 파일은 한 번만 읽고 모든 출고가 공유한다.
+    pdf_backend: PDF_BACKENDS 중 하나 (생략 시 DEFAULT_PDF_BACKEND)
+    모든 출고를 먼저 검증하므로 입력 오류가 있으면 아무것도 만들지 않고 ValueError.
+    반환값: 출고별 요약 목록
+    """
+    sources = {}
+
+    def source_for(name, b, file):
+        if file not in sources:
+            try:
+                sources[file] = load_source(file)
+            except (OSError, KeyError) as e:
+                raise ValueError(f"{name}: 배치 {b+1}: 파일을 찾을 수 없습니다 - {file}") from e
+        return sources[file]
+
+    specs = []
+    for shipment in shipments:
+        batches = [dict(batch, source=source_for(shipment["name"], b, batch["file"]))
+                   for b, batch in enumerate(shipment["batches"])]
+        try:
+            spec = build_shipment_spec(shipment["profile"], shipment["total_boxes"], batches,
+                                       shipment["params"], shipment["output_mode"], pdf_backend)
+        except ValueError as e:
+            raise ValueError(f"{shipment['name']}: {e}") from e
+        specs.append((shipment, spec))
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    def render(shipment, spec):
+        started = time.perf_counter()
+        filename = f"{shipment['name']}.pdf"
+        entry = {
+            "name": shipment["name"],
+            "profile": spec["profile_key"],
+            "file": filename,
+            "batches": len(spec["batches"]),
+            "pages": spec["total_pages"],
+        }
+        try:
+            writer = build_shipment(spec)
+            path = os.path.join(output_dir, filename)
+            with open(path + ".part", "wb") as f:
+                writer.write(f)
+            os.replace(path + ".part", path)
+            entry.update(status="done", bytes=os.path.getsize(path))
+        except Exception as e:
+            metrics.record_exception("bulk_shipment", shipment=shipment["name"])
+            entry.update(status="failed", error=str(e))
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+        return entry
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pdf-bulk") as pool:
+        summary = list(pool.map(lambda item: render(*item), specs))
+
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"shipments": summary}, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+# ─── 미리보기 세션 ───────────────────────────────────────────────────
+# 원본 첫 페이지와 오버레이 레이어를 세션에 따로 보관하고,
+# 좌표를 바꾸면 해당 파라미터가 속한 레이어만 다시 렌더링한다.
+
+def layer_params_key(profile_key, layer, params):
+    """레이어 렌더링 결과를 재사용할 수 있는지 판단하는 키 (프로필 정의 + 레이어에 속한 파라미터만 포함)"""
+    items = (profile_digest(profile_key),)
+    for element in COUNTRY_PROFILES[profile_key]["layout"]:
+        if element["layer"] != layer:
+            continue
+        items += tuple((name, str(params[name])) for name in _element_param_names(element) if name in params)
+        if element["type"] == "image":
+            # 이미지 파일을 교체하면 다시 그리도록 수정 시각 포함
+            image_path = os.path.join(PIC_DIR, element["file"])
+            items += (os.path.getmtime(image_path) if os.path.exists(image_path) else None,)
+    return (profile_key, items)
+
+
+def render_overlay_layer(profile_key, ops):
+    """오버레이 레이어 1개의 그리기 명령만 그린 1페이지 PDF 바이트"""
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=get_pagesize(profile_key))
+    draw_layout(can, ops, images=True)
+    can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+def compose_preview_page(writer, body_page, layer_pages, page_number_stream):
+    """
+    원본 페이지 위에 레이어별 Form XObject와 페이지 번호를 차례로 얹은 미리보기 페이지.
+    원본 content stream은 파싱/재압축 없이 참조만 한다.
+    """
+    page = clone_page(body_page)
+
+    resources = DictionaryObject()
+    if "/Resources" in page:
+        resources.update(page["/Resources"].getObject())
+    xobjects = DictionaryObject()
+    if "/XObject" in resources:
+        xobjects.update(resources["/XObject"].getObject())
+    fonts = DictionaryObject()
+    if "/Font" in resources:
+        fonts.update(resources["/Font"].getObject())
+    fonts[PAGE_NUM_FONT] = _page_number_font()
+
+    draw = []
+    for layer, layer_page in layer_pages:
+        name = NameObject(f"/SMkLayer_{layer}")
+        xobjects[name] = writer._addObject(page_to_form_xobject(layer_page))
+        draw.append(f"q {name} Do Q")
+    resources[NameObject("/XObject")] = xobjects
+    resources[NameObject("/Font")] = fonts
+
+    contents = []
+    if "/Contents" in page:
+        raw = page.raw_get("/Contents")
+        resolved = raw.getObject()
+        contents = list(resolved) if isinstance(resolved, ArrayObject) else [raw]
+    head = DecodedStreamObject()
+    head.setData(b"q\n")
+    tail = DecodedStreamObject()
+    tail.setData(("Q\n" + " ".join(draw) + "\n").encode("latin-1"))
+
+    contents = [writer._addObject(head)] + contents + [writer._addObject(tail)]
+    if page_number_stream is not None:
+        contents.append(writer._addObject(page_number_stream))
+    page[NameObject("/Contents")] = ArrayObject(contents)
+    page[NameObject("/Resources")] = resources
+    return page
+
+
+class PreviewSession:
+    """미리보기 세션 1개: 원본 PDF와 레이어별 렌더링 결과 {레이어: (키, ParsedSource)}"""
+
+    def __init__(self, source):
+        self.source = source
+        self.layers = {}
+        self.lock = threading.Lock()
+        self.touched_at = time.time()
+
+    def render(self, profile_key, params, total_boxes):
+        """
+        첫 페이지 미리보기 PDF 바이트와 이번에 다시 렌더링한 레이어 이름 목록 반환.
+        파라미터가 바뀌지 않은 레이어는 이전 결과를 그대로 쓴다.
+        """
+        layout = compile_layout(profile_key, params)
+        counter = next((op for op in layout if isinstance(op, PageCounter)), None)
+        page_number_stream = None
+        if counter is not None:
+            page_number_stream = build_page_number_stream(
+                counter.x, counter.y, build_page_number_text(1, total_boxes, counter.gap))
+
+        with self.lock:
+            self.touched_at = time.time()
+            rebuilt = []
+            layer_pages = []
+            for layer in profile_layers(profile_key):
+                key = layer_params_key(profile_key, layer, params)
+                cached = self.layers.get(layer)
+                if cached is None or cached[0] != key:
+                    ops = [op for op in layout if op.layer == layer]
+                    cached = (key, ParsedSource(render_overlay_layer(profile_key, ops)))
+                    self.layers[layer] = cached
+                    rebuilt.append(layer)
+                layer_pages.append((layer, cached[1].open().getPage(0)))
+
+            writer = PdfFileWriter()
+            writer.addPage(compose_preview_page(
+                writer, self.source.open().getPage(0), layer_pages, page_number_stream))
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue(), rebuilt
+
+
+class PreviewSessionStore:
+    """미리보기 세션 보관소. ttl 초 동안 쓰지 않았거나 max_sessions를 넘으면 오래된 것부터 삭제"""
+
+    def __init__(self, max_sessions=32, ttl=30 * 60):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, source):
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = PreviewSession(source)
+            while len(self._sessions) > self.max_sessions:
+                oldest = min(self._sessions, key=lambda k: self._sessions[k].touched_at)
+                del self._sessions[oldest]
+        return session_id
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for session_id in [k for k, v in self._sessions.items() if v.touched_at < cutoff]:
+            del self._sessions[session_id]
+
+
+preview_sessions = PreviewSessionStore()
+
+
+# ─── 미리보기 이미지 ─────────────────────────────────────────────────
+# PDF 뷰어 없이 바로 볼 수 있도록 미리보기 첫 페이지를 PNG/WebP로 래스터화.
+# 렌더러는 PyMuPDF(pip install pymupdf)를 우선 쓰고, 없으면 poppler의 pdftoppm을 쓴다.
+
+PREVIEW_IMAGE_FORMATS = ("png", "webp")
+
+
+def _import_pymupdf():
+    """PyMuPDF 모듈 (설치되어 있지 않으면 None)"""
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf  # 1.24 이전 버전의 모듈 이름
+        except ImportError:
+            return None
+    return pymupdf
+
+
+def raster_backend():
+    """사용 가능한 래스터 렌더러 이름 ("pymupdf" / "pdftoppm"), 없으면 None"""
+    if _import_pymupdf() is not None:
+        return "pymupdf"
+    if shutil.which("pdftoppm"):
+        return "pdftoppm"
+    return None
+
+
+def rasterize_first_page(pdf_bytes, dpi=72, fmt="png"):
+    """PDF 첫 페이지를 dpi 해상도의 이미지 바이트로 변환"""
+    if fmt not in PREVIEW_IMAGE_FORMATS:
+        raise ValueError(f"알 수 없는 이미지 형식: {fmt}")
+
+    backend = raster_backend()
+    if backend == "pymupdf":
+        pymupdf = _import_pymupdf()
+        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+            png = doc[0].get_pixmap(dpi=dpi).tobytes("png")
+    elif backend == "pdftoppm":
+        png = subprocess.run(
+            ["pdftoppm", "-png", "-singlefile", "-r", str(dpi), "-f", "1", "-l", "1", "-"],
+            input=pdf_bytes, capture_output=True, check=True,
+        ).stdout
+    else:
+        raise RuntimeError("미리보기 이미지 렌더러가 없습니다. PyMuPDF(uv sync --extra preview) 또는 poppler(pdftoppm)를 설치하세요.")
+
+    if fmt == "webp":
+        from PIL import Image  # reportlab 의존성으로 함께 설치됨
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(png)).save(buf, "WEBP", lossless=True, method=2)  # 글자·선 위주라 무손실이 더 작다
+        return buf.getvalue()
+    return png
+
+
+def preview_image_key(source, profile_key, params, total_boxes, dpi, fmt):
+    """미리보기 이미지 캐시 키: 원본 내용 해시 + 그려지는 레이어의 파라미터 + 페이지 번호 + 출력 형식"""
+    parts = [source.digest, profile_key, total_boxes, dpi, fmt]
+    parts += [layer_params_key(profile_key, layer, params)
+              for layer in profile_layers(profile_key) + ["page_number"]]
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+class PreviewImageCache:
+    """렌더링한 미리보기 이미지 LRU 캐시 (max_bytes를 넘으면 오래 안 쓴 것부터 삭제)"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._images.get(key)
+            if data is None:
+                self.misses += 1
+                metrics.count("preview_image_cache_misses")
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+        metrics.count("preview_image_cache_hits")
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._images:
+                self._bytes -= len(self._images.pop(key))
+            if len(data) > self.max_bytes:
+                return
+            self._images[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, old = self._images.popitem(last=False)
+                self._bytes -= len(old)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+preview_images = PreviewImageCache()
+
+
+# ─── 출력 스트리밍 ───────────────────────────────────────────────────
+
+STREAM_CHUNK_SIZE = 64 * 1024   # 스트리밍 청크 크기
+STREAM_MAX_PENDING = 8          # 클라이언트로 아직 못 보낸 청크 최대 개수
+
+
+class _StreamCancelled(Exception):
+    """클라이언트 연결이 끊겨 PDF 쓰기를 중단할 때 사용"""
+
+
+class _ChunkSink:
+    """writer.write()의 출력 대상. chunk_size 만큼 모일 때마다 put()으로 넘긴다."""
+
+    def __init__(self, put, chunk_size):
+        self._put = put
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._pos = 0
+
+    def write(self, data):
+        self._buf += data
+        self._pos += len(data)
+        if len(self._buf) >= self._chunk_size:
+            self.flush()
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        if self._buf:
+            self._put(bytes(self._buf))
+            self._buf.clear()
+
+
+def iter_pdf_chunks(writer, chunk_size=STREAM_CHUNK_SIZE, max_pending=STREAM_MAX_PENDING):
+    """
+    writer.write()를 백그라운드 스레드에서 실행하면서 완성된 청크를 순서대로 내보내는 제너레이터.
+    대기 청크 수가 max_pending 으로 제한되므로 출력 PDF 전체를 메모리에 올리지 않고,
+    첫 바이트도 쓰기가 끝나기 전에 전송된다. 소비 측이 중단하면 쓰기 스레드도 멈춘다.
+    """
+    chunks = queue.Queue(maxsize=max_pending)
+    cancelled = threading.Event()
+    done = object()
+    timer = metrics.current()
+    blocked = [0.0]  # 클라이언트가 받아 가기를 기다린 시간 (write 단계 시간에서 제외)
+
+    def put(item):
+        started = time.perf_counter()
+        try:
+            while not cancelled.is_set():
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+            raise _StreamCancelled()
+        finally:
+            blocked[0] += time.perf_counter() - started
+
+    def run():
+        try:
+            started = time.perf_counter()
+            sink = _ChunkSink(put, chunk_size)
+            writer.write(sink)
+            sink.flush()
+            if timer is not None:
+                timer.add("write", time.perf_counter() - started - blocked[0])
+            put(done)
+        except _StreamCancelled:
+            pass
+        except Exception as e:
+            try:
+                put(e)
+            except _StreamCancelled:
+                pass
+
+    thread = threading.Thread(target=run, name="pdf-stream-writer", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+
+# ─── 사전 준비 (warm-up) ─────────────────────────────────────────────
+
+def warm_up(pdf_backend=None):
+    """
+    첫 요청이 느리지 않도록 서버 시작 직후 백그라운드에서 한 번 호출.
+    프로필마다 1장짜리 출고를 실제로 만들어 reportlab 글꼴, pic/ 이미지,
+    기본 오버레이와 PDF 백엔드(pdf_backend) 코드 경로를 미리 불러온다.
+    반환값: 소요 시간(초)
+    """
+    started = time.perf_counter()
+    for profile_key, profile in COUNTRY_PROFILES.items():
+        packet = io.BytesIO()
+        can = canvas.Canvas(packet, pagesize=get_pagesize(profile_key))
+        can.showPage()
+        can.save()
+        batch = {"source": ParsedSource(packet.getvalue()), "copies": 1, "address": "-"}
+        spec = build_shipment_spec(profile_key, 1, [batch], {"address": profile.get("fixed_address", "-")},
+                                   pdf_backend=pdf_backend)
+        build_shipment(spec).write(io.BytesIO())
+    raster_backend()
+    return time.perf_counter() - started
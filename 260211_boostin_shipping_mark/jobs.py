@@ -0,0 +1,178 @@
+"""
+백그라운드 PDF 생성 작업 큐
+- 외부 브로커 없이 프로세스 내 스레드 풀로 처리
+- 작업별 배치 진행률 / 남은 시간(ETA) 제공
+- 결과 PDF는 result_dir 에 파일로 저장하고 ttl 초가 지나면 삭제
+- 생성 결과 캐시에 같은 출고가 있으면 렌더링 없이 완료 상태 작업으로 등록 (add_done)
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+WRITING = "writing"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """작업 1건의 상태. 값 변경은 JobQueue의 lock 안에서만 한다."""
+
+    def __init__(self, job_id, total_batches, total_pages, filename, result_path):
+        self.id = job_id
+        self.status = QUEUED
+        self.total_batches = total_batches
+        self.total_pages = total_pages
+        self.done_batches = 0
+        self.done_pages = 0
+        self.filename = filename
+        self.result_path = result_path
+        self.error = None
+        self.cached = False  # 생성 결과 캐시에서 가져온 결과인지
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def eta_seconds(self):
+        """처리한 페이지 속도 기준 남은 시간 추정 (추정 불가 시 None)"""
+        if self.status in (DONE, FAILED):
+            return 0
+        if self.started_at is None or self.done_pages == 0:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / self.done_pages * (self.total_pages - self.done_pages), 1)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total_batches": self.total_batches,
+            "done_batches": self.done_batches,
+            "total_pages": self.total_pages,
+            "done_pages": self.done_pages,
+            "progress": round(self.done_pages / self.total_pages, 4) if self.total_pages else 0,
+            "eta_seconds": self.eta_seconds(),
+            "filename": self.filename,
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+
+class JobQueue:
+    """
+    스레드 풀 기반 작업 큐.
+    task(progress)는 배치가 끝날 때마다 progress(완료 배치 수, 완료 페이지 수)를 호출하고,
+    마지막에 PDF writer를 반환한다. 큐가 writer를 결과 파일로 저장한다.
+    """
+
+    def __init__(self, result_dir, workers=2, ttl=3600):
+        self.result_dir = result_dir
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-job")
+        os.makedirs(result_dir, exist_ok=True)
+
+    def submit(self, task, total_batches, total_pages, filename, timer=None, on_done=None):
+        """
+        작업 등록 후 Job 반환 (즉시 반환, 처리는 워커 스레드에서)
+        timer: metrics.RequestTimer - 작업이 끝나면 단계별 시간과 결과를 기록
+        on_done(result_path): 결과 파일을 저장한 직후 호출 (생성 결과 캐시 저장 등, 실패해도 작업은 완료)
+        """
+        job = self._new_job(total_batches, total_pages, filename)
+        self._executor.submit(self._run, job, task, timer, on_done)
+        return job
+
+    def add_done(self, result_file, total_batches, total_pages, filename):
+        """
+        이미 만들어진 결과 PDF(열린 파일 객체)를 복사해 완료 상태 작업으로 등록 (생성 결과 캐시 적중).
+        캐시 파일을 그대로 가리키지 않으므로 캐시에서 지워지거나 작업이 만료되어도 서로 영향이 없다
+        """
+        job = self._new_job(total_batches, total_pages, filename)
+        tmp_path = job.result_path + ".part"
+        with result_file, open(tmp_path, "wb") as f:
+            shutil.copyfileobj(result_file, f)
+        os.replace(tmp_path, job.result_path)
+        with self._lock:
+            job.status = DONE
+            job.done_batches, job.done_pages = total_batches, total_pages
+            job.cached = True
+            job.started_at = job.finished_at = time.time()
+        return job
+
+    def _new_job(self, total_batches, total_pages, filename):
+        self._expire()
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, total_batches, total_pages, filename,
+                  os.path.join(self.result_dir, f"{job_id}.pdf"))
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id):
+        """작업 상태 dict (없으면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def _run(self, job, task, timer=None, on_done=None):
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        def progress(done_batches, done_pages):
+            with self._lock:
+                job.done_batches = done_batches
+                job.done_pages = done_pages
+
+        try:
+            with metrics.activate(timer):
+                writer = task(progress)
+                with self._lock:
+                    job.status = WRITING
+                tmp_path = job.result_path + ".part"
+                with metrics.stage("write"), open(tmp_path, "wb") as f:
+                    writer.write(f)
+            os.replace(tmp_path, job.result_path)
+            if on_done is not None:
+                try:
+                    on_done(job.result_path)
+                except Exception:
+                    metrics.record_exception("job_on_done", job_id=job.id)
+            with self._lock:
+                job.status = DONE
+                job.finished_at = time.time()
+            if timer is not None:
+                timer.finish(DONE)
+        except Exception as e:
+            metrics.record_exception("job", timer, job_id=job.id)
+            with self._lock:
+                job.status = FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+            if timer is not None:
+                timer.finish(FAILED, str(e))
+
+    def _expire(self):
+        """ttl이 지난 완료/실패 작업과 결과 파일 정리"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [j for j in self._jobs.values()
+                       if j.finished_at is not None and j.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            if os.path.exists(job.result_path):
+                os.remove(job.result_path)
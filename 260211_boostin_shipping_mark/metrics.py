@@ -0,0 +1,395 @@
+"""
+요청별 성능 계측과 Prometheus 형식 /metrics
+- 요청마다 RequestTimer 하나: 단계(stage)별 소요 시간, 페이지 수, 주고받은 바이트, 캐시 적중 기록
+- engine 등은 `with metrics.stage("merge"):` 로 현재 요청(contextvars)의 단계 시간을 잰다
+  (요청 밖 - 명령줄 도구, 사전 준비 - 에서는 아무것도 하지 않음)
+- 렌더링 중 건너뛴 요소는 `metrics.warn("render_warnings", 메시지)` 로 현재 요청 로그의 warnings 에 남긴다
+- 처리하지 못한 예외는 except 블록에서 `metrics.record_exception(이름)` 으로 스택 추적을 요청 로그의
+  traceback 에 남긴다 (요청 밖 - 작업 후처리, 사전 준비, 백그라운드 스레드 - 이면 오류 1줄을 따로 남김)
+- 응답 본문을 끝까지 보낸 뒤 구조화 로그(JSON 1줄)를 남기고 히스토그램/카운터에 반영
+- 외부 라이브러리 없이 Prometheus 텍스트 형식(0.0.4)으로 내보낸다
+
+단계 이름
+  upload      업로드 수신 (multipart 파싱, 파일 읽기)
+  parse       원본 PDF 파싱 (pdf/ 폴더 캐시 적중 시 0)
+  copy_pages  복사 매수만큼 원본 페이지 복제
+  overlay     오버레이 캔버스(배치 공통 레이어) 생성
+  merge       페이지마다 오버레이 병합 + 페이지 번호
+  workers     배치 병렬 렌더링 대기 (BATCH_WORKERS ≥ 2)
+  write       최종 PDF 직렬화 (스트리밍이면 클라이언트를 기다린 시간 제외)
+  send        응답 본문 전송 (스트리밍이면 write 와 겹침)
+"""
+
+import bisect
+import contextlib
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+
+# 요청 전체 / 단계별 지연 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PREFIX = "shipping_mark_"
+
+# 요청 로그 1줄에 남기는 경고 메시지 수 상한 (카운트는 모두 센다)
+MAX_WARNINGS = 20
+
+# 구조화 요청 로그 (configure_request_log 로 출력 대상 지정)
+request_log = logging.getLogger("shipping_mark.requests")
+
+_current = contextvars.ContextVar("request_timer", default=None)
+_NULL_STAGE = contextlib.nullcontext()
+
+
+# ─── 요청별 계측 ─────────────────────────────────────────────────────
+
+class _Stage:
+    """with 블록 시간을 timer 의 단계 시간에 더한다 (같은 단계가 여러 번이면 합산)"""
+
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.started)
+
+
+class RequestTimer:
+    """요청(또는 백그라운드 작업) 1건의 계측 값"""
+
+    def __init__(self, endpoint, profile="-"):
+        self.endpoint = endpoint
+        self.profile = profile
+        self.started = time.perf_counter()
+        self.send_started = None
+        self.stages = {}   # 단계 이름 -> 초
+        self.counts = {}   # "pages", "bytes_in", "bytes_out", "source_cache_hits" ... -> 값
+        self.cache = None  # 생성 결과 캐시 적중 여부 ("hit" / "miss")
+        self.warnings = []  # 처리는 계속했지만 로그에 남길 문제 (이미지 추가 실패 등)
+        self.status = None
+        self.error = None
+        self.traceback = None  # 처리하지 못한 예외의 스택 추적 (record_exception)
+        self._finished = False
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def bind(self, chunks):
+        """
+        스트리밍 응답 본문: 청크를 만드는 동안 이 요청을 현재 요청으로 지정하고 보낸 바이트를 센다.
+        (Flask 는 본문을 보내기 전에 요청 컨텍스트를 닫으므로 그 뒤의 단계 시간도 여기로 모은다)
+        """
+        it = iter(chunks)
+        try:
+            while True:
+                token = _current.set(self)
+                try:
+                    chunk = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                self.count("bytes_out", len(chunk))
+                yield chunk
+        finally:
+            if hasattr(it, "close"):
+                it.close()
+
+    def finish(self, status=None, error=None):
+        """응답 전송이 끝난 시점에 한 번 호출: 히스토그램 반영 + 로그"""
+        if self._finished:
+            return
+        self._finished = True
+        now = time.perf_counter()
+        if status is not None:
+            self.status = status
+        if error is not None:
+            self.error = error
+        if self.send_started is not None:
+            self.add("send", now - self.send_started)
+        registry.record(self, now - self.started)
+        if request_log.isEnabledFor(logging.INFO):
+            request_log.info(json.dumps(self.to_dict(now - self.started), ensure_ascii=False))
+
+    def to_dict(self, seconds):
+        record = {
+            "ts": round(time.time(), 3),
+            "endpoint": self.endpoint,
+            "profile": self.profile,
+            "status": self.status,
+            "ms": round(seconds * 1000, 1),
+            "stages_ms": {name: round(value * 1000, 1) for name, value in self.stages.items()},
+            **self.counts,
+        }
+        if self.cache is not None:
+            record["result_cache"] = self.cache
+        if self.warnings:
+            record["warnings"] = self.warnings
+        if self.error:
+            record["error"] = self.error
+        if self.traceback:
+            record["traceback"] = self.traceback
+        return record
+
+
+def current():
+    """현재 요청의 RequestTimer (요청 밖이면 None)"""
+    return _current.get()
+
+
+def stage(name):
+    """현재 요청의 단계 시간 측정 컨텍스트 (요청 밖이면 아무것도 안 함)"""
+    timer = _current.get()
+    return _NULL_STAGE if timer is None else _Stage(timer, name)
+
+
+def count(name, value=1):
+    """현재 요청의 카운트 증가 (요청 밖이면 무시)"""
+    timer = _current.get()
+    if timer is not None:
+        timer.count(name, value)
+
+
+def warn(name, message):
+    """
+    현재 요청에 경고 기록: name 카운트 증가 + 구조화 로그의 warnings 에 메시지 추가
+    (요청 밖 - 명령줄 도구 등 - 이면 stderr 에 출력)
+    """
+    timer = _current.get()
+    if timer is None:
+        print(f"경고: {message}", file=sys.stderr)
+        return
+    timer.count(name)
+    if len(timer.warnings) < MAX_WARNINGS:
+        timer.warnings.append(message)
+
+
+def record_exception(event, timer=None, **fields):
+    """
+    except 블록 안에서 호출: 처리 중인 예외의 스택 추적을 구조화 로그로 남긴다.
+    timer(생략 시 현재 요청)가 있으면 그 요청 로그 줄의 traceback 에 넣고,
+    없으면 {"event", "error", fields..., "traceback"} 오류 1줄을 요청 로그에 따로 남긴다
+    (요청 로그를 끈 경우에도 오류는 표준 오류로 출력된다)
+    """
+    text = traceback.format_exc()
+    timer = timer if timer is not None else _current.get()
+    if timer is not None:
+        timer.traceback = text
+        return
+    record = {"ts": round(time.time(), 3), "event": event, "error": str(sys.exc_info()[1]), **fields,
+              "traceback": text}
+    request_log.error(json.dumps(record, ensure_ascii=False))
+
+
+@contextlib.contextmanager
+def activate(timer):
+    """with 블록 동안 timer 를 현재 요청으로 지정 (백그라운드 작업 스레드용, None 이면 그대로)"""
+    if timer is None:
+        yield
+        return
+    token = _current.set(timer)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# ─── 집계 / Prometheus 출력 ──────────────────────────────────────────
+
+class Histogram:
+    """구간별 관측 수 (출력할 때 누적)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸: +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """카운터/히스토그램 보관 (스레드 안전). collectors 는 /metrics 를 만들 때 현재 값을 내는 함수"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # 이름 -> {레이블 tuple: 값}
+        self._histograms = {}  # 이름 -> {레이블 tuple: Histogram}
+        self._help = {
+            "requests_total": "처리한 요청 수",
+            "request_duration_seconds": "요청 처리 시간 (응답 전송 완료까지)",
+            "stage_duration_seconds": "요청 단계별 처리 시간",
+            "pages_total": "생성한 페이지 수",
+            "bytes_total": "요청/응답 본문 바이트 수",
+            "render_warnings_total": "렌더링 중 건너뛴 요소 수 (이미지 추가 실패 등)",
+        }
+        self.collectors = []
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if labels not in series:
+                series[labels] = Histogram(LATENCY_BUCKETS)
+            series[labels].observe(value)
+
+    def record(self, timer, seconds):
+        endpoint, profile = ("endpoint", timer.endpoint), ("profile", timer.profile)
+        self.inc("requests_total", (endpoint, profile, ("status", str(timer.status))))
+        self.observe("request_duration_seconds", (endpoint, profile), seconds)
+        for name, value in timer.stages.items():
+            self.observe("stage_duration_seconds", (endpoint, ("stage", name)), value)
+        if timer.counts.get("pages"):
+            self.inc("pages_total", (endpoint, profile), timer.counts["pages"])
+        for direction in ("in", "out"):
+            if timer.counts.get(f"bytes_{direction}"):
+                self.inc("bytes_total", (endpoint, ("direction", direction)), timer.counts[f"bytes_{direction}"])
+        if timer.counts.get("render_warnings"):
+            self.inc("render_warnings_total", (endpoint,), timer.counts["render_warnings"])
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                _header(lines, name, "counter", self._help.get(name, name))
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}{name}{_labels(labels)} {_number(value)}")
+            for name, series in sorted(self._histograms.items()):
+                _header(lines, name, "histogram", self._help.get(name, name))
+                for labels, hist in sorted(series.items()):
+                    total = 0
+                    for bound, n in zip(hist.buckets + ("+Inf",), hist.counts):
+                        total += n
+                        le = bound if bound == "+Inf" else _number(bound)
+                        lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', le),))} {total}")
+                    lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {_number(hist.sum)}")
+                    lines.append(f"{PREFIX}{name}_count{_labels(labels)} {total}")
+        for collect in self.collectors:
+            for name, kind, help_text, series in collect():
+                _header(lines, name, kind, help_text)
+                for labels, value in series:
+                    lines.append(f"{PREFIX}{name}{_labels(tuple(labels.items()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f"# HELP {PREFIX}{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def cache_collector(caches):
+    """
+    캐시 통계(stats() dict)를 /metrics 항목으로: caches() -> {"result": stats, "source": stats, ...}
+    hits/misses/evictions/probes 는 카운터, entries/bytes 는 게이지
+    """
+    def collect():
+        stats = caches()
+        for key, kind, help_text in (("hits", "counter", "캐시 적중 수"), ("misses", "counter", "캐시 실패 수"),
+                                     ("evictions", "counter", "용량 초과로 제거한 항목 수"),
+                                     ("probes", "counter", "존재 확인 수 (적중/실패로 세지 않음)"),
+                                     ("entries", "gauge", "캐시 항목 수"), ("bytes", "gauge", "캐시 크기(바이트)")):
+            series = [({"cache": name}, s[key]) for name, s in sorted(stats.items()) if key in s]
+            if series:
+                yield f"cache_{key}_total" if kind == "counter" else f"cache_{key}", kind, help_text, series
+    return collect
+
+
+registry = Registry()
+
+
+# ─── Flask 연결 ──────────────────────────────────────────────────────
+
+def install(app, endpoints, profiles):
+    """
+    endpoints(뷰 함수 이름)에 해당하는 요청을 계측한다.
+    profiles: 레이블로 쓸 프로필 키 목록 (그 밖의 값은 "-" - 레이블 종류가 늘어나지 않도록)
+    """
+    from flask import g, request
+    from werkzeug.wsgi import ClosingIterator
+
+    @app.before_request
+    def _start_request_timer():
+        if request.endpoint not in endpoints:
+            return
+        timer = RequestTimer(request.endpoint)
+        timer.count("bytes_in", request.content_length or 0)
+        g.request_timer = timer
+        g.request_timer_token = _current.set(timer)
+        with timer.stage("upload"):
+            request.form  # multipart 본문 수신/파싱 (업로드 파일은 여기서 임시 파일로 받는다)
+
+    @app.after_request
+    def _end_request_timer(response):
+        timer = g.get("request_timer")
+        if timer is None:
+            return response
+        # MAX_CONTENT_LENGTH 를 넘은 요청(413)은 본문을 읽을 수 없다
+        profile = request.form.get("profile") if response.status_code != 413 else None
+        timer.profile = profile if profile in profiles else "-"
+        timer.status = response.status_code
+        timer.cache = response.headers.get("X-Result-Cache")
+        if response.status_code >= 400 and response.is_json:
+            timer.error = (response.get_json(silent=True) or {}).get("error")
+        if response.is_streamed and response.content_length is None:
+            response.response = timer.bind(response.response)
+        else:
+            timer.count("bytes_out", response.content_length or 0)
+        timer.send_started = time.perf_counter()
+        if response.direct_passthrough:
+            # send_file 응답은 response.close() 를 거치지 않고 서버가 파일 객체를 바로 닫는다
+            response.response = ClosingIterator(response.response, timer.finish)
+        else:
+            response.call_on_close(timer.finish)
+        return response
+
+    @app.teardown_request
+    def _reset_request_timer(exc):
+        token = g.pop("request_timer_token", None)
+        if token is not None:
+            _current.reset(token)
+
+
+def configure_request_log(target):
+    """구조화 요청 로그 출력: "-" 는 표준 오류, 그 밖의 값은 파일 경로, None/"" 은 끔"""
+    for handler in list(request_log.handlers):
+        request_log.removeHandler(handler)
+    request_log.propagate = False
+    if not target:
+        request_log.setLevel(logging.WARNING)
+        return
+    handler = logging.StreamHandler(sys.stderr) if target == "-" else logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    request_log.addHandler(handler)
+    request_log.setLevel(logging.INFO)
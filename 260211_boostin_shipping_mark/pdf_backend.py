@@ -0,0 +1,315 @@
+"""
+PDF 라이브러리 백엔드
+- 엔진의 페이지 복사 / 오버레이 병합 / 합본 쓰기를 PDF 라이브러리별로 구현하는 인터페이스 (PdfBackend)
+    pypdf4  : PyPDF4 (기본값). engine.PyPDF4Backend - 원본 캐시(ParsedSource)의 파싱된 객체를 그대로 쓴다
+    pikepdf : pikepdf (qpdf C++ 라이브러리). 이 파일의 PikepdfBackend, 설치: uv sync --extra pikepdf
+- 오버레이는 engine.overlay_plan() 이 라이브러리와 무관한 값으로 넘긴다
+  (reportlab 으로 그린 공통 오버레이 PDF, 이미지 XObject 가 든 PDF, 페이지 번호 content stream 앞뒤 바이트)
+- 출력 바이트는 백엔드마다 다르지만 페이지 수·크기·방향과 보이는 내용은 같다 (benchmarks/bench_backends.py 로 확인)
+"""
+
+import io
+import os
+
+import metrics
+from source_cache import check_unchanged
+
+# 오버레이가 출력 PDF에 추가하는 리소스 이름 (원본/오버레이 리소스 이름과 겹치지 않도록 고유하게)
+PAGE_NUM_FONT = "/SMkPageNum"
+PAGE_BODY_XOBJECT = "/SMkPageBody"
+OVERLAY_XOBJECT = "/SMkOverlay"
+
+# 페이지 번호 폰트: reportlab 기본 폰트(Helvetica 12)와 같은 Type1 폰트
+PAGE_NUM_FONT_DICT = {
+    "/Type": "/Font",
+    "/Subtype": "/Type1",
+    "/BaseFont": "/Helvetica",
+    "/Encoding": "/WinAnsiEncoding",
+}
+
+
+class PdfBackend:
+    """
+    백엔드 인터페이스. render() 가 돌려주는 문서 객체는 write(stream) 만 있으면 된다
+    (응답 스트리밍, 결과 캐시, 작업 결과 파일이 모두 write 만 쓴다).
+    render() 의 batches: [{"source": ParsedSource, "reader": source.open() 결과,
+                           "indices": 원본 페이지 인덱스 목록, "plan": engine.overlay_plan() 결과,
+                           "first_number": 첫 페이지의 박스 번호}, ...]
+    """
+
+    name = None
+    parallel = False  # build_shipment 의 배치 병렬 렌더링(프로세스 풀) 지원 여부
+
+    def copy_pages(self, data, indices_for):
+        """PDF 바이트의 페이지를 복사한 PDF 바이트. indices_for(원본 페이지 수) -> 복사할 페이지 인덱스 목록"""
+        raise NotImplementedError
+
+    def overlay_pages(self, data, plan, first_number, output_mode):
+        """PDF 바이트의 모든 페이지에 오버레이를 적용. 반환값: (PDF 바이트, 페이지 수)"""
+        raise NotImplementedError
+
+    def render(self, batches, output_mode, progress=None):
+        """배치들을 복사 + 오버레이해 합본 문서로. 배치마다 progress(완료 배치 수, 완료 페이지 수) 호출"""
+        raise NotImplementedError
+
+
+class PikepdfBackend(PdfBackend):
+    """
+    pikepdf(qpdf) 백엔드.
+    - 공통 오버레이는 Form XObject 하나로 저장해 모든 페이지가 참조한다.
+      merge 모드는 원본 본문을 페이지 content stream 에 그대로 두고, xobject 모드는 본문도 Form XObject 로 저장한다
+      (페이지마다 새로 만드는 객체는 페이지 번호 stream 뿐)
+    - 객체 스트림으로 저장해 페이지 dict 수만 개를 압축한다 (PDF 1.5)
+    """
+
+    name = "pikepdf"
+
+    def copy_pages(self, data, indices_for):
+        import pikepdf
+
+        with metrics.stage("parse"):
+            src = pikepdf.open(io.BytesIO(data))
+        doc = PikepdfDocument()
+        with metrics.stage("copy_pages"):
+            for _, page in doc.copy_pages(src, indices_for(len(src.pages))):
+                doc.append(page)
+        return doc.getvalue()
+
+    def overlay_pages(self, data, plan, first_number, output_mode):
+        import pikepdf
+
+        with metrics.stage("parse"):
+            pdf = pikepdf.open(io.BytesIO(data))
+        doc = PikepdfDocument(pdf)
+        # 복사된 페이지들은 content/리소스 객체를 공유하므로 그 번호로 묶어 템플릿을 재사용
+        pages = [((_objgen(page.get("/Contents"), page), _objgen(page.get("/Resources"), page)), page)
+                 for page in (p.obj for p in pdf.pages)]
+        count = doc.add_pages(pages, plan, first_number, output_mode)
+        return doc.getvalue(), count
+
+    def render(self, batches, output_mode, progress=None):
+        doc = PikepdfDocument()
+        done_pages = 0
+        for b, batch in enumerate(batches):
+            with metrics.stage("parse"):
+                src = _open_source(batch["source"])
+            with metrics.stage("copy_pages"):
+                pages = [((b, key), page) for key, page in doc.copy_pages(src, batch["indices"])]
+            done_pages += doc.add_pages(pages, batch["plan"], batch["first_number"], output_mode)
+            if progress is not None:
+                progress(b + 1, done_pages)
+        return doc
+
+
+def _open_source(source):
+    """
+    ParsedSource -> pikepdf.Pdf
+    파일 원본(mmap 으로 읽은 pdf/ 폴더 파일)은 경로를 넘겨 qpdf 가 직접 읽게 하고 (원본 바이트를 복사하지 않음),
+    메모리 원본(업로드)은 보관한 바이트를 그대로 쓴다
+    """
+    import pikepdf
+
+    file_source = source.file_source()
+    if file_source is None:
+        return pikepdf.open(io.BytesIO(source.data))
+    path, stamp = file_source
+    pdf = pikepdf.open(path)
+    st = os.stat(path)
+    try:
+        check_unchanged(path, stamp, (st.st_mtime_ns, st.st_size))
+    except ValueError:
+        pdf.close()
+        raise
+    return pdf
+
+
+def _objgen(obj, owner):
+    """간접 객체는 (번호, 세대), 페이지 안에 직접 들어 있는 값은 페이지 자신의 번호 (공유되지 않음)"""
+    if obj is not None and obj.is_indirect:
+        return obj.objgen
+    return ("page",) + owner.objgen
+
+
+def _contents_list(page):
+    """페이지 /Contents 를 content stream 목록으로 (없으면 빈 목록)"""
+    import pikepdf
+
+    contents = page.get("/Contents")
+    if contents is None:
+        return []
+    if isinstance(contents, pikepdf.Array):
+        return list(contents)
+    return [contents]
+
+
+class PikepdfDocument:
+    """
+    pikepdf 로 만드는 출력 문서.
+    페이지 트리(/Kids)는 write() 때 한 번에 만든다 (pdf.pages.append 는 추가할 때마다 트리 전체를 확인해 1만 장이면 수십 초)
+    """
+
+    def __init__(self, pdf=None):
+        import pikepdf
+
+        self.pdf = pdf if pdf is not None else pikepdf.new()
+        self._kids = []
+        self._sources = []  # 복사한 원본 문서 (qpdf 는 stream 데이터를 저장할 때 원본에서 읽는다)
+        self._overlays = {}  # 공통 오버레이 PDF 바이트 -> Form XObject
+        self._images = {}    # 이미지 키 -> 이미지 XObject
+        self._font = None
+
+    def copy_pages(self, src, indices):
+        """
+        src 문서의 indices 페이지 사본 [(원본 페이지 인덱스, 페이지 dict)].
+        원본 페이지는 한 번만 가져오고(상속 속성 포함) 사본은 본문/리소스를 공유한다.
+        """
+        import pikepdf
+
+        self._sources.append(src)
+        bases = {}
+        for i in sorted(set(indices)):
+            self.pdf.pages.append(src.pages[i])  # 템플릿용. write() 의 페이지 트리에는 들어가지 않는다
+            bases[i] = {key: value for key, value in self.pdf.pages[-1].obj.items() if key != "/Parent"}
+        return [(i, self.pdf.make_indirect(pikepdf.Dictionary(bases[i]))) for i in indices]
+
+    def append(self, page):
+        page.Parent = self.pdf.Root.Pages
+        self._kids.append(page)
+
+    def add_pages(self, pages, plan, first_number, output_mode):
+        """
+        pages [(템플릿 키, 페이지 dict)] 에 오버레이를 적용해 문서 끝에 추가. 반환값: 추가한 페이지 수
+        템플릿 키가 같은 페이지는 본문/리소스가 같아야 한다 (오버레이를 합친 본문/리소스를 한 번만 만들어 공유)
+        """
+        import pikepdf
+
+        with metrics.stage("overlay"):
+            overlay = self._overlay_form(plan["overlay_pdf"])
+            images = {name: self._image(key, data) for name, key, data in plan["images"]}
+            font = self._page_number_font()
+        number = plan["number"]
+        templates = {}
+
+        count = 0
+        with metrics.stage("merge"):
+            for key, page in pages:
+                if key not in templates:
+                    if output_mode == "xobject":
+                        templates[key] = self._xobject_template(page, overlay, images, font, plan["image_ops"])
+                    else:
+                        templates[key] = self._merge_template(page, overlay, images, font, plan["image_ops"])
+                contents, resources = templates[key]
+                if number is not None:
+                    contents = contents + [self.pdf.make_stream(
+                        number[0] + str(first_number + count).encode("latin-1") + number[1])]
+                page.Contents = pikepdf.Array(contents)
+                page.Resources = resources
+                self.append(page)
+                count += 1
+        metrics.count("pages", count)
+        return count
+
+    def _overlay_form(self, overlay_pdf):
+        import pikepdf
+
+        form = self._overlays.get(overlay_pdf)
+        if form is None:
+            src = pikepdf.open(io.BytesIO(overlay_pdf))
+            self._sources.append(src)
+            form = self.pdf.copy_foreign(src.pages[0].as_form_xobject(handle_transformations=False))
+            self._overlays[overlay_pdf] = form
+        return form
+
+    def _image(self, key, data):
+        """이미지 XObject (문서 전체에서 하나를 공유)"""
+        import pikepdf
+
+        image = self._images.get(key)
+        if image is None:
+            src = pikepdf.open(io.BytesIO(data))
+            self._sources.append(src)
+            image = self.pdf.copy_foreign(next(iter(src.pages[0].obj.Resources.XObject.values())))
+            self._images[key] = image
+        return image
+
+    def _page_number_font(self):
+        import pikepdf
+
+        if self._font is None:
+            self._font = self.pdf.make_indirect(pikepdf.Dictionary(
+                {key: pikepdf.Name(value) for key, value in PAGE_NUM_FONT_DICT.items()}))
+        return self._font
+
+    def _merge_template(self, page, overlay, images, font, image_ops):
+        """[merge 모드] q + 원본 본문 + Q + 공통 오버레이/이미지 그리기. 리소스는 원본 리소스에 이름을 더한 사본"""
+        import pikepdf
+
+        resources = pikepdf.Dictionary(page.get("/Resources", pikepdf.Dictionary()))
+        xobjects = pikepdf.Dictionary(resources.get("/XObject", pikepdf.Dictionary()))
+        xobjects[OVERLAY_XOBJECT] = overlay
+        for name, image in images.items():
+            xobjects[name] = image
+        fonts = pikepdf.Dictionary(resources.get("/Font", pikepdf.Dictionary()))
+        fonts[PAGE_NUM_FONT] = font
+        resources.XObject = xobjects
+        resources.Font = fonts
+
+        body = _contents_list(page)
+        head = self.pdf.make_stream(b"q\n")
+        tail = self.pdf.make_stream(f"Q\nq {OVERLAY_XOBJECT} Do Q\n".encode("latin-1") + image_ops)
+        return [head] + body + [tail], self.pdf.make_indirect(resources)
+
+    def _xobject_template(self, page, overlay, images, font, image_ops):
+        """[xobject 모드] 원본 본문을 Form XObject로 한 번만 저장하고 본문 -> 공통 오버레이 -> 이미지 순서로 그린다"""
+        import pikepdf
+
+        # 페이지 /Contents 를 바로 바꾸므로 qpdf 의 as_form_xobject(저장 시 페이지에서 다시 읽음) 대신 바이트를 복사
+        body = self.pdf.make_stream(b"\n".join(c.read_bytes() for c in _contents_list(page)))
+        body.Type = pikepdf.Name.XObject
+        body.Subtype = pikepdf.Name.Form
+        body.BBox = page.MediaBox
+        body.Resources = page.get("/Resources", pikepdf.Dictionary())
+        draw = self.pdf.make_stream(
+            f"q {PAGE_BODY_XOBJECT} Do Q q {OVERLAY_XOBJECT} Do Q\n".encode("latin-1") + image_ops)
+        xobjects = pikepdf.Dictionary({PAGE_BODY_XOBJECT: body, OVERLAY_XOBJECT: overlay})
+        for name, image in images.items():
+            xobjects[name] = image
+        resources = pikepdf.Dictionary({
+            "/XObject": xobjects,
+            "/Font": pikepdf.Dictionary({PAGE_NUM_FONT: font}),
+            "/ProcSet": pikepdf.Array([pikepdf.Name.PDF, pikepdf.Name.Text]),
+        })
+        return [draw], self.pdf.make_indirect(resources)
+
+    def write(self, stream):
+        import pikepdf
+
+        pages = self.pdf.Root.Pages
+        pages.Kids = pikepdf.Array(self._kids)
+        pages.Count = len(self._kids)
+        if not hasattr(stream, "seek"):
+            stream = _SequentialStream(stream)  # pikepdf 는 seek 없는 대상을 파일 경로로 취급
+        self.pdf.save(stream, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+    def getvalue(self):
+        buf = io.BytesIO()
+        self.write(buf)
+        return buf.getvalue()
+
+
+class _SequentialStream:
+    """seek 없는 출력 대상(응답 스트리밍의 청크 sink 등)을 pikepdf 에 넘기는 래퍼 (qpdf 는 앞에서부터 순서대로만 쓴다)"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, data):
+        self._stream.write(data)
+        return len(data)
+
+    def flush(self):
+        if hasattr(self._stream, "flush"):
+            self._stream.flush()
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("seek")
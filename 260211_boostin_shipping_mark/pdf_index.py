@@ -0,0 +1,171 @@
+"""
+pdf/ 폴더 색인
+- 파일 이름, 크기, 수정 시각, 페이지 수, 첫 페이지 크기(pt)와 방향을 백그라운드에서 유지
+- 주기적으로 폴더를 훑어(os.scandir) 새로 생기거나 바뀐 파일만 다시 읽고, 지워진 파일은 뺀다
+  (외부 감시 라이브러리 없이 Windows/Linux 공통으로 동작)
+- 목록이 바뀔 때마다 version 이 올라가며, 응답 JSON 은 version 별로 한 번만 만든다 (ETag 로 사용)
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+import uuid
+
+import metrics
+
+# 폴더 확인에 걸린 시간의 이 배수보다 자주 확인하지 않음 (파일 수만 개일 때 CPU 사용 제한)
+SCAN_INTERVAL_FACTOR = 20
+
+# 메타데이터를 읽는 동안 이 간격(초)마다 version 을 올려 UI 가 중간 결과를 볼 수 있게 함
+PROBE_BATCH_SECONDS = 0.5
+
+
+def probe_pdf(path):
+    """페이지 수와 첫 페이지 크기 읽기 (페이지 내용은 파싱하지 않음)"""
+    from PyPDF4 import PdfFileReader
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {"error": "빈 파일"}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            reader = PdfFileReader(view, strict=False)
+            pages = reader.getNumPages()
+            box = reader.getPage(0).mediaBox
+            width, height = float(box.getWidth()), float(box.getHeight())
+            rotate = reader.getPage(0).get("/Rotate", 0) or 0
+    if int(rotate) % 180:
+        width, height = height, width
+    return {
+        "pages": pages,
+        "width": round(width, 1),
+        "height": round(height, 1),
+        "orientation": "landscape" if width > height else "portrait",
+    }
+
+
+class PdfIndex:
+    """
+    폴더 색인 (스레드 안전).
+    refresh(): 폴더 목록만 빠르게 갱신 (새 파일은 pages=None 으로 먼저 보임)
+    start() 후 백그라운드 스레드가 poll_seconds 마다 refresh() 하고, 새로 생기거나 바뀐 파일의 메타데이터를 읽는다
+    """
+
+    def __init__(self, root, poll_seconds=2.0):
+        self.root = root
+        self.poll_seconds = poll_seconds
+        self._entries = {}  # name -> {"name", "size", "mtime", "pages", "width", "height", "orientation", "error"}
+        self._stamps = {}   # name -> 메타데이터를 읽은 시점의 (mtime_ns, size)
+        self._pending = {}  # name -> 아직 메타데이터를 읽지 않은 (mtime_ns, size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._boot = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._body = None   # (version, JSON bytes)
+        self._thread = None
+        self.scans = 0
+        self.probes = 0
+        self.scan_seconds = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pdf-index", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+                self._probe_pending()
+            except Exception:
+                metrics.record_exception("pdf_index")
+            self._wake.wait(max(self.poll_seconds, self.scan_seconds * SCAN_INTERVAL_FACTOR))
+            self._wake.clear()
+
+    def refresh(self):
+        """폴더를 한 번 훑어 목록 갱신 (파일 내용은 읽지 않음). 바뀐 파일이 있으면 True"""
+        started = time.perf_counter()
+        current = {}
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.lower().endswith(".pdf") and entry.is_file():
+                    st = entry.stat()
+                    current[entry.name] = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            self.scans += 1
+            self.scan_seconds = time.perf_counter() - started
+            removed = [name for name in self._entries if name not in current]
+            changed = [name for name, stamp in current.items()
+                       if self._pending.get(name, self._stamps.get(name)) != stamp]
+            for name in removed:
+                self._stamps.pop(name, None)
+                self._pending.pop(name, None)
+                del self._entries[name]
+            for name in changed:
+                mtime_ns, size = current[name]
+                self._entries[name] = {"name": name, "size": size, "mtime": mtime_ns // 1_000_000_000,
+                                       "pages": None, "width": None, "height": None,
+                                       "orientation": None, "error": None}
+                self._pending[name] = current[name]
+            if removed or changed:
+                self.version += 1
+        if changed:
+            self._wake.set()
+        return bool(removed or changed)
+
+    def _probe_pending(self):
+        batch_started = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+                name = min(self._pending)
+                stamp = self._pending[name]
+            try:
+                meta = probe_pdf(os.path.join(self.root, name))
+            except FileNotFoundError:
+                meta = None  # 읽기 전에 지워짐 - 다음 refresh 에서 빠짐
+            except Exception as e:
+                meta = {"error": f"PDF를 읽을 수 없습니다: {e}"}
+            with self._lock:
+                self.probes += 1
+                if self._pending.get(name) == stamp:  # 읽는 동안 다시 바뀌지 않았으면 반영
+                    del self._pending[name]
+                    if meta is not None:
+                        self._entries[name].update(meta)
+                        self._stamps[name] = stamp
+                if time.monotonic() - batch_started > PROBE_BATCH_SECONDS or not self._pending:
+                    self.version += 1
+                    batch_started = time.monotonic()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            return dict(entry) if entry else None
+
+    def listing(self):
+        """(ETag, 이름순 목록 JSON bytes). 같은 version 이면 다시 직렬화하지 않는다"""
+        with self._lock:
+            if self._body is None or self._body[0] != self.version:
+                entries = [self._entries[name] for name in sorted(self._entries)]
+                self._body = (self.version, json.dumps(entries, ensure_ascii=False).encode("utf-8"))
+            return f"{self._boot}-{self._body[0]}", self._body[1]
+
+    def recent(self, count):
+        """최근 수정된 파일 이름 count 개 (사전 준비용)"""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e["mtime"], reverse=True)
+            return [e["name"] for e in entries[:count]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "pending": len(self._pending),
+                "version": self.version,
+                "scans": self.scans,
+                "scan_seconds": round(self.scan_seconds, 4),
+                "probes": self.probes,
+            }
@@ -0,0 +1,347 @@
+"""
+국가별 Shipping Mark 프로필 저장소
+- 프로필(페이지 크기, 주소 방식, 좌표 기본값, 오버레이 레이아웃)과 선택 주소 목록: profiles.json
+- 현장 설정(프리셋): 현장 설정/ 폴더 아래 *.json (파일 이름 = 설정 이름, 요청에서 preset=이름 으로 고른다)
+    {"name": "표시 이름", "profile": "brazil", "description": "...", "values": {"page_num_y": 52, ...}}
+- 파일을 읽어 검증한 뒤 바꿀 수 없는 스냅샷으로 보관하고 /api/profiles 등의 응답 JSON 과 ETag 를 미리 만들어 둔다
+- 파일이 바뀌면(수정 시각/크기/파일 목록) 다음 조회 때 다시 읽는다 (RELOAD_SECONDS 마다 확인, 서버 재시작 불필요).
+  고친 파일이 잘못되었으면 이전 스냅샷을 계속 쓰고 오류를 status() (/api/health) 로 알린다
+- PDF 라이브러리 없이 불러올 수 있다 (웹앱 첫 화면/프로필 API가 사용)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_FILE = os.path.join(BASE_DIR, "profiles.json")
+PRESET_DIR = os.path.join(BASE_DIR, "현장 설정")
+RELOAD_SECONDS = 2.0  # 파일 변경 확인 간격 (이 간격 안의 조회는 stat 없이 현재 스냅샷을 쓴다)
+
+
+class ProfileError(ValueError):
+    """profiles.json / 현장 설정 파일 형식 오류 (메시지에 파일과 위치 포함)"""
+
+
+# ─── 검증 ────────────────────────────────────────────────────────────
+# 레이아웃 요소 종류별 좌표 키 -> 좌표 파라미터 접미사 (profiles.json 의 "_설명" 참고)
+ELEMENT_COORDS = {
+    "hide_rect": {"rect": "xywh"},
+    "text": {"pos": "xy"},
+    "image": {"box": "xywh"},
+    "counter": {"pos": "xy"},
+}
+ELEMENT_KEYS = {"type", "layer", "field", "skip", "format", "rect", "pos", "box", "file", "gap"}
+PAGESIZES = ("letter", "landscape_letter")
+ADDRESS_TYPES = ("fixed", "selectable")
+EXTRA_FIELDS = ("consignee", "registration", "product_name", "batch_number", "box_text", "barcode")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _public(data):
+    """'_' 로 시작하는 설명용 키를 뺀 dict"""
+    return {k: v for k, v in data.items() if not k.startswith("_")}
+
+
+def _check_element(where, element, defaults):
+    """레이아웃 요소 1개 검증 -> 요소가 읽는 파라미터 이름 목록"""
+    if not isinstance(element, dict):
+        raise ProfileError(f"{where}: 레이아웃 요소는 객체여야 합니다")
+    element = _public(element)
+    kind = element.get("type")
+    if kind not in ELEMENT_COORDS:
+        raise ProfileError(f"{where}: 알 수 없는 레이아웃 요소 type: {kind}")
+    unknown = set(element) - ELEMENT_KEYS
+    if unknown:
+        raise ProfileError(f"{where}: 알 수 없는 키 {sorted(unknown)}")
+    required = ["layer", *ELEMENT_COORDS[kind]] + {"image": ["file"], "counter": ["gap"]}.get(kind, [])
+    for key in required + [k for k in ("field", "skip", "format") if k in element]:
+        if not isinstance(element.get(key), str) or not element[key]:
+            raise ProfileError(f"{where}: {kind} 요소에 {key} (문자열)이 필요합니다")
+
+    names = [element[k] for k in ("field", "skip") if k in element]
+    numbers = [f"{element[k]}_{suffix}" for k, suffixes in ELEMENT_COORDS[kind].items() for suffix in suffixes]
+    if kind == "counter":
+        numbers.append(element["gap"])
+    for name in numbers:
+        if not _is_number(defaults.get(name)):
+            raise ProfileError(f"{where}: defaults 에 숫자 {name} 이(가) 없습니다")
+    return names + numbers
+
+
+def _compile_profile(key, data, layouts):
+    """프로필 1개 검증, layout 의 묶음 이름을 요소 목록으로 펼침 -> (프로필 dict, 입력 가능한 파라미터 이름 set)"""
+    where = f"profiles.{key}"
+    if not isinstance(data, dict):
+        raise ProfileError(f"{where}: 프로필은 객체여야 합니다")
+    profile = _public(data)
+    for field in ("name", "description"):
+        if not isinstance(profile.get(field), str):
+            raise ProfileError(f"{where}.{field}: 문자열이 필요합니다")
+    if profile.get("pagesize") not in PAGESIZES:
+        raise ProfileError(f"{where}.pagesize: {' / '.join(PAGESIZES)} 중 하나여야 합니다")
+    if profile.get("address_type") not in ADDRESS_TYPES:
+        raise ProfileError(f"{where}.address_type: {' / '.join(ADDRESS_TYPES)} 중 하나여야 합니다")
+    if profile["address_type"] == "fixed" and not isinstance(profile.get("fixed_address"), str):
+        raise ProfileError(f"{where}.fixed_address: fixed 주소 방식은 고정 주소가 필요합니다")
+    defaults = profile.get("defaults")
+    if not isinstance(defaults, dict):
+        raise ProfileError(f"{where}.defaults: 객체여야 합니다")
+    defaults = profile["defaults"] = _public(defaults)
+    for name, value in defaults.items():
+        if not (_is_number(value) or isinstance(value, str)):
+            raise ProfileError(f"{where}.defaults.{name}: 숫자나 문자열이어야 합니다")
+    extra = profile.get("extra_fields")
+    if not isinstance(extra, list) or any(field not in EXTRA_FIELDS for field in extra):
+        raise ProfileError(f"{where}.extra_fields: {', '.join(EXTRA_FIELDS)} 중에서 고른 목록이어야 합니다")
+
+    if not isinstance(profile.get("layout"), list) or not profile["layout"]:
+        raise ProfileError(f"{where}.layout: 레이아웃 묶음 이름이나 요소 목록이 필요합니다")
+    elements = []
+    for i, item in enumerate(profile["layout"]):
+        if isinstance(item, str):
+            if item not in layouts:
+                raise ProfileError(f"{where}.layout[{i}]: layouts 에 없는 묶음 {item}")
+            elements += layouts[item]
+        else:
+            elements.append(item)
+    params = set(defaults)
+    for i, element in enumerate(elements):
+        params.update(_check_element(f"{where}.layout[{i}]", element, defaults))
+    profile["layout"] = [_public(element) for element in elements]
+    if profile["address_type"] == "fixed":
+        params.add("address")
+    return profile, params
+
+
+def _check_addresses(addresses):
+    if not isinstance(addresses, list):
+        raise ProfileError("addresses: 목록이어야 합니다")
+    for i, item in enumerate(addresses):
+        if not isinstance(item, dict) or not all(isinstance(item.get(k), str) for k in ("label", "value")):
+            raise ProfileError(f"addresses[{i}]: label, value (문자열)이 필요합니다")
+    return [_public(item) for item in addresses]
+
+
+def _compile_preset(path, data, profiles, params):
+    """현장 설정 파일 1개 검증 -> 설정 dict (values 는 프로필이 읽는 파라미터만 허용)"""
+    if not isinstance(data, dict):
+        raise ProfileError(f"{path}: 현장 설정은 객체여야 합니다")
+    preset = _public(data)
+    profile_key = preset.get("profile")
+    if profile_key not in profiles:
+        raise ProfileError(f"{path}: 알 수 없는 프로필 {profile_key}")
+    if not isinstance(preset.get("name"), str) or not isinstance(preset.get("description", ""), str):
+        raise ProfileError(f"{path}: name (문자열)이 필요합니다")
+    values = preset.get("values")
+    if not isinstance(values, dict):
+        raise ProfileError(f"{path}: values 객체가 필요합니다")
+    values = _public(values)
+    defaults = profiles[profile_key]["defaults"]
+    for name, value in values.items():
+        if name not in params[profile_key]:
+            raise ProfileError(f"{path}: {profile_key} 프로필에 없는 값 {name}")
+        if _is_number(defaults.get(name)) and not _is_number(value):
+            raise ProfileError(f"{path}: {name} 은(는) 숫자여야 합니다")
+    return {"name": preset["name"], "profile": profile_key,
+            "description": preset.get("description", ""), "values": values}
+
+
+# ─── 스냅샷 ──────────────────────────────────────────────────────────
+
+def _freeze(value):
+    """dict -> 읽기 전용 MappingProxyType, list -> tuple (재귀)"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _document(data):
+    """응답용 JSON -> (ETag, 본문 bytes)"""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:32], body
+
+
+class ProfileSnapshot:
+    """
+    한 번 읽어 검증한 프로필/주소 목록/현장 설정 (바꿀 수 없음).
+    documents: {"profiles" | "addresses" | "presets": (ETag, JSON 본문 bytes)}
+    digests: 프로필 키 -> 프로필 정의의 sha256 (결과 캐시 키, 미리보기 레이어 키에 사용)
+    """
+
+    def __init__(self, profiles, addresses, presets, revision=1, stamp=()):
+        self.documents = MappingProxyType({
+            "profiles": _document(profiles),
+            "addresses": _document(addresses),
+            "presets": _document(presets),
+        })
+        self.digests = MappingProxyType({
+            key: hashlib.sha256(json.dumps(profile, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+            for key, profile in profiles.items()
+        })
+        self.profiles = _freeze(profiles)
+        self.addresses = _freeze(addresses)
+        self.presets = _freeze(presets)
+        self.revision = revision
+        self.stamp = stamp
+        self.loaded_at = time.time()
+
+
+def load_snapshot(profile_file=PROFILE_FILE, preset_dir=PRESET_DIR, revision=1, stamp=()):
+    """파일을 읽어 검증 -> ProfileSnapshot (잘못된 내용이면 ProfileError)"""
+    try:
+        with open(profile_file, encoding="utf-8") as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ProfileError(f"{os.path.basename(profile_file)}: JSON 형식 오류 ({e})")
+    if not isinstance(data, dict) or not isinstance(data.get("profiles"), dict) or not data["profiles"]:
+        raise ProfileError(f"{os.path.basename(profile_file)}: profiles 객체가 필요합니다")
+    layouts = data.get("layouts", {})
+    if not isinstance(layouts, dict) or not all(isinstance(v, list) for v in layouts.values()):
+        raise ProfileError("layouts: 묶음 이름 -> 요소 목록 객체여야 합니다")
+
+    profiles, params = {}, {}
+    for key, profile in _public(data["profiles"]).items():
+        profiles[key], params[key] = _compile_profile(key, profile, layouts)
+    addresses = _check_addresses(data.get("addresses", []))
+
+    presets = {}
+    for path in _preset_files(preset_dir):
+        name = os.path.splitext(os.path.basename(path))[0]
+        rel = os.path.relpath(path, preset_dir)
+        if name in presets:
+            raise ProfileError(f"{rel}: 같은 이름의 현장 설정이 이미 있습니다 ({presets[name]['file']})")
+        try:
+            with open(path, encoding="utf-8") as f:
+                preset = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ProfileError(f"{rel}: JSON 형식 오류 ({e})")
+        presets[name] = dict(_compile_preset(rel, preset, profiles, params), file=rel)
+    return ProfileSnapshot(profiles, addresses, presets, revision, stamp)
+
+
+def _preset_files(preset_dir):
+    """현장 설정 폴더 아래 *.json 경로 (하위 폴더 포함, 정렬)"""
+    paths = []
+    for root, _, files in os.walk(preset_dir):
+        paths += [os.path.join(root, name) for name in files if name.lower().endswith(".json")]
+    return sorted(paths)
+
+
+# ─── 저장소 ──────────────────────────────────────────────────────────
+
+class ProfileStore:
+    """파일 -> 현재 ProfileSnapshot (변경 시 다시 읽음, 스레드 안전)"""
+
+    def __init__(self, profile_file=PROFILE_FILE, preset_dir=PRESET_DIR, reload_seconds=RELOAD_SECONDS):
+        self.profile_file = profile_file
+        self.preset_dir = preset_dir
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        stamp = self._stamp()
+        self._snapshot = load_snapshot(profile_file, preset_dir, 1, stamp)  # 처음 읽기 실패는 그대로 예외
+        self._checked_at = time.monotonic()
+        self.reloads = 0
+        self.error = None  # 마지막으로 다시 읽기에 실패한 이유 (성공하면 None)
+
+    def _stamp(self):
+        """변경 감지용 (경로, 수정 시각, 크기) 목록"""
+        stamp = []
+        for path in [self.profile_file] + _preset_files(self.preset_dir):
+            try:
+                st = os.stat(path)
+                stamp.append((path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append((path, None, None))
+        return tuple(stamp)
+
+    def current(self):
+        """현재 스냅샷 (reload_seconds 가 지났으면 파일 변경 여부를 확인하고 바뀌었으면 다시 읽음)"""
+        if time.monotonic() - self._checked_at < self.reload_seconds:
+            return self._snapshot
+        return self.reload()
+
+    def reload(self, force=False):
+        """파일이 바뀌었으면(force 면 항상) 다시 읽어 검증 -> 현재 스냅샷. 실패하면 이전 스냅샷 유지"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            stamp = self._stamp()
+            if not force and stamp == self._snapshot.stamp:
+                return self._snapshot
+            try:
+                self._snapshot = load_snapshot(self.profile_file, self.preset_dir,
+                                               self._snapshot.revision + 1, stamp)
+                self.reloads += 1
+                self.error = None
+            except (OSError, ProfileError) as e:
+                if self.error != str(e):
+                    print(f"프로필 다시 읽기 실패 (이전 설정 유지): {e}")
+                self.error = str(e)
+            return self._snapshot
+
+    def status(self):
+        """상태 확인용 (/api/health)"""
+        snapshot = self.current()
+        return {
+            "revision": snapshot.revision,
+            "loaded_at": snapshot.loaded_at,
+            "profiles": len(snapshot.profiles),
+            "presets": len(snapshot.presets),
+            "reloads": self.reloads,
+            "error": self.error,
+        }
+
+
+store = ProfileStore()
+
+
+class _CurrentProfiles(Mapping):
+    """store 의 현재 스냅샷 프로필을 가리키는 읽기 전용 dict (파일을 고치면 다음 조회부터 반영)"""
+
+    def __getitem__(self, key):
+        return store.current().profiles[key]
+
+    def __iter__(self):
+        return iter(store.current().profiles)
+
+    def __len__(self):
+        return len(store.current().profiles)
+
+    def __contains__(self, key):
+        return key in store.current().profiles
+
+
+COUNTRY_PROFILES = _CurrentProfiles()
+
+
+def profile_digest(profile_key):
+    """프로필 정의의 sha256 (profiles.json 에서 이 프로필이 바뀌면 값이 바뀐다)"""
+    return store.current().digests[profile_key]
+
+
+def apply_preset(profile_key, options):
+    """
+    options 의 "preset" (현장 설정 이름) 적용 -> (프로필 키, 입력값 dict).
+    현장 설정 값은 options 에 없거나 빈 값만 채운다 (요청에 직접 넣은 값이 우선).
+    profile_key 가 비었으면 현장 설정의 프로필을 쓰고, 다른 프로필이면 ValueError
+    """
+    name = options.get("preset")
+    if not name:
+        return profile_key, options
+    preset = store.current().presets.get(name)
+    if preset is None:
+        raise ValueError(f"알 수 없는 현장 설정: {name}")
+    if profile_key and profile_key != preset["profile"]:
+        raise ValueError(f"현장 설정 {name} 은(는) {preset['profile']} 프로필용입니다 (선택한 프로필: {profile_key})")
+    merged = dict(preset["values"])
+    merged.update((k, v) for k, v in options.items() if v is not None and v != "")
+    return preset["profile"], merged
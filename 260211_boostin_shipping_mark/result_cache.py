@@ -0,0 +1,179 @@
+"""
+생성 결과 PDF 디스크 캐시
+- 키: engine.shipment_cache_key(spec) (원본 PDF 내용 + 프로필 + 입력값 해시)
+- 같은 출고를 다시 생성하면(프린터 걸림 후 재출력, 재다운로드) PDF 작업 없이 저장된 파일을 보낸다
+- 용량(max_bytes)을 넘으면 가장 오래 안 쓴 파일부터 삭제 (LRU, 파일 수정 시각으로 순서 유지 → 재시작 후에도 이어짐)
+- 적중/실패/저장/제거 횟수 통계 제공 (touch() 존재 확인은 적중/실패로 세지 않음)
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """key -> root/<key>.pdf (스레드 안전)"""
+
+    def __init__(self, root, max_bytes=1024 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> 파일 크기 (오래 안 쓴 순)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        os.makedirs(root, exist_ok=True)
+        found = []
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf"):
+                    st = entry.stat()
+                    found.append((st.st_mtime_ns, entry.name[:-4], st.st_size))
+                elif entry.name.endswith(".part"):
+                    _remove_file(entry.path)  # 이전 실행에서 쓰다 만 파일
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.root, key + ".pdf")
+
+    def open(self, key):
+        """저장된 결과 파일 객체 (없으면 None). 연 상태로 넘기므로 보내는 중에 제거되어도 안전하다"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                f = open(self._path(key), "rb")
+            except FileNotFoundError:
+                self._bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(self._path(key))  # 재시작 후에도 LRU 순서 유지
+        except OSError:
+            pass
+        return f
+
+    def touch(self, key):
+        """저장된 결과 파일 크기 (없으면 None). 적중/실패로 세지 않고 최근 사용으로만 표시한다 (존재 확인용)"""
+        with self._lock:
+            size = self._entries.get(key)
+            if size is None:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            with self._lock:
+                if key in self._entries:
+                    self._bytes -= self._entries.pop(key)
+            return None
+        except OSError:
+            pass
+        return size
+
+    def tee(self, key, chunks):
+        """
+        chunks 를 그대로 내보내면서 결과 파일로 저장하는 제너레이터.
+        끝까지 전송된 경우에만 캐시에 넣는다 (중간에 끊기거나 오류가 나면 임시 파일 삭제).
+        """
+        if self.max_bytes <= 0:
+            yield from chunks
+            return
+        fd, tmp = tempfile.mkstemp(suffix=".part", dir=self.root)
+        completed = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()  # 전송이 끊기면 원본 제너레이터(쓰기 스레드)도 멈춘다
+            if completed:
+                self._commit(key, tmp)
+            else:
+                _remove_file(tmp)
+
+    def put(self, key, data):
+        """결과 PDF 바이트 저장"""
+        for _ in self.tee(key, [data]):
+            pass
+
+    def put_file(self, key, path):
+        """결과 PDF 파일을 복사해 저장 (백그라운드 작업 결과 - 원본 파일은 그대로 둔다)"""
+        if self.max_bytes <= 0 or os.path.getsize(path) > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(suffix=".part", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as dst, open(path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+        except BaseException:
+            _remove_file(tmp)
+            raise
+        self._commit(key, tmp)
+
+    def _commit(self, key, tmp):
+        size = os.path.getsize(tmp)
+        if size > self.max_bytes:
+            _remove_file(tmp)
+            return
+        try:
+            os.replace(tmp, self._path(key))
+        except OSError:
+            _remove_file(tmp)  # Windows: 같은 결과를 보내는 중이라 열려 있음 - 기존 파일 유지
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._bytes += size
+            self.stores += 1
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            _remove_file(self._path(key))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                _remove_file(self._path(key))
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # 이미 없거나, Windows 에서 전송 중이라 열려 있음 (다음 시작 때 용량 계산에서 다시 정리)
@@ -0,0 +1,166 @@
+"""
+운영 모드 서버 실행
+- waitress(순수 Python, Windows/Linux 공통) 사용 - 의존성에 포함되어 `uv sync`로 설치된다
+- waitress 를 불러올 수 없으면 werkzeug 스레드 서버로 대체
+  (threads / connection_limit / channel_timeout 은 적용되지 않으므로 경고를 남긴다)
+- 종료 신호(Ctrl+C, Ctrl+Break, SIGTERM)를 받으면 새 연결을 받지 않고,
+  처리 중인 요청이 끝날 때까지(최대 shutdown_timeout 초) 기다린 뒤 종료
+
+설정 (app.py 의 app.config 또는 실행 옵션)
+  threads           요청 처리 스레드 수
+  connection_limit  동시에 받는 연결 수. 넘는 연결은 OS 대기열(backlog)에서 기다린다
+  backlog           OS 대기열 길이. 대기열도 차면 새 연결은 거부된다
+  channel_timeout   응답 없는 연결을 닫기까지의 시간(초)
+"""
+
+import importlib.util
+import signal
+import sys
+import threading
+import time
+
+# 서버 상태 (/api/health 에서 표시)
+server_state = {"server": None, "active": 0, "stopping": False}
+
+
+class RequestTracker:
+    """
+    처리 중인 요청 수를 세는 WSGI 미들웨어.
+    응답 본문을 끝까지 보낸 뒤(close) 완료로 본다. 종료 중에는 새 요청에 503을 돌려준다.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.lock = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            if server_state["stopping"]:
+                start_response("503 Service Unavailable", [("Content-Type", "text/plain; charset=utf-8"),
+                                                           ("Connection", "close"), ("Retry-After", "5")])
+                return [b"server is shutting down"]
+            server_state["active"] += 1
+        try:
+            result = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self._finish()
+            raise
+        return _ClosingIterator(result, self._finish)
+
+    def _finish(self):
+        with self.lock:
+            server_state["active"] -= 1
+            self.lock.notify_all()
+
+    def wait_idle(self, deadline):
+        """처리 중인 요청이 없어질 때까지 대기 (deadline: time.monotonic 기준). 남은 요청 수 반환"""
+        with self.lock:
+            while server_state["active"] and time.monotonic() < deadline:
+                self.lock.wait(min(0.1, max(deadline - time.monotonic(), 0)))
+            return server_state["active"]
+
+
+class _ClosingIterator:
+    """응답 iterable 의 close() 뒤에 콜백 호출 (스트리밍 응답도 끝까지 보낸 시점에 완료 처리)"""
+
+    def __init__(self, iterable, callback):
+        self.iterable = iterable
+        self.callback = callback
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        try:
+            if hasattr(self.iterable, "close"):
+                self.iterable.close()
+        finally:
+            self.callback()
+
+
+def install_shutdown_handler(stop):
+    """종료 신호를 받으면 stop() 을 별도 스레드에서 한 번만 실행"""
+    def handler(signum, frame):
+        if not server_state["stopping"]:
+            server_state["stopping"] = True
+            print("종료 신호를 받았습니다. 처리 중인 요청을 마친 뒤 종료합니다...", file=sys.stderr)
+            threading.Thread(target=stop, name="shutdown", daemon=True).start()
+
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):  # SIGBREAK: Windows Ctrl+Break
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handler)
+
+
+def serve(app, host, port, threads=4, connection_limit=32, backlog=64, channel_timeout=120,
+          shutdown_timeout=30, backend="auto", on_start=None):
+    """
+    운영 모드로 app 을 실행 (반환: 종료 시 남아 있던 요청 수)
+    on_start: 소켓을 연 직후 호출 (사전 준비 스레드 시작 등)
+    """
+    if backend == "auto":
+        backend = "waitress" if importlib.util.find_spec("waitress") else "werkzeug"
+
+    tracker = RequestTracker(app.wsgi_app)
+    app.wsgi_app = tracker
+    server_state["server"] = backend
+
+    if backend == "waitress":
+        return _serve_waitress(app, tracker, host, port, threads, connection_limit, backlog,
+                               channel_timeout, shutdown_timeout, on_start)
+    ignored = {"threads": threads, "connection_limit": connection_limit, "channel_timeout": channel_timeout}
+    return _serve_werkzeug(app, tracker, host, port, backlog, shutdown_timeout, on_start, ignored)
+
+
+def _serve_waitress(app, tracker, host, port, threads, connection_limit, backlog,
+                    channel_timeout, shutdown_timeout, on_start):
+    from waitress.server import create_server
+    from waitress import wasyncore
+
+    server = create_server(app, host=host, port=port, threads=threads, connection_limit=connection_limit,
+                           backlog=backlog, channel_timeout=channel_timeout, ident="shipping-mark")
+    remaining = []
+
+    def stop():
+        # 1) 듣기 소켓만 닫아 새 연결을 받지 않음 (이벤트 루프 스레드에서 실행)
+        server.trigger.pull_trigger(lambda: wasyncore.dispatcher.close(server))
+        # 2) 처리 중인 요청과 아직 보내지 못한 응답 바이트가 없어질 때까지 대기
+        deadline = time.monotonic() + shutdown_timeout
+        remaining.append(tracker.wait_idle(deadline))
+        while time.monotonic() < deadline and any(
+                getattr(channel, "total_outbufs_len", 0) for channel in list(server._map.values())):
+            time.sleep(0.05)
+        # 3) 남은 연결을 모두 닫으면 이벤트 루프가 끝난다
+        server.trigger.pull_trigger(lambda: wasyncore.close_all(server._map))
+
+    install_shutdown_handler(stop)
+    print(f"waitress: 스레드 {threads}, 동시 연결 {connection_limit}, 대기열 {backlog}", file=sys.stderr)
+    if on_start:
+        on_start()
+    server.run()
+    server.task_dispatcher.shutdown(timeout=1)
+    return remaining[0] if remaining else 0
+
+
+def _serve_werkzeug(app, tracker, host, port, backlog, shutdown_timeout, on_start, ignored):
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, app, threaded=True)
+    server.socket.listen(backlog)
+    remaining = []
+
+    def stop():
+        server.shutdown()  # serve_forever 종료 (새 연결을 받지 않음)
+        remaining.append(tracker.wait_idle(time.monotonic() + shutdown_timeout))
+
+    install_shutdown_handler(stop)
+    print("werkzeug 스레드 서버로 실행합니다", file=sys.stderr)
+    settings = ", ".join(f"{name}={value}" for name, value in ignored.items())
+    print(f"경고: werkzeug 서버는 {settings} 설정을 적용하지 않습니다 "
+          f"(요청마다 스레드를 새로 만들고 동시 연결 수 제한 없음). waitress 를 쓰려면: uv sync", file=sys.stderr)
+    if on_start:
+        on_start()
+    server.serve_forever()
+    while not remaining:
+        time.sleep(0.05)
+    server.server_close()
+    return remaining[0]
@@ -0,0 +1,228 @@
+"""
+pdf/ 폴더 원본 PDF 캐시
+- (경로, 수정 시각, 크기)가 같으면 디스크 읽기와 파싱 없이 이전 결과를 재사용
+- 파일이 바뀌면 다음 요청에서 자동으로 다시 읽음
+- 메모리 예산(max_bytes)을 넘으면 가장 오래 안 쓴 항목부터 제거 (LRU)
+- 적중/실패/무효화/제거 횟수 통계 제공
+- 파일은 mmap 으로 열어 파서에 바로 넘긴다 (파일 전체를 bytes 로 복사하지 않고,
+  같은 파일을 읽는 요청/프로세스는 OS 페이지 캐시를 공유). 파싱이 끝나면 매핑을 닫아
+  Windows 에서도 pdf/ 폴더 파일을 덮어쓸 수 있다
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from PyPDF4 import PdfFileReader
+from PyPDF4.pdf import PageObject
+from PyPDF4.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+import metrics
+
+
+class ParsedSource:
+    """
+    파싱이 끝난 원본 PDF 1개.
+    페이지에서 닿는 객체를 모두 미리 읽어 두고, 요청마다 open()으로 독립된 reader를 만든다.
+    (PyPDF4 writer는 write() 중에 원본 객체 안의 참조를 제자리에서 바꾸므로
+     같은 객체를 여러 요청이 그대로 공유하면 두 번째 write부터 깨진다)
+    """
+
+    def __init__(self, data, path=None, stamp=None):
+        """
+        data: 원본 바이트 또는 mmap 등 버퍼. bytes 가 아니면 파싱 중에만 쓰고 보관하지 않는다.
+        path, stamp: 버퍼를 보관하지 않을 때 원본 파일과 (수정 시각, 크기) - file_source() 로 넘겨 다시 열 때 확인
+        """
+        self._data = data if isinstance(data, bytes) else None
+        self.path = path
+        self.stamp = stamp
+        with metrics.stage("parse"):
+            self.digest = hashlib.sha256(data).hexdigest()
+            reader = PdfFileReader(io.BytesIO(data) if isinstance(data, bytes) else data)
+            self.num_pages = reader.getNumPages()
+            self.pages = [reader.getPage(i) for i in range(self.num_pages)]
+            self.objects = {}
+            self._collect(self.pages)
+        # (원본 바이트) + 파싱된 객체 추정치
+        self.size = len(data) * (2 if self._data is not None else 1)
+
+    @property
+    def data(self):
+        """
+        원본 바이트. 보관하지 않았으면 파일 전체를 다시 읽어 복사하므로
+        파일 원본은 file_source() 로 경로를 받아 라이브러리/워커가 직접 열게 한다
+        """
+        if self._data is not None:
+            return self._data
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            check_unchanged(self.path, self.stamp, (st.st_mtime_ns, st.st_size))
+            return f.read()
+
+    def file_source(self):
+        """원본 바이트를 보관하지 않은(mmap 으로 읽은) 파일 원본이면 (경로, (수정 시각, 크기)), 메모리 원본이면 None"""
+        if self._data is not None:
+            return None
+        return self.path, self.stamp
+
+    def _collect(self, root):
+        """root에서 참조로 닿는 모든 간접 객체를 읽어 objects에 보관"""
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, IndirectObject):
+                key = (obj.idnum, obj.generation)
+                if key not in self.objects:
+                    resolved = obj.getObject()
+                    self.objects[key] = resolved
+                    stack.append(resolved)
+            elif isinstance(obj, DictionaryObject):
+                stack.extend(obj.values())
+            elif isinstance(obj, (ArrayObject, list)):
+                stack.extend(obj)
+
+    def open(self):
+        return SourceReader(self)
+
+
+class SourceReader:
+    """
+    ParsedSource 위의 요청별 reader.
+    엔진이 쓰는 PdfFileReader API(getNumPages / getPage / getObject)만 제공하고,
+    객체는 처음 꺼낼 때 사본을 만든다. 스트림 데이터(bytes)는 복사하지 않고 공유한다.
+    """
+
+    def __init__(self, source):
+        self._source = source
+        self._objects = {}
+        self._pages = {}
+        self.stream = io.BytesIO()  # writer가 원본 stream.closed 를 확인함
+
+    def getNumPages(self):
+        return self._source.num_pages
+
+    def getPage(self, page_number):
+        page = self._pages.get(page_number)
+        if page is None:
+            page = PageObject(self)
+            for key, value in self._source.pages[page_number].items():
+                page[key] = self._copy(value)
+            self._pages[page_number] = page
+        return page
+
+    def getObject(self, ref):
+        key = (ref.idnum, ref.generation)
+        obj = self._objects.get(key)
+        if obj is None:
+            obj = self._copy(self._source.objects[key])
+            self._objects[key] = obj
+        return obj
+
+    def _copy(self, obj):
+        if isinstance(obj, IndirectObject):
+            return IndirectObject(obj.idnum, obj.generation, self)
+        if isinstance(obj, StreamObject):
+            copy = obj.__class__()
+            copy._data = obj._data
+            copy.decodedSelf = obj.decodedSelf
+        elif isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+        elif isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(v) for v in obj)
+        else:
+            return obj
+        for key, value in obj.items():
+            copy[key] = self._copy(value)
+        return copy
+
+
+def check_unchanged(path, stamp, current):
+    """파싱할 때의 (수정 시각, 크기)와 지금 값이 다르면 ValueError"""
+    if current != stamp:
+        raise ValueError(f"원본 PDF가 처리 중에 바뀌었습니다. 다시 시도하세요 - {os.path.basename(path)}")
+
+
+def load_unchanged(path, stamp):
+    """file_source() 의 (경로, stamp)로 다시 읽은 ParsedSource (프로세스 풀 워커). 파일이 바뀌었으면 ValueError"""
+    source = load_source(path)
+    check_unchanged(path, stamp, source.stamp)
+    return source
+
+
+def load_source(path):
+    """파일을 mmap 으로 열어 ParsedSource 생성 (원본 바이트를 메모리에 따로 복사하지 않음)"""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        stamp = (st.st_mtime_ns, st.st_size)
+        if st.st_size == 0:
+            return ParsedSource(b"", path, stamp)  # 빈 파일은 mmap 불가 - 파서 오류로 보고
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return ParsedSource(view, path, stamp)
+
+
+class SourceCache:
+    """경로별 ParsedSource LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), ParsedSource)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """path의 ParsedSource. 처음이거나 파일이 바뀌었으면 새로 읽어 파싱한다."""
+        st = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                if entry[0] == (st.st_mtime_ns, st.st_size):
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    metrics.count("source_cache_hits")
+                    return entry[1]
+                self._remove(path)
+                self.invalidations += 1
+            self.misses += 1
+        metrics.count("source_cache_misses")
+
+        # 파싱은 lock 밖에서 (같은 파일이 동시에 실패하면 두 번 파싱될 수 있으나 결과는 같다)
+        source = load_source(path)
+
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            if source.size <= self.max_bytes:
+                self._entries[path] = (source.stamp, source)
+                self._bytes += source.size
+                while self._bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return source
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, path):
+        _, source = self._entries.pop(path)
+        self._bytes -= source.size
@@ -0,0 +1,175 @@
+"""
+원본 PDF 공급자 (source provider)
+- 웹앱 변형마다 다른 것은 배치 원본 PDF를 받는 방법뿐이다. 라우트(webapp.py)는 공급자를 통해서만 원본을 얻는다
+  UploadSources: 요청에 함께 올린 파일 (multipart 필드 pdf_{b}, 일괄 생성은 files)
+                 또는 업로드 저장소에 이미 올린 원본의 SHA-256 (폼 필드 pdf_sha256_{b}, upload_store.py)
+  FolderSources: 서버 폴더(pdf/)의 파일 이름 (폼 필드 pdf_{b}). 파싱 결과는 SourceCache 로 재사용
+- 반환값은 모두 ParsedSource 이므로 캐시/스트리밍/병렬 처리 등 엔진 쪽 개선은 두 변형에 함께 적용된다
+- PyPDF4 를 쓰는 source_cache 는 처음 원본을 읽을 때 불러온다 (서버 시작 시간)
+"""
+
+import os
+import threading
+
+import metrics
+from pdf_index import PdfIndex
+
+
+class SourceProvider:
+    """
+    배치 원본 PDF 공급자.
+    action: 안내 문구에 쓰는 동사 ("업로드" / "선택") - 예: "배치 1의 PDF 파일을 업로드하세요."
+    """
+
+    name = ""
+    action = ""
+
+    def from_request(self, request, b):
+        """요청의 배치 b 원본 (ParsedSource). 입력이 없으면 None, 잘못된 입력은 ValueError"""
+        raise NotImplementedError
+
+    def manifest_loader(self, request):
+        """일괄 생성 manifest 의 "file" 이름 -> ParsedSource 함수 (없는 이름은 KeyError / OSError)"""
+        raise NotImplementedError
+
+    def stats(self):
+        """/api/cache_stats 에 더할 통계 {이름: dict}"""
+        return {}
+
+    def cache_stats(self):
+        """/metrics 에 더할 캐시 통계 {이름: dict} (아직 만들지 않은 캐시는 제외)"""
+        return {}
+
+    def warm_up(self):
+        """서버 시작 직후 백그라운드에서 미리 준비할 것"""
+
+
+class UploadSources(SourceProvider):
+    """
+    요청과 함께 올린 파일을 읽어 파싱.
+    store: 업로드 저장소 (upload_store.UploadStore). 있으면 올린 파일을 SHA-256 으로 보관하고,
+           파일 대신 폼 필드 pdf_sha256_{b} 로 이미 올린 원본을 참조할 수 있다 (다시 올리지 않음)
+    """
+
+    name = "upload"
+    action = "업로드"
+
+    def __init__(self, store=None):
+        self.store = store
+
+    def from_request(self, request, b):
+        pdf_file = request.files.get(f"pdf_{b}")
+        if pdf_file is None:
+            digest = request.form.get(f"pdf_sha256_{b}")
+            if not digest or self.store is None:
+                return None
+            source = self.store.get(digest)
+            if source is None:
+                raise ValueError(f"배치 {b+1}: 서버에 저장된 원본이 없습니다. PDF 파일을 다시 업로드하세요.")
+            return source
+        with metrics.stage("upload"):
+            pdf_bytes = pdf_file.read()
+        return self.load(pdf_bytes)
+
+    def load(self, pdf_bytes):
+        """원본 바이트 -> ParsedSource (저장소가 있으면 보관하고, 이미 파싱한 원본이면 다시 파싱하지 않음)"""
+        if self.store is None:
+            return _parsed(pdf_bytes)
+        return self.store.add(pdf_bytes)[0]
+
+    def manifest_loader(self, request):
+        uploads = {os.path.basename(f.filename): f for f in request.files.getlist("files")}
+
+        def load_source(name):
+            if name not in uploads and self.store is not None:
+                source = self.store.get(name)  # 저장소에 이미 올린 원본은 SHA-256 으로 참조
+                if source is not None:
+                    return source
+            return self.load(uploads[name].read())
+        return load_source
+
+    def stats(self):
+        return {"upload_store": self.store.stats()} if self.store is not None else {}
+
+    def cache_stats(self):
+        return self.stats()
+
+
+class FolderSources(SourceProvider):
+    """
+    서버 폴더의 원본. 파일 이름만 받으며 폴더 밖 경로는 거부한다.
+    index: 폴더 색인 (PdfIndex, 처음 쓸 때 만들고 백그라운드 갱신 시작)
+    source_cache: (경로, 수정 시각, 크기) 기준 파싱 결과 캐시 (SourceCache, 처음 쓸 때 생성)
+    """
+
+    name = "folder"
+    action = "선택"
+
+    def __init__(self, folder, cache_bytes=256 * 1024 * 1024, poll_seconds=2.0, warm_files=20):
+        self.folder = folder
+        self.cache_bytes = cache_bytes
+        self.poll_seconds = poll_seconds
+        self.warm_files = warm_files
+        self._source_cache = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def source_cache(self):
+        with self._lock:
+            if self._source_cache is None:
+                from source_cache import SourceCache
+                self._source_cache = SourceCache(self.cache_bytes)
+            return self._source_cache
+
+    @property
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = PdfIndex(self.folder, self.poll_seconds)
+                self._index.refresh()
+                self._index.start()
+            return self._index
+
+    def path(self, name):
+        """폴더 안 파일 경로 (없거나 폴더 밖이면 ValueError)"""
+        path = os.path.join(self.folder, name)
+        if os.path.basename(name) != name or not os.path.isfile(path):
+            raise ValueError(f"파일을 찾을 수 없습니다 - {name}")
+        return path
+
+    def from_request(self, request, b):
+        name = request.form.get(f"pdf_{b}")
+        if not name:
+            return None
+        try:
+            path = self.path(name)
+        except ValueError as e:
+            raise ValueError(f"배치 {b+1}: {e}") from None
+        return self.source_cache.get(path)
+
+    def manifest_loader(self, request):
+        def load_source(name):
+            if os.path.basename(name) != name:
+                raise FileNotFoundError(name)
+            return self.source_cache.get(os.path.join(self.folder, name))
+        return load_source
+
+    def stats(self):
+        return {"source": self.source_cache.stats(), "pdf_index": self.index.stats()}
+
+    def cache_stats(self):
+        return {"source": self._source_cache.stats()} if self._source_cache is not None else {}
+
+    def warm_up(self):
+        """폴더 색인을 만들고 최근 원본 몇 개는 미리 파싱해 둔다"""
+        for name in self.index.recent(self.warm_files):
+            try:
+                self.source_cache.get(os.path.join(self.folder, name))
+            except Exception:
+                pass  # 읽을 수 없는 파일은 요청 시 오류로 안내
+
+
+def _parsed(pdf_bytes):
+    from source_cache import ParsedSource
+    return ParsedSource(pdf_bytes)
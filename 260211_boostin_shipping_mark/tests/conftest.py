@@ -0,0 +1,12 @@
+"""
+테스트 공통 설정
+- 엔진 폴더와 benchmarks/ (합성 WMS PDF 생성기 fixtures.py)를 import 경로에 추가
+
+실행: uv run pytest (엔진 폴더에서)
+"""
+
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [APP_DIR, os.path.join(APP_DIR, "benchmarks")]
@@ -0,0 +1,54 @@
+"""
+PDF 백엔드 출력 동등성: pikepdf 출력이 기준 백엔드(pypdf4)와 페이지 수·크기·회전, 페이지별 단어,
+72 dpi 래스터까지 같은지 확인 (benchmarks/bench_backends.py 의 동등성 확인과 같은 비교)
+mmap 으로 읽은 파일 원본(pdf/ 폴더)은 바이트로 다시 읽지 않고 pikepdf 가 경로로 직접 여는지도 확인
+pikepdf(uv sync --extra pikepdf)나 PyMuPDF(uv sync --extra preview)가 없으면 건너뛴다
+"""
+
+import io
+
+import pytest
+
+import engine
+from fixtures import make_wms_pdf
+from source_cache import ParsedSource, load_source
+
+pytest.importorskip("pikepdf", reason="pikepdf 가 없습니다 (uv sync --extra pikepdf)")
+if engine._import_pymupdf() is None:
+    pytest.skip("PyMuPDF 가 없습니다 (uv sync --extra preview)", allow_module_level=True)
+
+from bench_backends import PARAMS, equivalence_cases, output_differences, page_signatures  # noqa: E402
+
+CASES = equivalence_cases()
+
+
+@pytest.mark.parametrize("output_mode", engine.OUTPUT_MODES)
+@pytest.mark.parametrize("name, profile_key, sources", CASES, ids=[case[0] for case in CASES])
+def test_pikepdf_matches_pypdf4(name, profile_key, sources, output_mode):
+    differences = output_differences(engine._import_pymupdf(), "pikepdf", profile_key, sources, output_mode)
+    assert not differences, "; ".join(f"{path}: {', '.join(problems[:3])}" for path, problems in differences.items())
+
+
+def test_pikepdf_opens_file_sources_by_path(tmp_path, monkeypatch):
+    def render(sources):
+        batches = [{"source": source, "copies": 2, "batch_number": f"{b + 1:03d}/2", "address": PARAMS["address"]}
+                   for b, source in enumerate(sources)]
+        total_boxes = sum(len(engine.copy_page_indices(source.num_pages, 2)) for source in sources)
+        spec = engine.build_shipment_spec("brazil", total_boxes, batches, dict(PARAMS), pdf_backend="pikepdf")
+        buf = io.BytesIO()
+        engine.build_shipment(spec).write(buf)
+        return page_signatures(engine._import_pymupdf(), buf.getvalue())
+
+    paths = [tmp_path / f"{num_pages}p.pdf" for num_pages in (1, 2)]
+    for num_pages, path in enumerate(paths, 1):
+        path.write_bytes(make_wms_pdf(num_pages, "letter"))
+    expected = render([ParsedSource(path.read_bytes()) for path in paths])
+
+    original = ParsedSource.data
+
+    def data(self):
+        assert self.file_source() is None, "파일 원본을 바이트로 다시 읽었습니다"
+        return original.fget(self)
+
+    monkeypatch.setattr(ParsedSource, "data", property(data))
+    assert render([load_source(str(path)) for path in paths]) == expected
@@ -0,0 +1,94 @@
+"""
+배치 병렬 렌더링 결정성: build_shipment(workers=2/4) 결과가 순차 처리(workers=1)와 같은지 확인
+- 페이지마다 content stream(풀어낸 바이트)과 추출한 글자(페이지 번호 포함)를 비교
+- 합본 전체에 이미지 XObject가 하나만 들어가는지 확인
+- pdf/ 폴더처럼 mmap 으로 읽은 파일 원본은 바이트를 다시 읽지 않고 경로로 워커에 넘기는지 확인
+"""
+
+import io
+import re
+
+import pytest
+from PyPDF4 import PdfFileReader
+
+import engine
+from fixtures import make_wms_pdf
+from source_cache import ParsedSource, load_source
+
+# PyPDF4 mergePage 가 충돌 리소스 이름에 붙이는 임의 uuid (비교 전에 지운다)
+MERGE_RENAME = re.compile(rb"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+BATCHES = 5
+COPIES = 3
+
+
+@pytest.fixture(autouse=True)
+def no_source_copy(monkeypatch):
+    """파일 원본의 data(파일 전체를 다시 읽는 복사)를 쓰면 실패"""
+    original = ParsedSource.data
+
+    def data(self):
+        assert self.file_source() is None, "파일 원본을 바이트로 다시 읽었습니다"
+        return original.fget(self)
+
+    monkeypatch.setattr(ParsedSource, "data", property(data))
+
+
+def source(tmp_path, b, pagesize):
+    """짝수 배치는 메모리 원본(업로드), 홀수 배치는 mmap 으로 읽은 파일 원본(pdf/ 폴더)"""
+    data = make_wms_pdf(1 + b % 2, pagesize)
+    if b % 2 == 0:
+        return ParsedSource(data)
+    path = tmp_path / f"batch{b}.pdf"
+    if not path.exists():
+        path.write_bytes(data)
+    return load_source(str(path))
+
+
+def build(tmp_path, profile_key, output_mode, workers):
+    """1/2페이지 원본을 번갈아 쓰는 출고를 렌더링한 PDF 바이트 (PyPDF4 writer 가 reader 를 바꾸므로 명세는 매번 새로)"""
+    profile = engine.COUNTRY_PROFILES[profile_key]
+    address = profile.get("fixed_address", "TEST ADDRESS")
+    batches = [{"source": source(tmp_path, b, profile["pagesize"]), "copies": COPIES,
+                "batch_number": f"{b + 7:03d}/25", "address": address} for b in range(BATCHES)]
+    total_boxes = sum(len(engine.copy_page_indices(1 + b % 2, COPIES)) for b in range(BATCHES))
+    spec = engine.build_shipment_spec(profile_key, total_boxes, batches, {"address": address}, output_mode)
+    buf = io.BytesIO()
+    engine.build_shipment(spec, workers=workers).write(buf)
+    return buf.getvalue()
+
+
+def pages(pdf_bytes):
+    """페이지별 (content stream 바이트, 추출한 글자)"""
+    reader = PdfFileReader(io.BytesIO(pdf_bytes))
+    result = []
+    for i in range(reader.getNumPages()):
+        page = reader.getPage(i)
+        contents = page.getContents()
+        parts = contents if isinstance(contents, list) else [contents]
+        data = b"".join(c.getObject().getData() for c in parts)
+        result.append((MERGE_RENAME.sub(b"", data), page.extractText()))
+    return result
+
+
+def image_count(pdf_bytes):
+    """출력에 들어간 이미지 XObject 수"""
+    return len(re.findall(rb"/Subtype\s*/Image", pdf_bytes))
+
+
+@pytest.mark.parametrize("output_mode", engine.OUTPUT_MODES)
+@pytest.mark.parametrize("profile_key", ["brazil", "chile"])
+def test_parallel_matches_serial(tmp_path, profile_key, output_mode):
+    serial = build(tmp_path, profile_key, output_mode, 1)
+    expected = pages(serial)
+    total = len(expected)
+    for n, (_, text) in enumerate(expected, 1):
+        assert re.search(rf"\b{n}\s+{total}\b", text), f"{n}페이지 번호가 없습니다"
+
+    for workers in (2, 4):
+        parallel = build(tmp_path, profile_key, output_mode, workers)
+        actual = pages(parallel)
+        assert len(actual) == total
+        for n, (a, b) in enumerate(zip(expected, actual), 1):
+            assert a[0] == b[0], f"workers={workers}: {n}페이지 content stream 이 다릅니다"
+            assert a[1] == b[1], f"workers={workers}: {n}페이지 글자가 다릅니다"
+        assert image_count(parallel) == image_count(serial)
@@ -0,0 +1,31 @@
+"""
+업로드 저장소: HEAD 존재 확인(size)은 적중/실패가 아니라 probes 로 세고, 오래 안 쓴 순서만 갱신하는지 확인
+"""
+
+from fixtures import make_wms_pdf
+from upload_store import UploadStore
+
+
+def test_size_counts_probes_not_hits(tmp_path):
+    data = make_wms_pdf(1, "letter")
+    store = UploadStore(str(tmp_path))
+    source, stored = store.add(data)
+    assert stored
+
+    assert store.size(source.digest) == len(data)
+    assert store.size("0" * 64) is None
+    stats = store.stats()
+    assert (stats["probes"], stats["hits"], stats["misses"]) == (2, 0, 0)
+
+
+def test_size_keeps_probed_upload(tmp_path):
+    first = make_wms_pdf(1, "letter")
+    second = make_wms_pdf(2, "letter")
+    store = UploadStore(str(tmp_path), max_bytes=len(first) + len(second))
+    digest = store.add(first)[0].digest
+    store.add(second)
+
+    store.size(digest)  # 생성 요청 직전 HEAD 확인 -> 가장 최근 사용
+    store.add(make_wms_pdf(1, "a4"))
+    assert store.size(digest) is not None
+    assert store.stats()["evictions"] == 1
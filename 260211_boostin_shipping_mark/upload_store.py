@@ -0,0 +1,123 @@
+"""
+업로드 원본 PDF 저장소 (내용 주소 지정)
+- 키: 원본 바이트의 SHA-256 (16진수 64자). 같은 파일은 몇 번을 올려도 한 번만 저장된다
+- 브라우저는 파일을 한 번만 올리고(또는 HEAD 로 이미 있는지 확인하고) 이후 미리보기/생성에서는 SHA-256 만 보낸다
+- 디스크: root/<sha256>.pdf, 용량(max_bytes)을 넘으면 오래 안 쓴 파일부터 삭제 (result_cache.ResultCache 와 같은 방식)
+- 메모리: 파싱 결과(ParsedSource)를 parsed_bytes 예산 안에서 LRU 로 보관 (같은 원본을 다시 파싱하지 않음)
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from result_cache import ResultCache
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def valid_digest(digest):
+    """저장소 키로 쓸 수 있는 SHA-256 문자열인지 (경로 조작 방지)"""
+    return bool(digest) and _DIGEST.fullmatch(digest) is not None
+
+
+class UploadStore(ResultCache):
+    """sha256 -> root/<sha256>.pdf + 파싱 결과 메모리 캐시 (스레드 안전)"""
+
+    def __init__(self, root, max_bytes=1024 * 1024 * 1024, parsed_bytes=256 * 1024 * 1024):
+        super().__init__(root, max_bytes)
+        self.parsed_max_bytes = parsed_bytes
+        self._parsed = OrderedDict()  # sha256 -> ParsedSource (오래 안 쓴 순)
+        self._parsed_bytes = 0
+        self._parsed_lock = threading.Lock()
+        self.uploads = 0
+        self.duplicates = 0  # 이미 있는 파일을 다시 올린 횟수
+        self.probes = 0  # size() 존재 확인(HEAD) 횟수
+
+    def size(self, digest):
+        """
+        저장된 원본 크기 (없으면 None). 있으면 최근 사용으로 표시해 곧 올 생성 요청 전에 지워지지 않게 한다.
+        HEAD 존재 확인용이라 적중/실패가 아니라 probes 로 센다
+        """
+        if not valid_digest(digest):
+            return None
+        with self._lock:
+            self.probes += 1
+        return self.touch(digest)
+
+    def add(self, data, expected=None):
+        """
+        원본 바이트 저장 -> (ParsedSource, 새로 저장했는지).
+        expected: 브라우저가 계산한 SHA-256 (다르면 ValueError). PDF 가 아니면 파서 오류를 그대로 올린다
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if expected and expected != digest:
+            raise ValueError("업로드한 파일의 SHA-256이 맞지 않습니다. 파일을 다시 선택하세요.")
+        source = self._cached(digest)
+        if source is None:
+            source = self._parse(data)
+        with self._lock:
+            self.uploads += 1
+            stored = digest not in self._entries
+            if not stored:
+                self.duplicates += 1
+        if stored:
+            self.put(digest, data)
+        self._remember(digest, source)
+        return source, stored
+
+    def get(self, digest):
+        """저장된 원본의 ParsedSource (없으면 None)"""
+        if not valid_digest(digest):
+            return None
+        source = self._cached(digest)
+        if source is not None:
+            return source
+        f = self.open(digest)
+        if f is None:
+            return None
+        with f:
+            data = f.read()
+        source = self._parse(data)
+        self._remember(digest, source)
+        return source
+
+    def _parse(self, data):
+        from source_cache import ParsedSource
+        return ParsedSource(data)
+
+    def _cached(self, digest):
+        with self._parsed_lock:
+            source = self._parsed.get(digest)
+            if source is not None:
+                self._parsed.move_to_end(digest)
+            return source
+
+    def _remember(self, digest, source):
+        if source.size > self.parsed_max_bytes:
+            return
+        with self._parsed_lock:
+            if digest in self._parsed:
+                return
+            self._parsed[digest] = source
+            self._parsed_bytes += source.size
+            while self._parsed_bytes > self.parsed_max_bytes:
+                _, evicted = self._parsed.popitem(last=False)
+                self._parsed_bytes -= evicted.size
+
+    def clear(self):
+        super().clear()
+        with self._parsed_lock:
+            self._parsed.clear()
+            self._parsed_bytes = 0
+
+    def stats(self):
+        stats = super().stats()
+        with self._parsed_lock:
+            stats["parsed_entries"] = len(self._parsed)
+            stats["parsed_bytes"] = self._parsed_bytes
+        with self._lock:
+            stats["uploads"] = self.uploads
+            stats["duplicates"] = self.duplicates
+            stats["probes"] = self.probes
+        return stats
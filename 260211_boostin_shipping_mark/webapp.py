@@ -0,0 +1,676 @@
+"""
+Shipping Mark PDF 웹앱 공용 부분
+- Flask 앱, API 라우트, 결과 캐시, 백그라운드 작업 큐, 계측, 서버 실행
+- 업로드 앱(app.py)과 pdf/ 폴더 드롭다운 앱이 함께 쓴다. 변형마다 다른 것은 원본 PDF 공급자(sources.py)와 화면뿐
+- 변형 앱은 app.config 를 바꾼 뒤 configure(공급자, 앱 폴더) 를 부르고 main() 으로 실행한다
+"""
+
+from flask import Flask, Response, render_template, request, send_file, jsonify
+import argparse
+import importlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+import zipfile
+from datetime import datetime
+from urllib.parse import quote
+
+from profiles import COUNTRY_PROFILES
+import metrics
+import profiles
+import serving
+from result_cache import ResultCache
+from jobs import JobQueue, DONE
+
+
+class LazyModule:
+    """
+    속성에 처음 접근할 때 모듈을 불러오는 대리 객체.
+    PDF 라이브러리(PyPDF4, reportlab)를 쓰는 engine 은 서버가 요청을 받기 시작한 뒤에 불러온다.
+    on_load(module): 불러온 직후 한 번 호출
+    """
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    self._module = module
+        return getattr(self._module, attr)
+
+
+def _configure_engine(module):
+    module.set_pic_dir(PIC_DIR)
+
+
+engine = LazyModule("engine", on_load=_configure_engine)
+
+app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB
+app.config['STREAM_RESPONSE'] = True  # 최종 PDF를 청크 단위로 스트리밍 (False: 메모리에 모두 쓴 뒤 전송)
+app.config['BATCH_WORKERS'] = 1       # 배치 병렬 렌더링 프로세스 수 (1: 순차 처리, pypdf4 백엔드만)
+app.config['PDF_BACKEND'] = "pypdf4"  # PDF 라이브러리: pypdf4 / pikepdf (uv sync --extra pikepdf)
+app.config['PREVIEW_IMAGE_DPI'] = 72  # 이미지 미리보기 해상도
+app.config['BULK_WORKERS'] = 2        # 일괄 생성 시 동시에 렌더링할 출고 수
+app.config['JOB_WORKERS'] = 2         # 백그라운드 생성 작업 동시 처리 수
+app.config['JOB_TTL'] = 60 * 60       # 완료된 작업 결과 보관 시간(초)
+app.config['RESULT_CACHE_BYTES'] = 1024 * 1024 * 1024  # 생성 결과 PDF 디스크 캐시 용량 (0: 사용 안 함)
+app.config['SERVER_THREADS'] = 4            # 운영 모드 요청 처리 스레드 수 (waitress)
+app.config['SERVER_CONNECTION_LIMIT'] = 32  # 동시에 받는 연결 수 (넘으면 대기열에서 기다림)
+app.config['SERVER_BACKLOG'] = 64           # 연결 대기열 길이 (차면 새 연결 거부)
+app.config['SHUTDOWN_TIMEOUT'] = 30         # 종료 시 처리 중인 요청을 기다리는 최대 시간(초)
+app.config['REQUEST_LOG'] = "-"            # 요청별 구조화 로그(JSON 1줄): "-" 표준 오류, 파일 경로, None 끔
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+PIC_DIR = os.path.join(ENGINE_DIR, "pic")  # configure() 에서 변형 앱 폴더의 pic/ 로 바뀜
+JOB_DIR = os.path.join(tempfile.gettempdir(), "shipping_mark_jobs")  # 백그라운드 작업 결과 PDF
+
+# configure() 에서 설정
+source_provider = None  # 원본 PDF 공급자 (sources.SourceProvider)
+result_cache = None     # 생성 결과 PDF 캐시 (같은 요청을 다시 보내면 저장된 파일 전송)
+job_queue = None        # 백그라운드 생성 작업 큐
+
+# 요청별 단계 시간 / 페이지 수 / 바이트 계측 (구조화 로그 + /metrics, metrics.py 참고)
+TIMED_ENDPOINTS = {"api_generate", "api_reprint", "api_jobs_submit", "api_bulk", "api_preview",
+                   "api_preview_session_render", "api_preview_session_image"}
+metrics.install(app, TIMED_ENDPOINTS, COUNTRY_PROFILES)
+
+
+def configure(provider, base_dir, template_folder=None):
+    """
+    변형 앱에서 한 번 호출: 원본 공급자와 앱 폴더(pic/, result_cache/ 위치) 지정.
+    template_folder: index.html 이 있는 폴더 (생략 시 webapp.py 옆 templates/)
+    app.config 의 캐시 용량/작업 수 설정은 이 호출 전에 바꿔야 반영된다. 반환값: Flask app
+    """
+    global source_provider, result_cache, job_queue, PIC_DIR
+    source_provider = provider
+    PIC_DIR = os.path.join(base_dir, "pic")
+    os.makedirs(PIC_DIR, exist_ok=True)
+    if engine._module is not None:
+        _configure_engine(engine._module)
+    if template_folder is not None:
+        app.template_folder = template_folder
+    result_cache = ResultCache(os.path.join(base_dir, "result_cache"), app.config['RESULT_CACHE_BYTES'])
+    job_queue = JobQueue(JOB_DIR, workers=app.config['JOB_WORKERS'], ttl=app.config['JOB_TTL'])
+    return app
+
+
+# ─── Flask 라우트 ─────────────────────────────────────────────────────
+
+def content_disposition(filename, as_attachment=True):
+    """send_file과 같은 규칙의 Content-Disposition 값 (한글 파일명은 filename* 로 인코딩)"""
+    value = "attachment" if as_attachment else "inline"
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        quoted = quote(filename, safe="!#$&+-.^_`|~")
+        return f"{value}; filename=\"{simple}\"; filename*=UTF-8''{quoted}"
+    return f"{value}; filename=\"{filename}\""
+
+
+@app.route("/")
+def index():
+    snapshot = profiles.store.current()
+    return render_template("index.html",
+                           profiles=snapshot.profiles,
+                           addresses=snapshot.addresses)
+
+
+def profile_document(name):
+    """
+    프로필 저장소가 미리 만들어 둔 JSON 응답 (매번 직렬화하지 않음).
+    ETag 가 같으면 304 - 파일을 고쳐 다시 읽으면 ETag 가 바뀌어 브라우저가 새로 받는다
+    """
+    etag, body = profiles.store.current().documents[name]
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@app.route("/api/profiles")
+def api_profiles():
+    """프로필 정보 API (프론트엔드에서 동적 폼 구성용)"""
+    return profile_document("profiles")
+
+
+@app.route("/api/addresses")
+def api_addresses():
+    """선택 가능 주소 목록 API"""
+    return profile_document("addresses")
+
+
+@app.route("/api/presets")
+def api_presets():
+    """현장 설정 목록 API: {이름: {name, profile, description, values, file}}"""
+    return profile_document("presets")
+
+
+@app.route("/api/cache_stats")
+def api_cache_stats():
+    """생성 결과 / 미리보기 이미지 / 원본 공급자(원본 PDF 캐시 등) 캐시 적중/실패 통계 API"""
+    return jsonify({
+        "result": result_cache.stats(),
+        "preview_image": engine.preview_images.stats(),
+        **source_provider.stats(),
+    })
+
+
+def form_int(name, default, label):
+    """폼 정수 입력값 (비었으면 default, 숫자가 아니면 ValueError - 메시지는 그대로 사용자에게 표시)"""
+    val = request.form.get(name, "")
+    if val == "":
+        return default
+    try:
+        return int(val)
+    except ValueError:
+        raise ValueError(f"{label}는 숫자여야 합니다: {val}")
+
+
+def parse_generate_request():
+    """
+    /api/generate 요청을 build_shipment 용 출고 명세(spec)로 변환 (검증은 build_shipment_spec).
+    입력 오류는 ValueError로 알린다 (메시지는 그대로 사용자에게 표시).
+    """
+    batch_count = form_int("batch_count", 0, "배치 수")
+    batches = []
+    for b in range(batch_count):
+        source = source_provider.from_request(request, b)
+        if source is None:
+            raise ValueError(f"배치 {b+1}의 PDF 파일을 {source_provider.action}하세요.")
+
+        batches.append({
+            "source": source,
+            "copies": form_int(f"copies_{b}", 1, f"배치 {b+1}의 복사 매수"),
+            "batch_number": request.form.get(f"batch_number_{b}", ""),
+            "address": request.form.get(f"address_{b}", ""),
+        })
+
+    return engine.build_shipment_spec(
+        request.form.get("profile"), form_int("total_boxes", 0, "전체 박스 수"), batches,
+        request.form.to_dict(), request.form.get("output_mode", "merge"), app.config['PDF_BACKEND']
+    )
+
+@app.route("/api/generate", methods=["POST"])
+def api_generate():
+    """PDF 생성 API"""
+    try:
+        spec = parse_generate_request()
+
+        # 같은 원본·프로필·입력값으로 만든 결과가 있으면 PDF 작업 없이 그대로 전송
+        cache_key = engine.shipment_cache_key(spec)
+        cached = result_cache.open(cache_key)
+        if cached is not None:
+            response = send_file(cached, mimetype="application/pdf", as_attachment=True,
+                                 download_name=spec["filename"])
+            response.content_length = os.fstat(cached.fileno()).st_size
+            response.headers["X-Result-Cache"] = "hit"
+            return response
+
+        combined_writer = engine.build_shipment(spec, workers=app.config['BATCH_WORKERS'])
+
+        # 최종 합본 PDF 생성: 쓰는 즉시 청크 단위로 전송 (끝까지 보내면 결과 캐시에 저장)
+        if app.config['STREAM_RESPONSE']:
+            chunks = result_cache.tee(cache_key, engine.iter_pdf_chunks(combined_writer))
+            response = Response(chunks, mimetype="application/pdf")
+            response.headers["Content-Disposition"] = content_disposition(spec["filename"])
+            response.headers["X-Result-Cache"] = "miss"
+            return response
+
+        output_buf = io.BytesIO()
+        with metrics.stage("write"):
+            combined_writer.write(output_buf)
+        result_cache.put(cache_key, output_buf.getvalue())
+        output_buf.seek(0)
+
+        response = send_file(
+            output_buf,
+            mimetype="application/pdf",
+            as_attachment=True,
+            download_name=spec["filename"]
+        )
+        response.headers["X-Result-Cache"] = "miss"
+        return response
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        metrics.record_exception("api_generate")
+        return jsonify({"error": f"처리 중 오류 발생: {str(e)}"}), 500
+
+
+@app.route("/api/reprint", methods=["POST"])
+def api_reprint():
+    """
+    박스 범위 재출력 API: /api/generate 와 같은 입력 + box_range ("5-9" 또는 "12").
+    전체 출고본을 만들지 않고 해당 번호 페이지만 같은 번호로 렌더링한다.
+    """
+    try:
+        spec = parse_generate_request()
+        first_box, last_box = engine.parse_box_range(request.form.get("box_range", ""), spec["total_pages"])
+        writer = engine.build_reprint(spec, first_box, last_box)
+
+        output_buf = io.BytesIO()
+        with metrics.stage("write"):
+            writer.write(output_buf)
+        output_buf.seek(0)
+
+        return send_file(
+            output_buf,
+            mimetype="application/pdf",
+            as_attachment=True,
+            download_name=engine.reprint_filename(spec, first_box, last_box)
+        )
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        metrics.record_exception("api_reprint")
+        return jsonify({"error": f"처리 중 오류 발생: {str(e)}"}), 500
+
+
+# ─── 백그라운드 작업 ─────────────────────────────────────────────────
+
+@app.route("/api/jobs", methods=["POST"])
+def api_jobs_submit():
+    """
+    PDF 생성 작업 등록 (/api/generate 와 같은 입력, job_id 즉시 반환).
+    /api/generate 와 생성 결과 캐시를 함께 쓴다: 같은 출고가 캐시에 있으면 렌더링 없이 완료된 작업(200)을 돌려주고,
+    없으면 작업이 끝날 때 결과를 캐시에 저장한다 (응답 헤더 X-Result-Cache: hit / miss)
+    """
+    try:
+        spec = parse_generate_request()
+        cache_key = engine.shipment_cache_key(spec)
+        cached = result_cache.open(cache_key)
+        if cached is not None:
+            job = job_queue.add_done(cached, len(spec["batches"]), spec["total_pages"], spec["filename"])
+            response = jsonify(job_queue.snapshot(job.id))
+            response.headers["X-Result-Cache"] = "hit"
+            return response
+
+        job = job_queue.submit(
+            lambda progress: engine.build_shipment(spec, progress, workers=app.config['BATCH_WORKERS']),
+            len(spec["batches"]), spec["total_pages"], spec["filename"],
+            timer=metrics.RequestTimer("job", spec["profile_key"]),
+            on_done=lambda path: result_cache.put_file(cache_key, path)
+        )
+        response = jsonify(job_queue.snapshot(job.id))
+        response.headers["X-Result-Cache"] = "miss"
+        return response, 202
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        metrics.record_exception("api_jobs_submit")
+        return jsonify({"error": f"처리 중 오류 발생: {str(e)}"}), 500
+
+
+@app.route("/api/jobs/<job_id>")
+def api_job_status(job_id):
+    """작업 진행 상태 (배치 진행률, 남은 시간)"""
+    status = job_queue.snapshot(job_id)
+    if status is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify(status)
+
+
+@app.route("/api/jobs/<job_id>/result")
+def api_job_result(job_id):
+    """완료된 작업의 결과 PDF 다운로드"""
+    status = job_queue.snapshot(job_id)
+    if status is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    if status["status"] != DONE:
+        return jsonify({"error": f"작업이 완료되지 않았습니다 ({status['status']})", **status}), 409
+
+    job = job_queue.get(job_id)
+    return send_file(
+        job.result_path,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=job.filename
+    )
+
+
+# ─── 일괄 생성 ───────────────────────────────────────────────────────
+
+def read_manifest_request():
+    """요청의 manifest (파일 필드 또는 텍스트 필드 "manifest") -> parse_manifest 결과"""
+    fmt = None
+    manifest_file = request.files.get("manifest")
+    if manifest_file is not None:
+        text = manifest_file.read().decode("utf-8-sig")
+        ext = os.path.splitext(manifest_file.filename or "")[1].lower()
+        fmt = {".csv": "csv", ".json": "json"}.get(ext)
+    else:
+        text = request.form.get("manifest", "")
+    if not text.strip():
+        raise ValueError("manifest가 없습니다.")
+    return engine.parse_manifest(text, request.form.get("manifest_format") or fmt)
+
+
+@app.route("/api/bulk", methods=["POST"])
+def api_bulk():
+    """
+    manifest의 여러 출고를 한 번에 생성 (출고별 PDF + summary.json 을 ZIP으로 반환).
+    배치의 "file"은 원본 공급자가 찾는 이름 (업로드: 함께 올린 "files" 파일 이름, 폴더: pdf/ 폴더의 파일 이름).
+    같은 파일은 한 번만 파싱한다.
+    """
+    try:
+        shipments = read_manifest_request()
+        load_source = source_provider.manifest_loader(request)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with tempfile.TemporaryDirectory() as out_dir:
+            summary = engine.run_bulk(shipments, load_source, out_dir, workers=app.config['BULK_WORKERS'],
+                                      pdf_backend=app.config['PDF_BACKEND'])
+            zip_buf = io.BytesIO()
+            # PDF는 이미 압축되어 있으므로 ZIP은 저장만 한다
+            with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_STORED) as zf:
+                for name in sorted(os.listdir(out_dir)):
+                    zf.write(os.path.join(out_dir, name), name)
+        zip_buf.seek(0)
+
+        response = send_file(
+            zip_buf,
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name=f"shipping_marks_{timestamp}.zip"
+        )
+        response.headers["X-Bulk-Failed"] = str(sum(1 for entry in summary if entry["status"] != "done"))
+        return response
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        metrics.record_exception("api_bulk")
+        return jsonify({"error": f"처리 중 오류 발생: {str(e)}"}), 500
+
+
+def preview_profile():
+    """미리보기 요청의 (프로필 키, 입력값 dict) - 현장 설정(preset)이 있으면 적용. 잘못된 프로필이면 ValueError"""
+    profile_key, options = profiles.apply_preset(request.form.get("profile"), request.form.to_dict())
+    if profile_key not in COUNTRY_PROFILES:
+        raise ValueError(f"알 수 없는 프로필: {profile_key}")
+    return profile_key, options
+
+
+def parse_preview_params(profile, options):
+    """
+    미리보기 요청의 좌표/주소/텍스트 파라미터 (첫 번째 배치 기준). options: preview_profile() 의 입력값.
+    입력 오류는 ValueError
+    """
+    # 좌표 파라미터 수집 (숫자가 아니면 ValueError)
+    params = engine.collect_layout_params(profile, options, {})
+
+    # 주소
+    if profile["address_type"] == "fixed":
+        params["address"] = options.get("address", profile.get("fixed_address", ""))
+    else:
+        batch_address = options.get("address_0", "")
+        if batch_address == "__SKIP__":
+            params["skip_address"] = True
+            params["address"] = ""
+        else:
+            params["address"] = batch_address
+
+    # 추가 텍스트 파라미터
+    for field in ["consignee_name", "reg_text", "product_name", "box_text"]:
+        val = options.get(field)
+        if val is not None:
+            params[field] = val
+
+    batch_number = options.get("batch_number_0", "")
+    if batch_number:
+        params["batch_number"] = batch_number
+
+    return params
+
+
+def preview_source():
+    """미리보기 요청의 첫 번째 배치 원본 (입력이 없거나 잘못되면 ValueError)"""
+    source = source_provider.from_request(request, 0)
+    if source is None:
+        raise ValueError(f"미리보기를 위해 첫 번째 배치의 PDF를 {source_provider.action}하세요.")
+    return source
+
+
+@app.route("/api/preview", methods=["POST"])
+def api_preview():
+    """미리보기용 첫 페이지 PDF 생성"""
+    try:
+        profile_key, options = preview_profile()
+        total_boxes = form_int("total_boxes", 1, "전체 박스 수")
+        source = preview_source()
+        params = parse_preview_params(COUNTRY_PROFILES[profile_key], options)
+
+        # 첫 페이지만 처리 (1장 복사)
+        reader = source.open()
+        writer = engine.PdfFileWriter()
+        engine.apply_overlay(
+            writer, [engine.clone_page(reader.getPage(0))], profile_key, params, 1, total_boxes,
+            output_mode=request.form.get("output_mode", "merge")
+        )
+        buf = io.BytesIO()
+        with metrics.stage("write"):
+            writer.write(buf)
+        buf.seek(0)
+
+        return send_file(
+            buf,
+            mimetype="application/pdf",
+            as_attachment=False,
+            download_name="preview.pdf"
+        )
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        metrics.record_exception("api_preview")
+        return jsonify({"error": f"미리보기 오류: {str(e)}"}), 500
+
+
+# 미리보기 세션: engine.preview_sessions (좌표를 바꿀 때마다 바뀐 레이어만 다시 렌더링)
+# 이미지 미리보기 캐시: engine.preview_images (이전 설정으로 되돌리면 다시 렌더링하지 않음)
+
+@app.route("/api/preview/session", methods=["POST"])
+def api_preview_session():
+    """미리보기 세션 생성: 첫 번째 배치 원본을 서버에 보관하고 session_id 반환"""
+    try:
+        source = preview_source()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"PDF를 읽을 수 없습니다: {str(e)}"}), 400
+
+    return jsonify({"session_id": engine.preview_sessions.create(source)}), 201
+
+
+@app.route("/api/preview/session/<session_id>", methods=["POST"])
+def api_preview_session_render(session_id):
+    """세션 미리보기 PDF (응답 헤더 X-Preview-Rebuilt: 이번에 다시 그린 레이어)"""
+    session = engine.preview_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "미리보기 세션이 만료되었습니다."}), 404
+
+    try:
+        profile_key, options = preview_profile()
+        params = parse_preview_params(COUNTRY_PROFILES[profile_key], options)
+        total_boxes = form_int("total_boxes", 1, "전체 박스 수")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        pdf_bytes, rebuilt = session.render(profile_key, params, total_boxes)
+    except Exception as e:
+        metrics.record_exception("api_preview_session_render")
+        return jsonify({"error": f"미리보기 오류: {str(e)}"}), 500
+
+    response = Response(pdf_bytes, mimetype="application/pdf")
+    response.headers["Content-Disposition"] = content_disposition("preview.pdf", as_attachment=False)
+    response.headers["X-Preview-Rebuilt"] = ",".join(rebuilt)
+    return response
+
+
+@app.route("/api/preview/session/<session_id>/image", methods=["POST"])
+def api_preview_session_image(session_id):
+    """세션 미리보기를 PNG/WebP 이미지로 반환 (응답 헤더 X-Preview-Cache: hit / miss)"""
+    session = engine.preview_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "미리보기 세션이 만료되었습니다."}), 404
+
+    try:
+        profile_key, options = preview_profile()
+        params = parse_preview_params(COUNTRY_PROFILES[profile_key], options)
+        total_boxes = form_int("total_boxes", 1, "전체 박스 수")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    fmt = request.form.get("preview_format", "png")
+    if fmt not in engine.PREVIEW_IMAGE_FORMATS:
+        return jsonify({"error": f"알 수 없는 이미지 형식: {fmt}"}), 400
+    if engine.raster_backend() is None:
+        return jsonify({"error": "미리보기 이미지 렌더러가 없습니다. PyMuPDF(uv sync --extra preview) 또는 poppler(pdftoppm)를 설치하세요."}), 501
+
+    dpi = app.config['PREVIEW_IMAGE_DPI']
+    key = engine.preview_image_key(session.source, profile_key, params, total_boxes, dpi, fmt)
+
+    image = engine.preview_images.get(key)
+    cache_status = "hit"
+    if image is None:
+        cache_status = "miss"
+        try:
+            pdf_bytes, _ = session.render(profile_key, params, total_boxes)
+            image = engine.rasterize_first_page(pdf_bytes, dpi, fmt)
+        except Exception as e:
+            metrics.record_exception("api_preview_session_image")
+            return jsonify({"error": f"미리보기 오류: {str(e)}"}), 500
+        engine.preview_images.put(key, image)
+
+    response = Response(image, mimetype=f"image/{fmt}")
+    response.headers["X-Preview-Cache"] = cache_status
+    return response
+
+
+# ─── 서버 실행 ───────────────────────────────────────────────────────
+
+warm_state = {"done": False, "seconds": None, "error": None}
+
+
+def warm_up():
+    """
+    engine 을 불러오고 글꼴/이미지/기본 오버레이를 미리 준비한 뒤 원본 공급자 준비
+    (서버 시작 직후 백그라운드 스레드)
+    """
+    started = time.perf_counter()
+    try:
+        engine.warm_up(app.config['PDF_BACKEND'])
+        source_provider.warm_up()
+    except Exception as e:
+        metrics.record_exception("warm_up")
+        warm_state["error"] = str(e)
+    warm_state["seconds"] = round(time.perf_counter() - started, 3)
+    warm_state["done"] = True
+
+
+@app.route("/api/health")
+def api_health():
+    """서버 상태 (warm: 사전 준비 완료 여부, profiles: 프로필 저장소 - error 가 있으면 고친 파일을 읽지 못함)"""
+    return jsonify({
+        "status": "ok",
+        "warm": warm_state["done"],
+        "warm_seconds": warm_state["seconds"],
+        "warm_error": warm_state["error"],
+        "server": serving.server_state["server"],
+        "active_requests": serving.server_state["active"],
+        "profiles": profiles.store.status(),
+    })
+
+
+def metrics_cache_stats():
+    """/metrics 용 캐시 통계 (아직 만들지 않은 캐시는 제외)"""
+    stats = {"result": result_cache.stats(), **source_provider.cache_stats()}
+    if engine._module is not None:  # /metrics 수집 때문에 engine 을 불러오지 않음
+        stats["preview_image"] = engine.preview_images.stats()
+    return stats
+
+
+def metrics_server_state():
+    yield "active_requests", "gauge", "처리 중인 요청 수 (운영 모드)", [({}, serving.server_state["active"])]
+    yield "warm", "gauge", "사전 준비 완료 여부", [({}, int(warm_state["done"]))]
+
+
+metrics.registry.collectors += [metrics.cache_collector(metrics_cache_stats), metrics_server_state]
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus 형식 계측 값: 프로필별 요청 지연 히스토그램, 단계별 시간, 페이지/바이트 수, 캐시 통계"""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def serve(host, port, warm=True, backend="auto"):
+    """
+    운영 모드 서버: 디버거/리로더 없이 실행 (serving.py 참고).
+    소켓을 먼저 열어 요청을 받을 수 있게 한 뒤 백그라운드에서 사전 준비를 한다.
+    """
+    def on_start():
+        if warm:
+            threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+    return serving.serve(
+        app, host, port,
+        threads=app.config['SERVER_THREADS'],
+        connection_limit=app.config['SERVER_CONNECTION_LIMIT'],
+        backlog=app.config['SERVER_BACKLOG'],
+        shutdown_timeout=app.config['SHUTDOWN_TIMEOUT'],
+        backend=backend,
+        on_start=on_start,
+    )
+
+
+def main(title="Shipping Mark PDF 웹앱"):
+    """변형 앱의 if __name__ == "__main__" 에서 호출: 명령줄 옵션을 읽고 서버 실행"""
+    parser = argparse.ArgumentParser(description=title)
+    parser.add_argument("--debug", action="store_true", help="개발 모드 (디버거, 코드 변경 시 자동 재시작)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--no-warmup", action="store_true", help="시작 직후 사전 준비 생략")
+    parser.add_argument("--server", default="auto", choices=("auto", "waitress", "werkzeug"),
+                        help="운영 모드 서버 (auto: waitress, 설치되어 있지 않으면 werkzeug)")
+    parser.add_argument("--threads", type=int, default=None, help="요청 처리 스레드 수")
+    parser.add_argument("--connection-limit", type=int, default=None, help="동시에 받는 연결 수")
+    parser.add_argument("--backlog", type=int, default=None, help="연결 대기열 길이")
+    parser.add_argument("--pdf-backend", default=None, choices=("pypdf4", "pikepdf"), help="PDF 라이브러리")
+    args = parser.parse_args()
+    if args.threads:
+        app.config['SERVER_THREADS'] = args.threads
+    if args.connection_limit:
+        app.config['SERVER_CONNECTION_LIMIT'] = args.connection_limit
+    if args.backlog:
+        app.config['SERVER_BACKLOG'] = args.backlog
+    if args.pdf_backend:
+        app.config['PDF_BACKEND'] = args.pdf_backend
+
+    metrics.configure_request_log(app.config['REQUEST_LOG'])
+
+    print("=" * 60)
+    print(f"  {title}")
+    print(f"  http://{args.host}:{args.port} 에서 접속하세요")
+    print("=" * 60)
+    if args.debug:
+        app.run(debug=True, host=args.host, port=args.port)
+    else:
+        serve(args.host, args.port, warm=not args.no_warmup, backend=args.server)